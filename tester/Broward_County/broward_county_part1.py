@@ -10,22 +10,46 @@ NOTE: Prereq: pip install -r requirements.txt
 # Libraries Needed 
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager # NOTE: To avoid manually downloading binary dep. for browser.
 from selenium.webdriver.common.by import By # NOTE: Needed for searching elements in html.
 from selenium.webdriver.common.keys import Keys # NOTE: Be able to click enter, arrows, etc.
 from selenium.webdriver.support.ui import WebDriverWait # NOTE: Waits for an element to exist. Goes with import below. (EC)
 from selenium.webdriver.support import expected_conditions as EC 
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import pandas as pd # NOTE: Send collected data into df --> excel
-import time # NOTE: To wait. 
 import re # NOTE: Library for search pattern or in this case to validate input
-
-def driver_initalization():
-    """
-    Initialize an instance for Chrome browser. With ChromeDriverManager.
-    """
-    return webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()))
-
+import os
+import sys
+import argparse
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')) # NOTE: So the helpers in tester/shared can be imported.
+from shared.browser_pool import BrowserPool
+from shared.readiness import install_network_tracker, wait_until_ready
+from shared.extraction import extract_table_rows, BCPA_RESULTS
+from shared.checkpoint import CheckpointJournal, start_run
+from shared.tracing import traced, span, start_tracing, finish_tracing
+from shared.command_profiler import profile_commands, start_profiling, finish_profiling
+from shared.browser_profiles import browser_options, apply_profile
+from shared.driver_resolver import chromedriver_path
+from shared.network_capture import NetworkCapture, capture_options, capture_records
+from shared.pagination import pager_state
+
+@traced('driver_start')
+@profile_commands
+def driver_initalization(profile='auto', capture=False):
+    """
+    Initialize an instance for Chrome browser. With the chromedriver pinned by shared/driver_resolver.py.
+    With capture the driver records its network responses (driver.network_capture), see shared/network_capture.py.
+    """
+    options, profile = browser_options('bcpa', profile)
+    if capture:
+        capture_options(options)
+    driver = webdriver.Chrome(service=ChromeService(chromedriver_path()), options=options)
+    apply_profile(driver, 'bcpa', profile)
+    install_network_tracker(driver) # So wait_until_ready can tell when the page's requests are done.
+    if capture:
+        NetworkCapture(driver)
+    return driver
+
+@traced('navigate')
 def website_target(driver, url):
     """
     Get the target url through driver.
@@ -43,76 +67,76 @@ def validate_userinput(target_name):
     else:
         return False
 
+@traced('validate')
 def validate_searchresults(driver):
     """
     Error handling: If target user exist then continue if not than return False. 
     """
     try: 
         driver.find_element(By.XPATH, '//*[@id="tbl-list-parcels"]')
-        time.sleep(5)
+        wait_until_ready(driver, 'bcpa') # Let the rows finish rendering.
         return True
     except NoSuchElementException:
         return False
 
-def searchbox_person(driver, name):
+@traced('search')
+def searchbox_person(driver, name, wait=True):
     """
     Have a 10second delay to wait for the element to exist. Helps if the client has slow internet connection or element pops up after a moment.
-    Using the expected condition import and time import. 
-    Then we send keys and in this case 'enter' to search for the targeted user.
+    Using the expected condition import. 
+    Then we send keys and in this case 'enter' to search for the targeted user and wait until the results page is ready.
+    With wait=False it returns right after 'enter' (capture mode waits for the response instead of the rendered page).
     """
     input_element = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.CLASS_NAME, "form-control")))
     try: 
         input_element.click()
-        time.sleep(5)
     except:
         pass
     input_element.send_keys(name + Keys.ENTER)
-    time.sleep(5)
+    if wait:
+        wait_until_ready(driver, 'bcpa')
 
+@traced('extract')
 def extract_data(driver):
     """
     The results are given in a table so we highlight the table element. 
     From there a for loop for each row. --> Then each table cell is returned in text and appended to the data variable. 
     Then returned. 
+    NOTE: Done in one execute_script (extract_table_rows) instead of a WebDriver call per cell.
     """
-    tbody = driver.find_element(By.XPATH, '//*[@id="tbl-list-parcels"]/tbody')
-    data = []
-    for tr in tbody.find_elements(By.XPATH, './/tr'):
-        row = [item.text for item in tr.find_elements(By.XPATH, './/td')]
-        data.append(row)
-    return data
+    return extract_table_rows(driver, BCPA_RESULTS)
 
+@traced('multiple_pages')
 def multiple_pages(driver):
     """
     Navigate through multiple pages of search results and extract data.
+    The last page is the one whose "Next" button is disabled (pager_state), no extra click to find a repeated page.
     """
     all_data = []
-    prev_data = None
-    while True:
-        try:
-            # Check if "No records found" element exists
-            no_records_element = driver.find_element(By.ID, 'noRecordFound')
-            if no_records_element.is_displayed():
-                print("No records found for this name.")
-                break  # Exit the loop if no records found
-        except NoSuchElementException:
-            pass
+    try:
+        # Check if "No records found" element exists
+        no_records_element = driver.find_element(By.ID, 'noRecordFound')
+        if no_records_element.is_displayed():
+            print("No records found for this name.")
+            return all_data
+    except NoSuchElementException:
+        pass
 
+    while True:
         try:
-            data = extract_data(driver)
-            if data == prev_data:
-                break  # Exit the loop if clicking "Next" doesn't lead to new data
-            all_data.extend(data)
-            prev_data = data[:]
+            all_data.extend(extract_data(driver))
+            if not pager_state(driver, 'bcpa')['has_next']:
+                break # Last page
             next_button = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.XPATH, '//*[@id="btnNextRecords"]')))
             next_button.click()
-            time.sleep(10)  # Adjust sleep time as needed
+            wait_until_ready(driver, 'bcpa') # Waits for the next page's request and rows instead of a fixed 10 seconds.
         except (NoSuchElementException, TimeoutException):
             break
 
     return all_data
 
 
+@traced('excel_write')
 def data_to_excel(data, output_file):
     """
     Using pandas we create a datafram where we pass the data extracted and create a excel file with predetermined named column: "Folio, Name, and Address". 
@@ -122,10 +146,43 @@ def data_to_excel(data, output_file):
     df.to_excel(output_file, index = False)
     print("Data has been written to:", output_file)
 
+def search_name(driver, target_name):
+    """
+    Searches one name on a driver of the pool.
+    :return: Rows of every page, None if the site has no results for the name
+    """
+    website_target(driver, 'https://web.bcpa.net/BcpaClient/#/Record-Search')
+    capture = getattr(driver, 'network_capture', None)
+    if capture:
+        capture.clear()
+        searchbox_person(driver, target_name, wait=False)
+        with span('capture'):
+            rows = capture_records(capture, 'bcpa')
+        if rows is not None:
+            return rows or None # NOTE: Every page came in the response, no table or 'next' clicks needed.
+        wait_until_ready(driver, 'bcpa') # Response not usable, carry on with the table.
+    else:
+        searchbox_person(driver, target_name)
+    if not validate_searchresults(driver):
+        return None
+    return multiple_pages(driver)
+
 def main():
     """
     Main loop where user is asked the targeted name and from there the sequence of function executes/webscrapper. 
     """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resume', action='store_true', help='Skip the names already done by the last run (see ./checkpoint)')
+    parser.add_argument('--trace', help='Folder to write a per phase timing trace to (trace.json)')
+    parser.add_argument('--profile-commands', help='Folder to write a WebDriver command profile to (commands.json)')
+    parser.add_argument('--browser-profile', choices=['auto', 'fast', 'full'], default='auto', help='auto picks per site (see shared/browser_profiles.py)')
+    parser.add_argument('--capture', action='store_true', help='Read the results from the JSON responses instead of the table (see shared/network_capture.py)')
+    args = parser.parse_args()
+    start_tracing(args.trace) # NOTE: Does nothing without --trace.
+    start_profiling(args.profile_commands)
+    completed = start_run(resume=args.resume) # NOTE: Names finished by the last run, empty unless --resume.
+    journal = CheckpointJournal() # NOTE: Every finished name is written down right away.
+
     while True:
         try:
             file_path = './input.xlsx'
@@ -135,21 +192,26 @@ def main():
             print(f"Error reading the input Excel file: {e}")
             continue
 
+        pool = BrowserPool(lambda: driver_initalization(args.browser_profile, args.capture)) # Browsers are checked out per name and recycled by the pool.
         for target_name in names:
             if not validate_userinput(target_name):
                 print(f"Invalid Input: {target_name}... Please ensure names contain only alphabetical characters and spaces!")
                 continue
-            driver = driver_initalization()
-            website_target(driver, 'https://web.bcpa.net/BcpaClient/#/Record-Search')
-            searchbox_person(driver, target_name)
-            if not validate_searchresults(driver):
+            if target_name in completed:
+                print(f"{target_name} was already done by the last run, skipping...")
+                continue
+            all_data = pool.run(search_name, target_name) # NOTE: Retried on a full profile browser if the fast one breaks.
+            if all_data is None:
                 print(f"No search results found for the name: {target_name}! Moving to the next name...")
-                driver.quit()
+                journal.record(target_name, [])
                 continue
-            all_data = multiple_pages(driver)
-            driver.quit()
             if all_data:
                 data_to_excel(all_data, f"{target_name.replace(' ', '')}_output.xlsx")
+            journal.record(target_name, all_data)
+        pool.close()
+        journal.close()
+        finish_tracing()
+        finish_profiling()
         
         print("Processing completed for all names in the input file.")
         break
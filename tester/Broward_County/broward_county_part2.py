@@ -10,23 +10,41 @@ NOTE: Prereq: pip install -r requirements.txt
 # Libraries Needed 
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager # NOTE: To avoid manually downloading binary dep. for browser.
 from selenium.webdriver.common.by import By # NOTE: Needed for searching elements in html.
 from selenium.webdriver.common.keys import Keys # NOTE: Be able to click enter, arrows, etc.
 from selenium.webdriver.support.ui import WebDriverWait # NOTE: Waits for an element to exist. Goes with import below. (EC)
 from selenium.webdriver.support import expected_conditions as EC 
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import pandas as pd # NOTE: Send collected data into df --> excel
-import time # NOTE: To wait. 
 import re # NOTE: Library for search pattern or in this case to validate input
+import os
+import sys
+import argparse
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')) # NOTE: So the helpers in tester/shared can be imported.
+from shared.browser_pool import BrowserPool
+from shared.readiness import install_network_tracker, wait_until_ready
+from shared.extraction import extract_table_rows, ACCLAIMWEB_RESULTS
+from shared.checkpoint import CheckpointJournal, start_run
+from shared.tracing import traced, start_tracing, finish_tracing
+from shared.command_profiler import profile_commands, start_profiling, finish_profiling
+from shared.browser_profiles import browser_options, apply_profile
+from shared.driver_resolver import chromedriver_path
+from shared.pagination import pager_state
 
 
-def driver_initalization():
+@traced('driver_start')
+@profile_commands
+def driver_initalization(profile='auto'):
     """
-    Initialize an instance for Chrome browser with ChromDriverManager.
+    Initialize an instance for Chrome browser with the pinned chromedriver (shared/driver_resolver.py).
     """
-    return webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()))
+    options, profile = browser_options('acclaimweb', profile)
+    driver = webdriver.Chrome(service=ChromeService(chromedriver_path()), options=options)
+    apply_profile(driver, 'acclaimweb', profile)
+    install_network_tracker(driver) # So wait_until_ready can tell when the page's requests are done.
+    return driver
 
+@traced('navigate')
 def website_target(driver, url):
     """
     Get the target URL through driver. 
@@ -44,6 +62,7 @@ def validate_userinput(target_name):
     else:
         return False
 
+@traced('validate')
 def validate_searchresults(driver):
     """
     Error handling: Checks if the user exist if so then continue if not then return False. 
@@ -54,59 +73,58 @@ def validate_searchresults(driver):
     except NoSuchElementException:
         return False
     
+@traced('search')
 def conditions_then_searchboxperson(driver, name):
     """
     Modification: For this website instead of going directly to search user page. It prompts a "accept terms/condition" page. 
-                  So we have a variable with a wait for element to appear in a 10 second interval. After 10 seconds it checks for 
-                  that element and then it clicks the element. 
-    Next, takes you to search user page and a 1p second delay for the element to exist. Helps if the client has slow connection or element
-    hasn't appeared. --> Click element and then send a key 'ENtER'
+                  So we have a variable with a wait for element to appear in a 10 second interval. Once the page is ready it
+                  clicks the element. 
+    Next, takes you to search user page and a 10 second delay for the element to exist. Helps if the client has slow connection or element
+    hasn't appeared. --> Click element and then send a key 'ENtER' and wait for the results page to be ready.
     """
     conditions_element = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.CLASS_NAME, "t-button")))
-    time.sleep(10)
+    wait_until_ready(driver, 'acclaimweb')
     conditions_element.click()
     input_element = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.XPATH, '//*[@id="SearchOnName"]')))
     try:
         #conditions_element.click()
         #time.sleep(10)
         input_element.click()
-        time.sleep(5)
     except:
         pass
     input_element.send_keys(name + Keys.ENTER)
-    time.sleep(5)
+    wait_until_ready(driver, 'acclaimweb')
 
+@traced('extract')
 def extract_data(driver):
     """
     The results in this website are given in a table. So we highlight the table element and then a for loop 
     for each row --> Then each table cell is returned in text and appended to the data variable then returned 'data'.
+    NOTE: Done in one execute_script (extract_table_rows) instead of a WebDriver call per cell.
     """
-    tbody = driver.find_element(By.XPATH, '//*[@id="RsltsGrid"]/div[4]/table/tbody')
-    data = []
-    for tr in tbody.find_elements(By.XPATH, './/tr'):
-        row = [item.text for item in tr.find_elements(By.XPATH, './/td')]
-        data.append(row)
-    return data
+    return extract_table_rows(driver, ACCLAIMWEB_RESULTS)
 
+@traced('multiple_pages')
 def multiple_pages(driver):
     """
     If target user has more than one page of results. In the current page we extract the data with 'extract_data' function and 
-    then click on the 'next' button after 10 seconds. Then extract the content of that page but with 2 variable: 'data' and 'prev_data'
-    We compare the next and current page data if both are the same then we know there is no more page so we just break out of the if
-    statement and  add the data to 'all_data' --> return data. 
+    then click on the 'next' button and wait for the grid to be ready. The grid's own pager (pager_state) tells when we are on
+    the last page (disabled 'next', all records of the status text read), so no extra page is loaded just to compare it.
     """
     all_data = []
-    prev_data = None
+    state = pager_state(driver, 'acclaimweb')
+    if state['total']:
+        print(f"{state['total']} records over {state['pages'] or '?'} pages.")
     while True:
         try: 
-            data = extract_data(driver)
-            if data == prev_data:
-                break   # Breaks if clicking 'Next' doesn't lead to new data .
-            all_data.extend(data)
-            prev_data = data[:]
+            all_data.extend(extract_data(driver))
+            if not state['has_next'] or (state['total'] and len(all_data) >= state['total']):
+                break # Last page
+            print(f"{len(all_data)}/{state['total'] or '?'} records...")
             next_button = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.XPATH, '//*[@id="RsltsGrid"]/div[2]/div[2]/a[3]/span')))
             next_button.click()
-            time.sleep(10)
+            wait_until_ready(driver, 'acclaimweb')
+            state = pager_state(driver, 'acclaimweb')
         except (NoSuchElementException, TimeoutException):
             break
     return all_data
@@ -120,6 +138,7 @@ def replace_empty_with_null(value):
     else:
         return value
 
+@traced('excel_write')
 def data_to_excel(data, output_file):
     """
     Using pandas we create a framework where we pass the extracted data and columns we named. Then it creates 
@@ -132,10 +151,32 @@ def data_to_excel(data, output_file):
     df_replaced.to_excel(output_file, index=False)
     print("Data has been written to:", output_file)
 
+def search_name(driver, target_name):
+    """
+    Searches one name on a driver of the pool.
+    :return: Rows of every page, None if the site has no results for the name
+    """
+    website_target(driver, 'https://officialrecords.broward.org/AcclaimWeb/search/Disclaimer?st=/AcclaimWeb/search/SearchTypeName')
+    conditions_then_searchboxperson(driver, target_name)
+    if not validate_searchresults(driver):
+        return None
+    return multiple_pages(driver)
+
 def main():
     """
     Main loop where we utilize all functions to do the webscrapping on the website with the targeted user. 
     """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resume', action='store_true', help='Skip the names already done by the last run (see ./checkpoint)')
+    parser.add_argument('--trace', help='Folder to write a per phase timing trace to (trace.json)')
+    parser.add_argument('--profile-commands', help='Folder to write a WebDriver command profile to (commands.json)')
+    parser.add_argument('--browser-profile', choices=['auto', 'fast', 'full'], default='auto', help='auto picks per site (see shared/browser_profiles.py)')
+    args = parser.parse_args()
+    start_tracing(args.trace) # NOTE: Does nothing without --trace.
+    start_profiling(args.profile_commands)
+    completed = start_run(resume=args.resume) # NOTE: Names finished by the last run, empty unless --resume.
+    journal = CheckpointJournal() # NOTE: Every finished name is written down right away.
+
     while True:
         try:
             file_path = './input.xlsx'
@@ -145,20 +186,25 @@ def main():
             print(f"Error reading the input Excel file: {e}")
             continue
         # Getting it from a list of names to a loop for each name
+        pool = BrowserPool(lambda: driver_initalization(args.browser_profile)) # Browsers are checked out per name and recycled by the pool.
         for target_name in names:
             if not validate_userinput(target_name):
                 print(f"Invalid Input: {target_name}... Please ensure names contain only alphabetical characters and spaces!")
                 continue
-            driver = driver_initalization()
-            website_target(driver, 'https://officialrecords.broward.org/AcclaimWeb/search/Disclaimer?st=/AcclaimWeb/search/SearchTypeName')
-            conditions_then_searchboxperson(driver, target_name)
-            if not validate_searchresults(driver):
+            if target_name in completed:
+                print(f"{target_name} was already done by the last run, skipping...")
+                continue
+            all_data = pool.run(search_name, target_name) # NOTE: Retried on a full profile browser if the fast one breaks.
+            if all_data is None:
                 print(f"No search results found for the name: {target_name}! Moving to the next name...")
+                journal.record(target_name, [])
                 continue
-
-            all_data = multiple_pages(driver)
-            driver.quit()
             data_to_excel(all_data, f"{target_name.replace(' ','')}_output.xlsx")
+            journal.record(target_name, all_data)
+        pool.close()
+        journal.close()
+        finish_tracing()
+        finish_profiling()
 
         print("Processing completed for all names in the input file.")
         break
@@ -11,23 +11,42 @@ NOTE: Prereq: pip install -r requirements.txt
 # Libraries Needed
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService # NOTE: To avoid manually downloading binary dep. for browser.
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By # NOTE: Needed for searching elements in html.
 from selenium.webdriver.common.keys import Keys # NOTE: Be able to click enter, arrows, etc.
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import pandas as pd # NOTE: Send collected data into df --> excel
-import time
 import re # NOTE: Library for search pattern or in this case to validate input
 from urllib.parse import urlparse, parse_qs, urlunparse, urlencode
+import os
+import sys
+import argparse
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')) # NOTE: So the helpers in tester/shared can be imported.
+from shared.browser_pool import BrowserPool
+from shared.readiness import install_network_tracker, wait_until_ready
+from shared.html_parsing import parse_tax_cards
+from shared.tax_http import TaxSearchClient, RequiresBrowser, search_url
+from shared.pagination import crawl_tabs, tax_pager_numbers, CrawlIncomplete
+from shared.checkpoint import CheckpointJournal, start_run
+from shared.tracing import traced, start_tracing, finish_tracing
+from shared.command_profiler import profile_commands, start_profiling, finish_profiling
+from shared.browser_profiles import browser_options, apply_profile
+from shared.driver_resolver import chromedriver_path
 
-def driver_initialization():
+@traced('driver_start')
+@profile_commands
+def driver_initialization(profile='auto'):
     """
-    Initialize an instance for Chrome browser with ChromeDriveManager 
+    Initialize an instance for Chrome browser with the pinned chromedriver (shared/driver_resolver.py).
     """
-    return webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()))
+    options, profile = browser_options('county_taxes', profile)
+    driver = webdriver.Chrome(service=ChromeService(chromedriver_path()), options=options)
+    apply_profile(driver, 'county_taxes', profile)
+    install_network_tracker(driver) # So wait_until_ready can tell when the page's requests are done.
+    return driver
 
+@traced('navigate')
 def website_target(driver, url):
     """
     Get the target through URL 
@@ -46,6 +65,7 @@ def validate_user_input(target_name):
     else:
         return False
 
+@traced('validate')
 def validate_searchresults(driver, wait_time=60):
     # Checks if the search results are available or no matches 
     try:
@@ -76,6 +96,7 @@ def validate_searchresults(driver, wait_time=60):
         return False
 
 
+@traced('search')
 def searchbox_person(driver, name):
     """
     Wait for the search box even if it is available once in the website. 
@@ -84,12 +105,12 @@ def searchbox_person(driver, name):
     try:
         input_element = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.XPATH, "//input[starts-with(@placeholder, 'Enter a name')]")))
         input_element.click()
-        time.sleep(3)
         input_element.send_keys(name + Keys.ENTER)
-        time.sleep(5)
+        wait_until_ready(driver, 'county_taxes')
     except Exception as e:
         print(f"Error occurred while searching {e}")
 
+@traced('extract')
 def extract_data(driver):
     """
     Extracting the data from the results if user is found. Required more modification than other since it wasn't presented in a table like others. 
@@ -127,45 +148,48 @@ def extract_data(driver):
         print(f"Error occurred during data extraction {e}")
     return data
 
-def navigate_to_next_page(driver, current_page_number):
+@traced('parse')
+def parse_card_page(html):
     """
-    We utilized the pagination/button to go to the next page of search results. 
+    Same rows as extract_data but from the html of a results page (used by the http backend).
     """
-    try:
-        # Locate the pagination nav. element
-        pagination_nav = WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.XPATH, "//nav[@aria-label='Pagination']")))
-        ul = pagination_nav.find_element(By.TAG_NAME, 'ul')
-        list_items = ul.find_elements(By.TAG_NAME, 'li')
-        # Clicking the next page button.
-        for item in list_items:
-            if item.text == str(current_page_number + 1):
-                item.click()
-                time.sleep(2)
-                return True
-            
-        return False # Might be on the last page
-    except Exception as e:
-        print(f"Error occurred during pagination: {e}")
-        return False
-    
-def multiple_pages(driver, current_page_number):
+    data = []
+    for card in parse_tax_cards(html, card_class='content-card', strip_commas=False):
+        billing_name_address, owner_name, address = 'NULL', 'NULL', 'NULL'
+        for label, address_text in card.addresses.items():
+            if label == "BILLING ADDRESS":
+                billing_name_address = address_text
+            elif label == "OWNER/ADDRESS":
+                parts = address_text.split('\n')
+                if len(parts) > 1:
+                    owner_name, address = parts[0].strip(','), ' '.join(parts[1:]).strip(',')
+                else:
+                    address = parts[0]
+            elif label == "ADDRESS":
+                address = address_text
+        data.append([card.account.strip(), owner_name, address, billing_name_address])
+    return data
+
+@traced('multiple_pages')
+def multiple_pages(driver, target_name):
     """
-    If more than one page then we pass page number and extract the data of that page. 
+    Reads every page of results. The page numbers come from the pager of the first page and the other pages are
+    opened by url in a few tabs at once (shared/pagination.py) instead of clicking through them one by one.
+    :return: Tuple (rows, complete). complete is False when a page failed, rows then hold the pages read before it.
     """
     all_data = []
+    complete = True
     try:
-        while True:
-            data = extract_data(driver)
-            all_data.extend(data)
-            if not navigate_to_next_page(driver, current_page_number):
-                break
-            else:
-                current_page_number += 1
-            time.sleep(5)
-    except Exception as e:
-        print(f"Error occured during pagination: {e}")
-    return all_data
+        pages = crawl_tabs(driver, lambda page: search_url('collier', target_name, page),
+                           lambda driver, page: extract_data(driver), tax_pager_numbers, 'county_taxes')
+    except CrawlIncomplete as e:
+        print(f"Error occurred during pagination: {e}")
+        pages, complete = e.pages, False
+    for data in pages:
+        all_data.extend(data)
+    return all_data, complete
 
+@traced('excel_write')
 def data_to_excel(data, output_file):
     """
     Using pandas to create a framework where we pass the extracted data and columns we need. Then creates
@@ -179,12 +203,35 @@ def data_to_excel(data, output_file):
     except Exception as e:
         print(f"Error occurred while writing data to Excel: {e}")
 
+def search_name(driver, target_name):
+    """
+    Searches one name in the browser, for the names the http backend couldn't do.
+    :return: Tuple (rows, complete) like multiple_pages, None if the site has no results for the name
+    """
+    website_target(driver, 'https://collier.county-taxes.com/public/search/property_tax')
+    searchbox_person(driver, target_name)
+    if not validate_searchresults(driver):
+        return None
+    return multiple_pages(driver, target_name)
+
 def main():
     """
     Main loop where we utilize all functions to do the webscrapping on the website with the list of targeted user. 
     NOTE: A modification is to pass an .excel that in turn we read and pass the names into a list. 
           Before it would just ask maually for user name in the command line but here it just read the file and runs the script. 
     """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resume', action='store_true', help='Skip the names already done by the last run (see ./checkpoint)')
+    parser.add_argument('--trace', help='Folder to write a per phase timing trace to (trace.json)')
+    parser.add_argument('--profile-commands', help='Folder to write a WebDriver command profile to (commands.json)')
+    parser.add_argument('--browser-profile', choices=['auto', 'fast', 'full'], default='auto', help='auto picks per site (see shared/browser_profiles.py)')
+    parser.add_argument('--backend', choices=['http', 'browser'], default='http', help='http falls back to the browser per name when the site needs JS')
+    args = parser.parse_args()
+    start_tracing(args.trace) # NOTE: Does nothing without --trace.
+    start_profiling(args.profile_commands)
+    completed = start_run(resume=args.resume) # NOTE: Names finished by the last run, empty unless --resume.
+    journal = CheckpointJournal() # NOTE: Every finished name is written down right away.
+
     while True: 
         try:
             file_path = "./input.xlsx"
@@ -194,21 +241,48 @@ def main():
             print(f"Error reading the input Excel file: {e}")
             continue
         
+        targets = []
         for target_name in names:
             if not validate_user_input(target_name):
                 print(f"Invalid Input: {target_name}... Please ensure names contain only alphabetical characters and spaces!")
                 continue
-            driver = driver_initialization()
-            website_target(driver, 'https://collier.county-taxes.com/public/search/property_tax')
-            searchbox_person(driver, target_name)
-            if not validate_searchresults(driver):
+            if target_name in completed:
+                print(f"{target_name} was already done by the last run, skipping...")
+                continue
+            targets.append(target_name)
+
+        # NOTE: Plain http requests first (shared/tax_http.py), Chrome is only opened for the names that need it.
+        if args.backend == 'http':
+            client = TaxSearchClient('collier')
+            searched = client.search_many(targets, parse_card_page)
+            client.close()
+        else:
+            searched = [RequiresBrowser("--backend browser")] * len(targets)
+
+        pool = BrowserPool(lambda: driver_initialization(args.browser_profile)) # Browsers are checked out per name and recycled by the pool.
+        for target_name, all_data in zip(targets, searched):
+            if isinstance(all_data, RequiresBrowser):
+                print(f"{target_name}: {all_data}. Using the browser instead.")
+                searched_name = pool.run(search_name, target_name) # NOTE: Retried on a full profile browser if the fast one breaks.
+                if searched_name is None:
+                    print(f"No search results found for the name: {target_name}! Moving to the next name...")
+                    journal.record(target_name, [])
+                    continue
+                all_data, complete = searched_name
+                if not complete:
+                    # NOTE: The pages read are still written out, but the name is left out of the journal so --resume searches it again.
+                    data_to_excel(all_data, f"{target_name.replace(' ', '')}_output.xlsx")
+                    continue
+            elif not all_data:
+                journal.record(target_name, [])
                 print(f"No search results found for the name: {target_name}! Moving to the next name...")
-                driver.quit()
                 continue
-            current_page_number = 1
-            all_data = multiple_pages(driver, current_page_number)
-            driver.quit()
             data_to_excel(all_data, f"{target_name.replace(' ', '')}_output.xlsx")
+            journal.record(target_name, all_data)
+        pool.close()
+        journal.close()
+        finish_tracing()
+        finish_profiling()
         
         print("Processing completed for all names in the input file.")
         break
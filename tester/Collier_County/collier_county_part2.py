@@ -14,7 +14,6 @@ Note: Prereq: pip install -r requirements.txt
 # Libraries Needed 
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService # NOTE: To avoid manually downloading binary dep. for browser.
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By # NOTE: Needed for searching elements in html.
 from selenium.webdriver.common.keys import Keys # NOTE: Be able to click enter, arrows, etc.
 from selenium.webdriver.support.ui import WebDriverWait
@@ -23,12 +22,31 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException,
 from selenium.webdriver.common.action_chains import ActionChains # NOTE: Ex. scroll the page to the bottom
 import pandas as pd # NOTE: Send collected data into df --> excel
 import re # NOTE: Library for search pattern or in this case to validate input
-import time
+import os
+import sys
+import argparse
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')) # NOTE: So the helpers in tester/shared can be imported.
+from shared.browser_pool import BrowserPool
+from shared.readiness import install_network_tracker, wait_until_ready
+from shared.extraction import extract_table_rows, JQGRID_RESULTS
+from shared.checkpoint import CheckpointJournal, start_run
+from shared.tracing import traced, start_tracing, finish_tracing
+from shared.command_profiler import profile_commands, start_profiling, finish_profiling
+from shared.browser_profiles import browser_options, apply_profile
+from shared.driver_resolver import chromedriver_path
+from shared.pagination import pager_state
 
-def driver_initialization():
-    # Initialize an instance for Chrome Browser with ChromeDriverManager
-    return webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()))
+@traced('driver_start')
+@profile_commands
+def driver_initialization(profile='auto'):
+    # Initialize an instance for Chrome Browser with the pinned chromedriver (shared/driver_resolver.py)
+    options, profile = browser_options('collier_appraiser', profile)
+    driver = webdriver.Chrome(service=ChromeService(chromedriver_path()), options=options)
+    apply_profile(driver, 'collier_appraiser', profile)
+    install_network_tracker(driver) # So wait_until_ready can tell when the page's requests are done.
+    return driver
 
+@traced('navigate')
 def website_target(driver, url):
     return driver.get(url) # Get the target URL 
 
@@ -45,6 +63,7 @@ def validate_user_input(target_name):
     else:
         return False
     
+@traced('validate')
 def validate_search_results(driver):
     """
     Error Handling: Checks if the user results exist or not. If so then continue if not then return False. 
@@ -56,10 +75,10 @@ def validate_search_results(driver):
         single_result = driver.find_element(By.CLASS_NAME, 'ui-jqgrid-btable')
         result_table = driver.find_element(By.ID, 'PropSum')
         if single_result:
-            time.sleep(5)
+            wait_until_ready(driver, 'collier_appraiser')
             return True
         elif result_table:
-            time.sleep(5)
+            wait_until_ready(driver, 'collier_appraiser')
             return True
         else:
             return False
@@ -75,6 +94,7 @@ def validate_search_results(driver):
 
        
     
+@traced('search')
 def searchbox_person(driver, name):
     """
     Before we are able to reach the search box. We must accept the:
@@ -90,7 +110,7 @@ def searchbox_person(driver, name):
     try:
         continue_button = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.XPATH, '/html/body/div[1]/div[3]/div/button')))
         continue_button.click()
-        time.sleep(5)
+        wait_until_ready(driver, 'collier_appraiser')
     except Exception as e:
         print('Error Clicking the continue condition button:', str(e))
     driver.switch_to.default_content() # Switch back to default content
@@ -100,28 +120,28 @@ def searchbox_person(driver, name):
     try: 
         search_database_button = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.XPATH, '//a[contains(text(), "Search Database")]')))
         search_database_button.click()
-        time.sleep(5)
+        wait_until_ready(driver, 'collier_appraiser')
     except Exception as e:
         print('Error clicking the database search button', str(e))
     driver.switch_to.default_content() # Back to the default frame
     driver.switch_to.frame('rbottom') # Switch to the rbottom frame
-    time.sleep(5)
+    wait_until_ready(driver, 'collier_appraiser')
     # After switching back to rbottom frame. We must click 'I Acccept Button'. Another condition before actual sending target name.
     iaccept_button = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.LINK_TEXT, 'I Accept')))
     iaccept_button.click()
-    time.sleep(5)
+    wait_until_ready(driver, 'collier_appraiser')
     # Setting up the input element to pass the target name to the textbox
     input_element = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.ID, 'Name1')))
     try:
         input_element.click() # Click the textbox 
-        time.sleep(3)
     except:
         pass
     last_name, first_name = name.split() # Splitting the name to include a comma after the last name
     name = last_name + ", " + first_name # Due to excel simply having last and first name in data cell. And it needs a comma for results to appear.
     input_element.send_keys(name + Keys.ENTER)
-    time.sleep(10)
+    wait_until_ready(driver, 'collier_appraiser')
 
+@traced('extract')
 def extract_data(driver):
     """
     To extract data from the results of the target name.
@@ -132,13 +152,8 @@ def extract_data(driver):
     #data = []
     # Check if there are multiple results
     if len(driver.find_elements(By.CLASS_NAME, 'ui-jqgrid-btable')) > 0:
-        # If there are multiple results, extract data from the table
-        tbody = driver.find_element(By.CLASS_NAME, 'ui-jqgrid-btable')
-        data = []
-        for tr in tbody.find_elements(By.XPATH, './/tr'):
-            row = [item.text for item in tr.find_elements(By.XPATH, ".//td")]
-            data.append(row)
-        return data
+        # If there are multiple results, extract data from the table (one execute_script for the whole grid)
+        return extract_table_rows(driver, JQGRID_RESULTS)
         #df = pd.DataFrame(data, columns=['Number', 'Parcel No.', 'UC.', 'Owner Name', 'No.', 'Street', 'S/C No.', 'Bk/Bd', 'L/Unt', 'Sold', 'Sale Amt', 'Market'])
         #df.to_excel("output.xlsx")
     else:
@@ -163,38 +178,37 @@ def extract_data(driver):
         """
          Had issues with datatoexcel for this result table when using the function below. Couldn't distinguish
         between the 2 since it yield different results. So I decided to do it here since its just one result/no more pages. 
-        And since the result is not displayed corretly in a mess so it decided to put in columns of name and value. And convert to excel and quit driver. 
+        And since the result is not displayed corretly in a mess so it decided to put in columns of name and value. And convert to excel.
+        NOTE: The driver is no longer quit here, main() hands it back to the browser pool.
         """
-        driver.quit()
         
 
 
+@traced('multiple_pages')
 def multiple_pages(driver):
     """
     We are extracting data using the next page button. Since there are more than one results of page. 
     The extraction of data stops when the button is disabled. From there we know no more data is to be extracted so we 
     break and return all collected data. 
+    NOTE: The button state, record count and page count come from one pager_state call per page.
     """
     all_data = []
-    prev_data = None
+    state = pager_state(driver, 'collier_appraiser')
+    if state['total']:
+        print(f"{state['total']} records over {state['pages'] or '?'} pages.")
     while True:
         try:
             data = extract_data(driver)
-            if data == prev_data:
-                break
+            if data is None:
+                break # Single result: extract_data wrote the property summary itself, there are no pages
             all_data.extend(data)
-            prev_data = data[:]
-            
-            next_page_button = driver.find_element(By.XPATH, "//td[@id='next_pager']")
-            class_attribute = next_page_button.get_attribute("class")
-            
             # Check if the "Next" page button is disabled
-            if "ui-state-disabled" not in class_attribute:
-                next_page_button.click()
-                time.sleep(10)  # Add a short delay to allow the page to load
-            else:
+            if not state['has_next']:
                 print("No more pages. Exiting...")
                 break  # Break the loop if the "Next" page button is disabled
+            driver.find_element(By.XPATH, "//td[@id='next_pager']").click()
+            wait_until_ready(driver, 'collier_appraiser') # Wait for the grid to load the next page
+            state = pager_state(driver, 'collier_appraiser')
         except (NoSuchElementException, TimeoutException):
             break
     return all_data
@@ -205,6 +219,7 @@ def replace_empty_with_null(value):
     else:
         return value
 
+@traced('excel_write')
 def data_to_excel(data, output_file):
     if data:  # Check if data is not empty
         # Extracted data is in a different format (adjust as needed)
@@ -218,10 +233,32 @@ def data_to_excel(data, output_file):
     else:
         print("No data to write.")
 
+def search_name(driver, target_name):
+    """
+    Searches one name on a driver of the pool.
+    :return: Rows of every page, None if the site has no results for the name
+    """
+    website_target(driver, 'https://www.collierappraiser.com/')
+    searchbox_person(driver, target_name)
+    if validate_search_results(driver):
+        return None
+    return multiple_pages(driver)
+
 def main():
     """
     Main loop where we utilize all functions to do the webscrapping on the website with the target user. 
     """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resume', action='store_true', help='Skip the names already done by the last run (see ./checkpoint)')
+    parser.add_argument('--trace', help='Folder to write a per phase timing trace to (trace.json)')
+    parser.add_argument('--profile-commands', help='Folder to write a WebDriver command profile to (commands.json)')
+    parser.add_argument('--browser-profile', choices=['auto', 'fast', 'full'], default='auto', help='auto picks per site (see shared/browser_profiles.py)')
+    args = parser.parse_args()
+    start_tracing(args.trace) # NOTE: Does nothing without --trace.
+    start_profiling(args.profile_commands)
+    completed = start_run(resume=args.resume) # NOTE: Names finished by the last run, empty unless --resume.
+    journal = CheckpointJournal() # NOTE: Every finished name is written down right away.
+
     while True:
         try:
             file_path = "./input.xlsx"
@@ -231,21 +268,25 @@ def main():
             print(f"Error reading the input Excel file: {e}")
             continue
         # Getting it from the list of names --> into a loop for each name
+        pool = BrowserPool(lambda: driver_initialization(args.browser_profile)) # Browsers are checked out per name and recycled by the pool.
         for target_name in names:
             if not validate_user_input(target_name):
                 print(f"Invalid Input: {target_name}... Please ensure names contain only alphabetical characters and spaces!")
                 continue
-            driver = driver_initialization()
-            website_target(driver, 'https://www.collierappraiser.com/')
-            searchbox_person(driver, target_name)
-            if validate_search_results(driver):
+            if target_name in completed:
+                print(f"{target_name} was already done by the last run, skipping...")
+                continue
+            all_data = pool.run(search_name, target_name) # NOTE: Retried on a full profile browser if the fast one breaks.
+            if all_data is None:
                 print(f"No search results found for the name: {target_name}! Moving to the next name...")
-                driver.quit()
+                journal.record(target_name, [])
                 continue
-        
-            all_data = multiple_pages(driver)
-            driver.quit()
             data_to_excel(all_data, f"{target_name.replace(' ', '')}_output.xlsx")
+            journal.record(target_name, all_data)
+        pool.close()
+        journal.close()
+        finish_tracing()
+        finish_profiling()
         
         print("Processing completed for all names in the input file.")
         break
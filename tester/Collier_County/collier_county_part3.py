@@ -10,7 +10,6 @@ NOTE: Prereq: pip install -r requirements.txt
 # Libraries Needed 
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService # NOTE: To avoid manually downloading binary dep. for browser.
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By # NOTE: Needed for searching elements in html.
 from selenium.webdriver.common.keys import Keys # NOTE: Be able to click enter, arrows, etc.
 from selenium.webdriver.support.ui import WebDriverWait
@@ -18,9 +17,19 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import pandas as pd # NOTE: Send collected data into df --> excel
 import re # NOTE: Library for search pattern or in this case to validate input
-import time
 import os 
+import sys
+import argparse
 from selenium.webdriver.chrome.options import Options
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')) # NOTE: So the helpers in tester/shared can be imported.
+from shared.readiness import install_network_tracker, wait_until_ready
+from shared.checkpoint import CheckpointJournal, start_run
+from shared.tracing import span, instrument_driver, start_tracing, finish_tracing
+from shared.command_profiler import profile_driver, start_profiling, finish_profiling
+from shared.driver_resolver import chromedriver_path
+from shared.network_capture import NetworkCapture, capture_options, export_bytes
+from shared.downloads import DownloadWatcher, DownloadTimeout, take
+from shared.export_ingest import read_export, ExportError
 
 # Function thats checks the target name are valid 'names format'
 def validate_user_input(target_name):
@@ -39,6 +48,16 @@ def replace_empty_wnull(value):
         return value
     
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resume', action='store_true', help='Skip the names already done by the last run (see ./checkpoint)')
+    parser.add_argument('--trace', help='Folder to write a per phase timing trace to (trace.json)')
+    parser.add_argument('--profile-commands', help='Folder to write a WebDriver command profile to (commands.json)')
+    parser.add_argument('--capture', action='store_true', help='Take the export from its network response instead of the download folder (see shared/network_capture.py)')
+    args = parser.parse_args()
+    start_tracing(args.trace) # NOTE: Does nothing without --trace.
+    start_profiling(args.profile_commands)
+    completed = start_run(resume=args.resume) # NOTE: Names finished by the last run, empty unless --resume.
+    journal = CheckpointJournal() # NOTE: Every finished name is written down right away.
 
     while True:
         try:
@@ -52,6 +71,9 @@ def main():
         for target_name in names:
             if not validate_user_input(target_name):
                 continue
+            if target_name in completed:
+                print(f"{target_name} was already done by the last run, skipping...")
+                continue
             # Setting the driver ready and downloads set to default directory
             chrome_options = Options()
             chrome_options.add_experimental_option("prefs", {
@@ -60,46 +82,78 @@ def main():
                 "download.directory_upgrade": True,
                 "safebrowsing.enabled": True
             })
-            driver = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()), options=chrome_options)
-            driver.get('https://cor.collierclerk.com/coraccess/search/document')
-            # Waiting for the presets to appear. Then sending keys to select the correct document type.
-            time.sleep(5)
-            document_presets_dropdown = WebDriverWait(driver, 10).until(EC.visibility_of_element_located((By.XPATH, "//span[@class='e-ddl e-lib valid e-input-group e-control-container e-control-wrapper e-valid-input']")))
-            document_presets_dropdown.click()
-            time.sleep(5)
-            document_presets_dropdown.send_keys(Keys.ARROW_DOWN)
-            time.sleep(5)
-            document_presets_dropdown.send_keys(Keys.ENTER)
-            time.sleep(5)
-            # After correct presets. We must click on textbox('Business Name') and pass names
-            business_name_textbox = driver.find_element(By.XPATH, "//input[@id='BusinessCORPubBlazor.ViewModels.PartyGroup0']")
-            business_name_textbox.click()
-            business_name_textbox.send_keys(target_name + Keys.ENTER)
-            time.sleep(15) # Takes a while for results to load
+            if args.capture:
+                capture_options(chrome_options)
+            with span('driver_start'):
+                driver = instrument_driver(profile_driver(webdriver.Chrome(service=ChromeService(chromedriver_path()), options=chrome_options)))
+                install_network_tracker(driver)
+                capture = NetworkCapture(driver) if args.capture else None
+            with span('navigate'):
+                driver.get('https://cor.collierclerk.com/coraccess/search/document')
+                # Waiting for the presets to appear. Then sending keys to select the correct document type.
+                wait_until_ready(driver, 'collier_clerk')
+                document_presets_dropdown = WebDriverWait(driver, 10).until(EC.visibility_of_element_located((By.XPATH, "//span[@class='e-ddl e-lib valid e-input-group e-control-container e-control-wrapper e-valid-input']")))
+                document_presets_dropdown.click()
+                wait_until_ready(driver, 'collier_clerk')
+                document_presets_dropdown.send_keys(Keys.ARROW_DOWN)
+                wait_until_ready(driver, 'collier_clerk')
+                document_presets_dropdown.send_keys(Keys.ENTER)
+                wait_until_ready(driver, 'collier_clerk')
+            with span('search'):
+                # After correct presets. We must click on textbox('Business Name') and pass names
+                business_name_textbox = driver.find_element(By.XPATH, "//input[@id='BusinessCORPubBlazor.ViewModels.PartyGroup0']")
+                business_name_textbox.click()
+                business_name_textbox.send_keys(target_name + Keys.ENTER)
+                # Takes a while for results to load. Done as soon as the export button shows up, at most the 15 seconds it used to sleep.
+                wait_until_ready(driver, 'collier_clerk', (By.XPATH, "//span[text()='Export to Excel']"), 0, timeout=15)
             # Try and Except if the Excel button appears. Except occurs when no button appears and leads to ending of session.
-            try:
-                download_excel_button = driver.find_element(By.XPATH, "//span[text()='Export to Excel']")
-                download_excel_button.click()
-                time.sleep(5)
-                # Current directory is where the file is downloaded. 
-                downloaded_file_path = "./OfficialRecordsSearch.xlsx"
-                # Construct new file name based on target name
-                new_file_name = f"{target_name.replace(' ', '')}_output.xlsx"
-                # Rename the downloaded file to match the new file name
-                os.rename(downloaded_file_path, new_file_name)
-                print(f"File downloaded and renamed to {new_file_name}")
-                # Read the downloaded Excel file into a DataFrame
-                df = pd.read_excel(new_file_name)
-                # Apply the replace_empty_wnull function using .map()
-                df = df.map(replace_empty_wnull)
-                # Write the DataFrame back to Excel
-                df.to_excel(new_file_name, index=False)
+            with span('export'):
+                try:
+                    download_excel_button = driver.find_element(By.XPATH, "//span[text()='Export to Excel']")
+                    if capture:
+                        capture.clear()
+                    # Construct new file name based on target name
+                    new_file_name = f"{target_name.replace(' ', '')}_output.xlsx"
+                    # Watching starts before the click, so older exports in the folder are never picked up
+                    with DownloadWatcher(os.getcwd()) as downloads:
+                        download_excel_button.click()
+                        export = None
+                        workbook = export_bytes(capture, 'collier_clerk', timeout=10) if capture else None
+                        if workbook is not None:
+                            try:
+                                export = read_export(workbook, json_values=False)
+                            except ExportError as e:
+                                print(f"The captured response of {target_name} is not the export ({e}), using the download instead")
+                        # Current directory is where the file is downloaded (as OfficialRecordsSearch.xlsx, or with ' (1)' if taken).
+                        # With --capture the browser still saves its own copy, which is then only removed.
+                        try:
+                            downloaded = downloads.wait('OfficialRecordsSearch', '.xlsx', timeout=60 if export is None else 10)
+                        except DownloadTimeout:
+                            if export is None:
+                                raise
+                            downloaded = None
+                        if downloaded:
+                            workbook = take(downloaded)
+                    # Read the export from memory, empty cells become 'NULL' while the rows are read
+                    columns, rows = export or read_export(workbook, json_values=False)
+                    rows = [[replace_empty_wnull(value) for value in row] for row in rows]
+                    # Written once, under the file name of the target name
+                    pd.DataFrame(rows, columns=columns).to_excel(new_file_name, index=False)
+                    print(f"Export written to {new_file_name}")
+                    journal.record(target_name) # NOTE: Only once the export is saved, a failed one is searched again by --resume.
                 
-            except NoSuchElementException:
-                print(f"No Export to Excel found therefore no results appeared for {target_name}")
+                except NoSuchElementException:
+                    print(f"No Export to Excel found therefore no results appeared for {target_name}")
+                except DownloadTimeout as e:
+                    print(f"The export of {target_name} never finished downloading: {e}")
+                except ExportError as e:
+                    print(f"The export of {target_name} could not be read: {e}")
                 
             driver.quit()
         
+        journal.close()
+        finish_tracing()
+        finish_profiling()
         print("Processing completed for all names in the input file!")
         break
 
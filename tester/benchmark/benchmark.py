@@ -0,0 +1,213 @@
+"""
+Throughput benchmark of the scrapers against the local mock sites (mock_sites.py).
+
+Every script runs unchanged: its main() is called with a generated input workbook, and the urls its browser opens
+(and the county-taxes urls of the http backend) are sent to the mock server instead of the live sites. The mock
+server sees every search and every results page, which gives:
+
+    names/min   names searched per minute of wall time
+    pages/s     results pages served per second
+    p50 / p95   per name latency: from the first request of a name's search to its last results page served
+                (names without results aren't counted, they have no results page)
+
+Same names, same fake records and the same latency every run, so two runs can be compared before/after a change.
+
+Usage (from tester/):
+    python benchmark/benchmark.py                              # every script, 20 names
+    python benchmark/benchmark.py lee_tax lee_tax_browser --names 50 --latency-ms 200
+    python benchmark/benchmark.py --json before.json
+
+NOTE: Needs the scripts' own dependencies (selenium, pandas, openpyxl, Chrome). Scripts whose import fails are skipped.
+      Collier part3 (Blazor clerk site) isn't mocked.
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import types
+
+import pandas as pd
+from selenium import webdriver
+
+TESTER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(TESTER_DIR) # NOTE: Same shared package the scripts import.
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import shared.tax_http as tax_http # NOTE: Patched so the http backend talks to the mock server too.
+from mock_sites import MockServer, SiteConfig
+
+
+# name -> (script, input workbook, name column, extra argv)
+SCRIPTS = {
+    'broward_part1': ('Broward_County/broward_county_part1.py', 'input.xlsx', 'Name', []),
+    'broward_part2': ('Broward_County/broward_county_part2.py', 'input.xlsx', 'Name', []),
+    'broward_part3': ('Broward_County/broward_county_part3.py', 'input.xlsx', 'Name', []),
+    'collier_part1': ('Collier_County/collier_county_part1.py', 'input.xlsx', 'Name', []),
+    'collier_part2': ('Collier_County/collier_county_part2.py', 'input.xlsx', 'Name', []),
+    'lee_appraiser': ('property appraiser/01-26-2024/bot_v1.py', 'input.xlsx', 'name', ['--no-cache']),
+    'lee_tax': ('tax collector/01-26-2024/bot_v1.py', 'input.xlsx', 'name', ['--no-cache']),
+    'lee_tax_browser': ('tax collector/01-26-2024/bot_v1.py', 'input.xlsx', 'name', ['--no-cache', '--backend', 'browser']),
+    'lee_clerk': ('clerk/02-18-2024/bot.py', 'big_input.xlsx', 'name', ['--no-cache']),
+}
+
+FIRST_NAMES = ['John', 'Mary', 'James', 'Patricia', 'Robert', 'Linda', 'Michael', 'Barbara', 'David', 'Susan']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez']
+
+
+def benchmark_names(count):
+    """
+    Same list of 'Last First' names for the same count.
+    """
+    return [f"{LAST_NAMES[number % len(LAST_NAMES)]} {FIRST_NAMES[(number // len(LAST_NAMES)) % len(FIRST_NAMES)]}"
+            for number in range(count)]
+
+
+def mock_webdriver(server, headless=True):
+    """
+    Stand in for the selenium.webdriver module of a script: same module, but Chrome opens every url on the mock server.
+    """
+    class MockChrome(webdriver.Chrome):
+        def __init__(self, *args, options=None, **kwargs):
+            options = options or webdriver.ChromeOptions()
+            if headless:
+                options.add_argument('--headless=new')
+            super().__init__(*args, options=options, **kwargs)
+
+        def get(self, url):
+            super().get(server.rewrite_url(url))
+
+    module = types.ModuleType('selenium.webdriver')
+    module.__dict__.update(webdriver.__dict__)
+    module.Chrome = MockChrome
+    return module
+
+
+def load_script(key, path):
+    spec = importlib.util.spec_from_file_location(f"benchmark_{key}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def percentile(values, percent):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(percent / 100 * (len(values) - 1))))]
+
+
+def summarize(key, stats, elapsed, names):
+    """
+    :param stats: Snapshot of the mock server stats for this run
+    :return: Dictionary of the metrics of one script
+    """
+    starts, ends = {}, {}
+    for started, site, name in stats['searches']:
+        starts[(site, name)] = min(started, starts.get((site, name), started))
+    for served, site, name, _ in stats['pages']:
+        ends[(site, name)] = max(served, ends.get((site, name), served))
+    latencies = [ends[search] - started for search, started in starts.items() if search in ends]
+    return {
+        'script': key,
+        'names': len(names),
+        'searched': len(starts),
+        'pages': len(stats['pages']),
+        'seconds': round(elapsed, 2),
+        'names_per_min': round(len(starts) / elapsed * 60, 2) if elapsed else 0.0,
+        'pages_per_sec': round(len(stats['pages']) / elapsed, 2) if elapsed else 0.0,
+        'p50': round(statistics.median(latencies), 2) if latencies else 0.0,
+        'p95': round(percentile(latencies, 95), 2),
+    }
+
+
+def run_script(key, server, names, headless=True, quiet=True):
+    """
+    Runs one script end to end in a temporary folder (its input, output, downloads and checkpoint stay there).
+    :return: Metrics dictionary (see summarize), or None if the script couldn't be loaded
+    """
+    script, input_file, column, argv = SCRIPTS[key]
+    path = os.path.join(TESTER_DIR, script)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix=f"benchmark_{key}_") as workdir:
+        os.chdir(workdir)
+        try:
+            pd.DataFrame({column: names}).to_excel(input_file, index=False)
+            try:
+                module = load_script(key, path)
+            except Exception as e:
+                print(f"Skipping {key}: {e}")
+                return None
+            module.webdriver = mock_webdriver(server, headless)
+            sys.argv = [path] + argv
+            server.stats.reset()
+
+            output = io.StringIO() if quiet else sys.stdout
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(output):
+                module.main()
+            elapsed = time.perf_counter() - start
+        finally:
+            os.chdir(cwd)
+    return summarize(key, server.stats.snapshot(), elapsed, names)
+
+
+def print_table(results):
+    header = f"{'script':<18}{'names':>7}{'pages':>7}{'seconds':>9}{'names/min':>11}{'pages/s':>9}{'p50':>7}{'p95':>7}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        print(f"{r['script']:<18}{r['searched']:>7}{r['pages']:>7}{r['seconds']:>9}{r['names_per_min']:>11}"
+              f"{r['pages_per_sec']:>9}{r['p50']:>7}{r['p95']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('scripts', nargs='*', default=list(SCRIPTS), help=f"Any of: {', '.join(SCRIPTS)}")
+    parser.add_argument('--names', type=int, default=20, help='Names in the input workbook')
+    parser.add_argument('--results', type=int, default=25, help='Records per name')
+    parser.add_argument('--page-size', type=int, default=10, help='Records per results page')
+    parser.add_argument('--latency-ms', type=int, default=100, help='Delay of every request of the mock sites')
+    parser.add_argument('--jitter-ms', type=int, default=50, help='Random extra delay of every request')
+    parser.add_argument('--empty-percent', type=int, default=10, help='Share of names with no results')
+    parser.add_argument('--headful', action='store_true', help='Show the browsers')
+    parser.add_argument('--verbose', action='store_true', help="Show the scripts' own output")
+    parser.add_argument('--json', help='Also write the results to this file')
+    args = parser.parse_args()
+
+    unknown = [key for key in args.scripts if key not in SCRIPTS]
+    if unknown:
+        parser.error(f"Unknown scripts: {', '.join(unknown)}")
+
+    config = SiteConfig(args.results, args.page_size, args.latency_ms, args.jitter_ms, args.empty_percent)
+    server = MockServer(config).start()
+    original_search_url = tax_http.search_url
+    tax_http.search_url = lambda county, name, page=1: server.rewrite_url(original_search_url(county, name, page))
+
+    names = benchmark_names(args.names)
+    results = []
+    try:
+        for key in args.scripts:
+            print(f"Running {key} on {len(names)} names...")
+            result = run_script(key, server, names, headless=not args.headful, quiet=not args.verbose)
+            if result is not None:
+                results.append(result)
+    finally:
+        tax_http.search_url = original_search_url
+        server.stop()
+
+    print_table(results)
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({'config': vars(args), 'results': results}, file, indent=2)
+        print(f"Results written to: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
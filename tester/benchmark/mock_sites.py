@@ -0,0 +1,637 @@
+"""
+Local mock of every county site the scripts scrape, so a scraper can be timed without touching the live sites.
+
+Each mock reproduces what the scripts rely on: the same ids/classes/xpaths, the same pagination behavior
+(ajax grids, server rendered pages, dropdown page numbers, frames, downloads) and the same 'no results' messages.
+
+Sites (by the host the scripts use):
+    web.bcpa.net                -> BCPA Record-Search (Angular like, rows come from an ajax call)
+    officialrecords.broward.org -> AcclaimWeb (disclaimer, Telerik like grid paged by ajax)
+    *.county-taxes.com          -> Tax collectors (server rendered cards, <li> pagination links)
+    or.leeclerk.org             -> Lee clerk LandMarkWeb (disclaimer, 3 iframes, Excel export download)
+    www.leepa.org               -> Lee Property Appraiser (resultsDataGrid, _pagenumberList dropdown)
+    www.collierappraiser.com    -> Collier Property Appraiser (frames, jqGrid paged by ajax)
+
+Every site gets its own port and is served under its real path, see MockServer.rewrite_url. benchmark.py points the
+scripts at this server.
+
+Usage:
+    python mock_sites.py --port 8800 --results 40 --latency-ms 150
+    http://127.0.0.1:8800/public/search/property_tax  (the ports of the sites are printed on start)
+
+NOTE: The Lee clerk export needs openpyxl (already in requirements.txt). Everything else is standard library.
+"""
+
+import argparse
+import html
+import io
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, urlencode
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+
+NO_BILLS_TEXT = ("No bills or accounts matched your search. Try using different or fewer search terms. "
+                 "The following tips may also help:")
+
+
+class SiteConfig:
+    """
+    :param results: Records returned for a name
+    :param page_size: Records per results page
+    :param latency_ms: Delay added to every page load and ajax call
+    :param jitter_ms: Random extra delay (0 to jitter_ms)
+    :param empty_percent: Share of names (picked by a hash of the name) that get no results at all
+    """
+
+    def __init__(self, results=25, page_size=10, latency_ms=100, jitter_ms=50, empty_percent=10):
+        self.results = results
+        self.page_size = page_size
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.empty_percent = empty_percent
+
+    def result_count(self, name):
+        if zlib.crc32(name.strip().upper().encode()) % 100 < self.empty_percent:
+            return 0
+        return self.results
+
+    def page_count(self, name):
+        return max(1, -(-self.result_count(name) // self.page_size))
+
+    def delay(self):
+        time.sleep((self.latency_ms + random.uniform(0, self.jitter_ms)) / 1000)
+
+
+class Stats:
+    """
+    What the mock served, used by benchmark.py for names/minute, pages/second and per name latency.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()  # Start time of the request each server thread is handling
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.searches = []  # (time, site, name) when the first request of a search for a name came in
+            self.pages = []     # (time, site, name, page) for every results page served
+
+    def request(self):
+        """
+        Called when a request comes in (before its latency), so a search is timed from its first request.
+        """
+        self._local.started = time.time()
+
+    def search(self, site, name):
+        with self._lock:
+            self.searches.append((getattr(self._local, 'started', time.time()), site, name))
+
+    def page(self, site, name, page):
+        with self._lock:
+            self.pages.append((time.time(), site, name, page))
+
+    def snapshot(self):
+        with self._lock:
+            return {'searches': list(self.searches), 'pages': list(self.pages)}
+
+
+def fake_records(name, count):
+    """
+    Same fake records for the same name every time.
+    :return: List of dicts with the fields the mocks render
+    """
+    rng = random.Random(name.strip().upper())
+    last, _, first = name.strip().upper().replace(',', ' ').partition(' ')
+    streets = ['MAIN ST', 'OAK AVE', 'PALM DR', 'GULF BLVD', 'PINE RIDGE RD', 'BAY SHORE DR']
+    cities = ['FORT MYERS FL 33901', 'NAPLES FL 34102', 'FORT LAUDERDALE FL 33301', 'CAPE CORAL FL 33904']
+    records = []
+    for number in range(count):
+        records.append({
+            'owner': ' '.join(part for part in (last, first.strip(), chr(65 + number % 26)) if part),
+            'street': f"{rng.randint(100, 9999)} {rng.choice(streets)}",
+            'city': rng.choice(cities),
+            'folio': f"{rng.randint(10 ** 11, 10 ** 12 - 1)}",
+            'strap': f"{rng.randint(10, 36)}-{rng.randint(43, 48)}-{rng.randint(21, 27)}-{rng.randint(1, 99):02d}-{rng.randint(0, 9999):05d}.{rng.randint(0, 9999):04d}",
+            'account': f"{rng.randint(10 ** 7, 10 ** 8 - 1)}",
+            'date': f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/{rng.randint(1990, 2024)}",
+            'doc_type': rng.choice(['DEED', 'MORTGAGE', 'LIEN', 'SATISFACTION']),
+            'book': str(rng.randint(1000, 9999)),
+            'page': str(rng.randint(1, 999)),
+            'amount': f"{rng.randint(10, 900) * 1000}",
+            'legal': f"LOT {rng.randint(1, 40)} BLK {rng.randint(1, 12)} SUBDIVISION {rng.randint(1, 300)}",
+        })
+    return records
+
+
+def page_slice(records, page, page_size):
+    return records[(page - 1) * page_size: page * page_size]
+
+
+def document(title, body, script=''):
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title></head>
+<body>
+{body}
+<script>
+function getJSON(url, done) {{
+    var xhr = new XMLHttpRequest();
+    xhr.open('GET', url);
+    xhr.onload = function () {{ done(JSON.parse(xhr.responseText)); }};
+    xhr.send();
+}}
+{script}
+</script>
+</body></html>"""
+
+
+# ---------------------------------------------------------------- Sites
+# Each site: handle(request, path, query) returns (status, content_type, body, extra_headers) or None for 404.
+
+class BcpaSite:
+    """
+    web.bcpa.net/BcpaClient/#/Record-Search  (Broward part1)
+    """
+    name = 'bcpa'
+
+    def __init__(self, config, stats):
+        self.config, self.stats = config, stats
+
+    def handle(self, path, query):
+        if path.rstrip('/') == '/BcpaClient':
+            return self.page()
+        if path == '/BcpaClient/api/search':
+            search, page = query.get('name', ''), int(query.get('page', 1))
+            if page == 1:
+                self.stats.search(self.name, search)
+            records = fake_records(search, self.config.result_count(search))
+            last_page = self.config.page_count(search)
+            page = min(page, last_page)
+            if records:
+                self.stats.page(self.name, search, page)
+            rows = [[r['folio'], r['owner'], f"{r['street']} {r['city']}"] for r in page_slice(records, page, self.config.page_size)]
+            return json_response({'rows': rows, 'page': page, 'last': last_page})
+        return None
+
+    def page(self):
+        body = """
+<div class="search-bar"><input class="form-control" type="text" placeholder="Owner name, address or folio"></div>
+<div id="results"></div>
+"""
+        script = """
+var current = 1, searched = '';
+function load(page) {
+    getJSON('api/search?name=' + encodeURIComponent(searched) + '&page=' + page, function (data) {
+        current = data.page;
+        var results = document.getElementById('results');
+        if (!data.rows.length) {
+            results.innerHTML = '<div id="noRecordFound">No record found</div>';
+            return;
+        }
+        var html = '<table id="tbl-list-parcels"><thead><tr><th>Folio</th><th>Owner</th><th>Address</th></tr></thead><tbody>';
+        data.rows.forEach(function (row) { html += '<tr><td>' + row.join('</td><td>') + '</td></tr>'; });
+        html += '</tbody></table><button id="btnNextRecords"' + (data.page >= data.last ? ' disabled' : '') + '>Next</button>';
+        results.innerHTML = html;
+        document.getElementById('btnNextRecords').onclick = function () { load(Math.min(current + 1, data.last)); };
+    });
+}
+document.querySelector('.form-control').addEventListener('keydown', function (event) {
+    if (event.key === 'Enter') { searched = this.value; load(1); }
+});
+"""
+        return html_response(document('Record Search', body, script))
+
+
+class AcclaimWebSite:
+    """
+    officialrecords.broward.org/AcclaimWeb  (Broward part2)
+    """
+    name = 'acclaimweb'
+    columns = 13
+
+    def __init__(self, config, stats):
+        self.config, self.stats = config, stats
+
+    def handle(self, path, query):
+        if path == '/AcclaimWeb/search/Disclaimer':
+            body = '<p>Official records disclaimer</p><button class="t-button" onclick="location.href=\'SearchTypeName\'">I accept the conditions above.</button>'
+            return html_response(document('Disclaimer', body))
+        if path == '/AcclaimWeb/search/SearchTypeName':
+            return self.page()
+        if path == '/AcclaimWeb/search/api':
+            search, page = query.get('name', ''), int(query.get('page', 1))
+            if page == 1:
+                self.stats.search(self.name, search)
+            records = fake_records(search, self.config.result_count(search))
+            page = min(page, self.config.page_count(search))
+            if records:
+                self.stats.page(self.name, search, page)
+            rows = [['', search, 'GRANTOR', r['owner'], r['date'], 'O', f"{r['book']}/{r['page']}", r['account'], '', '',
+                     r['amount'], r['legal'], r['doc_type']] for r in page_slice(records, page, self.config.page_size)]
+            return json_response({'rows': rows, 'page': page, 'last': self.config.page_count(search), 'total': len(records)})
+        return None
+
+    def page(self):
+        body = """
+<input id="SearchOnName" type="text">
+<div id="results"></div>
+"""
+        script = """
+var current = 1, searched = '';
+function load(page) {
+    getJSON('api?name=' + encodeURIComponent(searched) + '&page=' + page, function (data) {
+        current = data.page;
+        var results = document.getElementById('results');
+        if (!data.rows.length) { results.innerHTML = '<p>No records found.</p>'; return; }
+        var rows = '';
+        data.rows.forEach(function (row) { rows += '<tr><td>' + row.join('</td><td>') + '</td></tr>'; });
+        results.innerHTML = '<div id="RsltsGrid"><div class="t-toolbar"></div>' +
+            '<div class="t-pager"><div class="t-status"></div><div class="t-pager-buttons">' +
+            '<a href="#"><span>first</span></a><a href="#"><span>prev</span></a>' +
+            '<a href="#" id="next" class="t-link' + (data.page >= data.last ? ' t-state-disabled' : '') + '"><span>next</span></a></div>' +
+            '<div class="t-page-i-of-n">Page ' + data.page + ' of ' + data.last + '</div>' +
+            '<div class="t-status-text">Displaying items ' + data.rows.length + ' of ' + data.total + '</div></div>' +
+            '<div class="t-grid-header"></div><div class="t-grid-content"><table><tbody>' + rows + '</tbody></table></div></div>';
+        document.getElementById('next').onclick = function (event) { event.preventDefault(); load(current + 1); };
+    });
+}
+document.getElementById('SearchOnName').addEventListener('keydown', function (event) {
+    if (event.key === 'Enter') { searched = this.value; load(1); }
+});
+"""
+        return html_response(document('Name Search', body, script))
+
+
+class CountyTaxesSite:
+    """
+    <county>.county-taxes.com/public/search/property_tax  (Broward part3, Collier part1, Lee tax, JSON Collier tax)
+    Server rendered so the http backend (shared/tax_http.py) can use it too.
+    """
+    name = 'county_taxes'
+
+    def __init__(self, config, stats):
+        self.config, self.stats = config, stats
+
+    def handle(self, path, query):
+        if path != '/public/search/property_tax':
+            return None
+        search = query.get('search_query')
+        form = ('<form method="get"><input type="text" name="search_query" placeholder="Enter a name, account number or address" '
+                f'value="{html.escape(search or "")}"></form>')
+        if search is None:
+            return html_response(document('Property Tax Search', form))
+
+        page = int(query.get('page', 1))
+        if page == 1:
+            self.stats.search(self.name, search)
+        records = fake_records(search, self.config.result_count(search))
+        if not records:
+            return html_response(document('Property Tax Search', form + f'<p>{NO_BILLS_TEXT}</p>'))
+
+        last_page = self.config.page_count(search)
+        page = min(page, last_page)
+        self.stats.page(self.name, search, page)
+        cards = ''
+        for r in page_slice(records, page, self.config.page_size):
+            cards += f"""
+<div class="result content-card my-2 mx-3 py-3 px-4">
+  <div class="identifier">Account {r['account']}</div>
+  <div class="name">{r['owner']}</div>
+  <div class="address"><span class="label">OWNER/ADDRESS</span><div>{r['owner']}</div><div>{r['street']}</div><div>{r['city']}</div></div>
+  <div class="address"><span class="label">ADDRESS</span><div>{r['street']}</div></div>
+  <div class="address"><span class="label">BILLING ADDRESS</span><div>{r['street']}, {r['city']}</div></div>
+</div>"""
+        links = ''.join(f'<li><a href="?{urlencode({"search_query": search, "page": number})}">{number}</a></li>'
+                        for number in range(1, last_page + 1))
+        body = (form + f'<div class="category-search-results">{cards}</div>'
+                f'<nav aria-label="Pagination"><ul>{links}</ul></nav>')
+        return html_response(document('Property Tax Search', body))
+
+
+class LandMarkWebSite:
+    """
+    or.leeclerk.org/LandMarkWeb  (Lee clerk bot.py)
+    """
+    name = 'landmarkweb'
+    columns = ['Status', 'Consideration', 'Search Name', 'Grantor', 'Grantee', 'Record Date', 'Doc Type',
+               'Book Type', 'Book', 'Page', 'Clerk File Number', 'Legal']
+
+    def __init__(self, config, stats):
+        self.config, self.stats = config, stats
+
+    def handle(self, path, query):
+        if path.rstrip('/') == '/LandMarkWeb':
+            body = """
+<a href="#"><img alt="Name Search Icon" width="80" height="80" src="data:image/gif;base64,R0lGODlhAQABAAAAACw="></a>
+<div id="disclaimer" style="display:none"><p>Disclaimer</p><button id="idAcceptYes">Accept</button></div>
+"""
+            script = """
+document.querySelector("[alt='Name Search Icon']").addEventListener('click', function (event) {
+    event.preventDefault();
+    document.getElementById('disclaimer').style.display = 'block';
+});
+document.getElementById('idAcceptYes').addEventListener('click', function () { location.href = 'LandMarkWeb/search/index'; });
+"""
+            return html_response(document('LandMarkWeb', body, script))
+        if path == '/LandMarkWeb/search/index':
+            return self.search_page()
+        if path == '/LandMarkWeb/search/count':
+            search = query.get('name', '')
+            self.stats.search(self.name, search)
+            return json_response({'count': self.config.result_count(search)})
+        if path == '/LandMarkWeb/search/export':
+            return self.export(query.get('name', ''))
+        return None
+
+    def search_page(self):
+        # NOTE: page_loaded_correctly() expects exactly 3 iframes (what the reCAPTCHA script injects on the live site).
+        body = """
+<iframe title="frame 1" src="about:blank" width="1" height="1"></iframe>
+<iframe title="frame 2" src="about:blank" width="1" height="1"></iframe>
+<iframe title="frame 3" src="about:blank" width="1" height="1"></iframe>
+<select id="matchType-Name"><option>Starts With</option><option>Contains</option><option>Exact Match</option></select>
+<input id="name-Name" type="text">
+<button id="submit-Name">Search</button>
+<div id="results"></div>
+"""
+        script = """
+document.getElementById('submit-Name').addEventListener('click', function () {
+    var name = document.getElementById('name-Name').value;
+    getJSON('count?name=' + encodeURIComponent(name), function (data) {
+        var results = document.getElementById('results');
+        results.innerHTML = '<b>Returned ' + data.count + ' records' + (data.count ? ' of ' + data.count : '') + '</b>' +
+            '<button id="results-Export">Export</button>';
+        document.getElementById('results-Export').addEventListener('click', function () {
+            location.href = 'export?name=' + encodeURIComponent(name);
+        });
+    });
+});
+"""
+        return html_response(document('Name Search', body, script))
+
+    def export(self, search):
+        if openpyxl is None:
+            return 501, 'text/plain', b'openpyxl is needed for the export mock: pip install openpyxl', {}
+        self.stats.page(self.name, search, 1)
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(self.columns)
+        for r in fake_records(search, self.config.result_count(search)):
+            sheet.append(['', r['amount'], search, r['owner'], 'GRANTEE', r['date'], r['doc_type'], 'O', r['book'],
+                          r['page'], r['account'], r['legal']])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        headers = {'Content-Disposition': 'attachment; filename="_ExportResults.xlsx"'}
+        return 200, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', buffer.getvalue(), headers
+
+
+class LeepaSite:
+    """
+    www.leepa.org/Search/PropertySearch.aspx  (Lee appraiser, JSON Broward appraiser)
+    """
+    name = 'leepa'
+    prefix = 'ctl00_BodyContentPlaceHolder_WebTab1_tmpl0_'
+
+    def __init__(self, config, stats):
+        self.config, self.stats = config, stats
+
+    def handle(self, path, query):
+        if path != '/Search/PropertySearch.aspx':
+            return None
+        search = query.get('owner')
+        form = (f'<form method="get"><input id="{self.prefix}OwnerNameTextBox" name="owner" type="text" '
+                f'value="{html.escape(search or "")}"><input id="{self.prefix}SubmitPropertySearch" type="submit" value="Search"></form>')
+        if search is None:
+            return html_response(document('Property Search', form))
+
+        page = int(query.get('page', 1))
+        if page == 1:
+            self.stats.search(self.name, search)
+        records = fake_records(search, self.config.result_count(search))
+        if not records:
+            body = form + f'<span id="{self.prefix}ErrorLabel">No matches found for given criteria</span>'
+            return html_response(document('Property Search', body))
+
+        last_page = self.config.page_count(search)
+        page = min(page, last_page)
+        self.stats.page(self.name, search, page)
+        rows = ''
+        for r in page_slice(records, page, self.config.page_size):
+            rows += (f"<tr><td>{r['strap']}<br>{r['folio']}</td>"
+                     f"<td><div class=\"bold\">{r['owner']}</div><div>{r['street']}</div><div>{r['city']}</div></td>"
+                     f"<td><div class=\"itemAddAndLegal\">{r['street']}</div><div class=\"itemAddAndLegal\">{r['legal']}</div></td></tr>")
+        options = ''.join(f'<option value="{number}"{" selected" if number == page else ""}>{number}</option>'
+                          for number in range(1, last_page + 1))
+        page_url = f'?{urlencode({"owner": search})}&page='
+        body = (form + f'<select id="{self.prefix}_pagenumberList" onchange="location.href=\'{page_url}\' + this.value">{options}</select>'
+                f'<table class="resultsDataGrid"><tr><th>Strap / Folio</th><th>Owner</th><th>Site Address / Legal</th></tr>{rows}</table>')
+        return html_response(document('Property Search', body))
+
+
+class CollierAppraiserSite:
+    """
+    www.collierappraiser.com  (Collier part2). Frames: logo (with main inside) and rbottom.
+    """
+    name = 'collier_appraiser'
+    columns = 12
+
+    def __init__(self, config, stats):
+        self.config, self.stats = config, stats
+
+    def handle(self, path, query):
+        if path == '/':
+            return html_response('<!DOCTYPE html><html><frameset rows="30%,70%">'
+                                 '<frame name="logo" src="logo"><frame name="rbottom" src="privacy"></frameset></html>')
+        if path == '/logo':
+            return html_response(document('Logo', '<iframe name="main" src="menu" width="400" height="80"></iframe>'))
+        if path == '/menu':
+            return html_response(document('Menu', '<a href="disclaimer" target="rbottom">Search Database</a>'))
+        if path == '/privacy':
+            body = ('<div><div>Privacy Policy</div><div></div>'
+                    '<div><button onclick="this.parentNode.innerHTML = \'Thanks\'">Continue</button></div></div>')
+            return html_response(document('Privacy', body))
+        if path == '/disclaimer':
+            return html_response(document('Disclaimer', '<p>Disclaimer</p><a href="search">I Accept</a>'))
+        if path == '/search':
+            return self.search_page()
+        if path == '/grid':
+            search, page = query.get('name', ''), int(query.get('page', 1))
+            if page == 1:
+                self.stats.search(self.name, search)
+            records = fake_records(search, self.config.result_count(search))
+            last_page = self.config.page_count(search)
+            page = min(page, last_page)
+            if records:
+                self.stats.page(self.name, search, page)
+            start = (page - 1) * self.config.page_size
+            rows = [[str(start + number + 1), r['folio'], '01', r['owner'], r['street'].split(' ', 1)[0], r['street'].split(' ', 1)[1],
+                     '', '', '', r['date'], r['amount'], r['amount']] for number, r in enumerate(page_slice(records, page, self.config.page_size))]
+            return json_response({'rows': rows, 'page': page, 'last': last_page, 'total': len(records)})
+        return None
+
+    def search_page(self):
+        body = """
+<form id="search"><input id="Name1" type="text"></form>
+<div id="results"></div>
+"""
+        script = """
+var current = 1, searched = '';
+function load(page) {
+    getJSON('grid?name=' + encodeURIComponent(searched) + '&page=' + page, function (data) {
+        current = data.page;
+        if (!data.rows.length) { alert('No Parcels Found'); return; }
+        var rows = '';
+        data.rows.forEach(function (row) { rows += '<tr class="jqgrow"><td>' + row.join('</td><td>') + '</td></tr>'; });
+        document.getElementById('results').innerHTML = '<table class="ui-jqgrid-btable"><tbody>' + rows + '</tbody></table>' +
+            '<table><tr><td id="next_pager" class="ui-pg-button' + (data.page >= data.last ? ' ui-state-disabled' : '') + '">Next</td>' +
+            '<td>Page ' + data.page + ' of <span id="sp_1_pager">' + data.last + '</span></td>' +
+            '<td><div class="ui-paging-info">View ' + data.rows.length + ' of ' + data.total + '</div></td></tr></table>';
+        document.getElementById('next_pager').onclick = function () { if (current < data.last) { load(current + 1); } };
+    });
+}
+document.getElementById('search').addEventListener('submit', function (event) {
+    event.preventDefault();
+    searched = document.getElementById('Name1').value;
+    load(1);
+});
+"""
+        return html_response(document('Search', body, script))
+
+
+SITES = {
+    'web.bcpa.net': BcpaSite,
+    'officialrecords.broward.org': AcclaimWebSite,
+    'county-taxes.com': CountyTaxesSite,
+    'or.leeclerk.org': LandMarkWebSite,
+    'www.leepa.org': LeepaSite,
+    'www.collierappraiser.com': CollierAppraiserSite,
+}
+
+
+def html_response(text):
+    return 200, 'text/html; charset=utf-8', text.encode('utf-8'), {}
+
+
+def json_response(data):
+    return 200, 'application/json', json.dumps(data).encode('utf-8'), {}
+
+
+class MockServer:
+    """
+    Serves every site of SITES on its own port (so the paths stay the real ones), in background threads.
+    :param config: SiteConfig shared by every site
+    :param port: Port of the first site, the next sites take the next ports. 0 picks free ports
+    """
+
+    def __init__(self, config=None, port=0):
+        self.config = config or SiteConfig()
+        self.stats = Stats()
+        self.sites = {host: site(self.config, self.stats) for host, site in SITES.items()}
+        self.servers = {}
+        for number, (host, site) in enumerate(self.sites.items()):
+            httpd = ThreadingHTTPServer(('127.0.0.1', port + number if port else 0), self._handler(site))
+            httpd.daemon_threads = True
+            self.servers[host] = httpd
+        self.threads = []
+
+    def base_url(self, host):
+        """
+        :return: Url of the mock of a live host, or None if it isn't mocked. ex. broward.county-taxes.com -> http://127.0.0.1:<port>
+        """
+        for suffix, httpd in self.servers.items():
+            if host == suffix or host.endswith('.' + suffix):
+                return f"http://127.0.0.1:{httpd.server_address[1]}"
+        return None
+
+    def rewrite_url(self, url):
+        """
+        Live url -> same path on the mock of its host. ex. https://www.leepa.org/Search/x.aspx?a=1 -> http://127.0.0.1:<port>/Search/x.aspx?a=1
+        Urls of hosts that aren't mocked are left as they are.
+        """
+        parts = urlsplit(url)
+        base_url = self.base_url(parts.netloc)
+        if base_url is None:
+            return url
+        rewritten = f"{base_url}{parts.path or '/'}"
+        if parts.query:
+            rewritten += '?' + parts.query
+        if parts.fragment:
+            rewritten += '#' + parts.fragment
+        return rewritten
+
+    def start(self):
+        for httpd in self.servers.values():
+            thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def serve_forever(self):
+        self.start()
+        for thread in self.threads:
+            thread.join()
+
+    def stop(self):
+        for httpd in self.servers.values():
+            httpd.shutdown()
+            httpd.server_close()
+
+    def _handler(self, site):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.stats.request()
+                parts = urlsplit(self.path)
+                query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+                server.config.delay()
+                response = site.handle(parts.path or '/', query)
+                if response is None:
+                    response = 404, 'text/plain', f"Not mocked: {self.path}".encode('utf-8'), {}
+                status, content_type, body, headers = response
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep the benchmark output readable
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--results', type=int, default=25, help='Records per name')
+    parser.add_argument('--page-size', type=int, default=10, help='Records per results page')
+    parser.add_argument('--latency-ms', type=int, default=100, help='Delay of every request')
+    parser.add_argument('--jitter-ms', type=int, default=50, help='Random extra delay of every request')
+    parser.add_argument('--empty-percent', type=int, default=10, help='Share of names with no results')
+    args = parser.parse_args()
+
+    config = SiteConfig(args.results, args.page_size, args.latency_ms, args.jitter_ms, args.empty_percent)
+    server = MockServer(config, args.port)
+    print("Mock county sites (Ctrl+C to stop):")
+    for host in SITES:
+        print(f"    {host:<28} {server.base_url(host)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
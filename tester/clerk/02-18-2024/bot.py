@@ -2,15 +2,28 @@
 import traceback
 import random
 import pandas as pd
-import numpy as np
 import re
 import time
 import os
-import requests
+import sys
+import argparse
+from functools import partial
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')) # So the helpers in tester/shared can be imported
+from shared.batch_runner import run_batch
+from shared.readiness import install_network_tracker, wait_until_ready
+from shared.result_cache import ResultCache, DEFAULT_PATH as CACHE_PATH
+from shared.checkpoint import CheckpointJournal, start_run, DEFAULT_DIR as CHECKPOINT_DIR
+from shared.tracing import traced, span, start_tracing, finish_tracing
+from shared.command_profiler import profile_commands, start_profiling, finish_profiling
+from shared.browser_profiles import browser_options, apply_profile, needs_full_profile
+from shared.driver_resolver import chromedriver_path
+from shared.transcription import transcribe_url, start_service, stop_service, MODEL_ENV
+from shared.downloads import DownloadWatcher, DownloadTimeout, take
+from shared.export_ingest import read_export, ColumnBuffer
+from shared.human_input import move_mouse, stealth_level, type_text, typing_engine, STEALTH_LEVELS, STEALTH_ENV, TYPING_ENGINES, TYPING_ENV
 
 # Import undetected_chromedriver
 #import undetected_chromedriver as 
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 
@@ -23,12 +36,9 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import Select
 from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException
 
-import whisper
-
-# whisper requirements
+# whisper requirements (the model itself is only loaded once a CAPTCHA shows up, see shared/transcription.py)
 ffmpeg_bin_path = r".\ffmpeg-6.1.1-essentials_build\bin"
 os.environ["PATH"] += os.pathsep + ffmpeg_bin_path
-model = whisper.load_model("base")
 
 # Global variable to track the current mouse position
 current_mouse_position = {'x': 0, 'y': 0}
@@ -40,9 +50,8 @@ def human_like_type(element, text):
     :param text: The text to type
     :return: None
     """
-    for character in text:
-        element.send_keys(character)
-        time.sleep(random.uniform(0.05, 0.2))  # Random delay between keystrokes
+    # The engine of the site decides how (see shared/human_input.py), 'actions' sends the whole string in one call
+    type_text(element.parent, element, text, typing_engine('lee_clerk'))
 
 def human_like_delay(minimum=0.5, maximum=1.5):
     """
@@ -64,69 +73,24 @@ def human_like_scroll(driver, element):
     driver.execute_script(f"window.scrollBy(0, {scroll_y_by});")
     human_like_delay()
 
-def draw_click_marker(driver, x, y):
-    """
-    Draws a temporary marker on the page to indicate the click position.
-    :param driver: WebDriver instance
-    :param x: X-coordinate of the click
-    :param y: Y-coordinate of the click
-    :return: None
-    """
-    script = f"""
-    var body = document.getElementsByTagName('body')[0];
-    var div = document.createElement('div');
-    div.setAttribute('style', 'position: absolute; left: {x}px; top: {y}px; width: 10px; height: 10px; background-color: red; border-radius: 5px; z-index: 10000;');
-    body.appendChild(div);
-    setTimeout(function() {{ body.removeChild(div); }}, 1000);
-    """
-    driver.execute_script(script)
-
-def bezier_curve(start, end, num_of_points=30):
-    """
-    Generates points along a Bezier curve from start to end.
-    :param start: Starting point (x, y)
-    :param end: Ending point (x, y)
-    :param num_of_points: Number of points to generate along the curve
-    :return: List of points along the curve
-    """
-    # Adjust control points generation to avoid ValueError
-    def adjusted_random(start, end):
-        low = min(start, end)
-        high = max(start, end) + 1  # Ensure high is always greater than low
-        return np.random.randint(low, high)
-
-    ctrl_1 = (adjusted_random(start[0], end[0]), adjusted_random(start[1], end[1]))
-    ctrl_2 = (adjusted_random(start[0], end[0]), adjusted_random(start[1], end[1]))
-
-    curve_points = []
-    for t in np.linspace(0, 1, num_of_points):
-        x = (1-t)**3 * start[0] + 3*(1-t)**2 * t * ctrl_1[0] + 3*(1-t) * t**2 * ctrl_2[0] + t**3 * end[0]
-        y = (1-t)**3 * start[1] + 3*(1-t)**2 * t * ctrl_1[1] + 3*(1-t) * t**2 * ctrl_2[1] + t**3 * end[1]
-        curve_points.append((int(x), int(y)))
-    return curve_points
-
-
+@traced('human_click')
 def human_like_click(driver, element):
     global current_mouse_position
 
-    width = element.size['width']
-    height = element.size['height']
+    rect = element.rect  # Size and location in one call
+    width = int(rect['width'])
+    height = int(rect['height'])
 
     # Choose a random position within the element
     x_offset = random.randint(width // 4, width * 3 // 4)
     y_offset = random.randint(height // 4, height * 3 // 4)
 
     # Calculate absolute click position
-    abs_x = element.location['x'] + x_offset
-    abs_y = element.location['y'] + y_offset
-
-    # Generate a Bezier curve path from the current mouse position
-    path_points = bezier_curve((current_mouse_position['x'], current_mouse_position['y']), (abs_x, abs_y))
+    abs_x = int(rect['x']) + x_offset
+    abs_y = int(rect['y']) + y_offset
 
-    # Draw the path and move through it
-    for point in path_points:
-        draw_click_marker(driver, *point)
-        time.sleep(random.uniform(0.01, 0.05))  # Random delay for realism
+    # Show the path from the current mouse position, animated in the page in one call
+    move_mouse(driver, (current_mouse_position['x'], current_mouse_position['y']), (abs_x, abs_y), stealth_level('lee_clerk'))
 
     # Update current mouse position
     current_mouse_position = {'x': abs_x, 'y': abs_y}
@@ -150,11 +114,14 @@ def human_like_click(driver, element):
     # Delay to mimic human behavior
     human_like_delay()
 
-def initialize_driver(download_directory):
+@traced('driver_start')
+@profile_commands
+def initialize_driver(download_directory, profile='auto'):
     """
     Initializes and returns an undetected Selenium WebDriver instance with customized settings.
     
     :param download_directory: The directory where downloads should be saved.
+    :param profile: Browser profile, 'auto', 'fast' or 'full' (see shared/browser_profiles.py). The clerk defaults to full.
     :return: A Selenium WebDriver instance configured for web scraping.
     """
     # Resolve the relative path to an absolute path
@@ -185,13 +152,17 @@ def initialize_driver(download_directory):
     }
     
     options.add_experimental_option("prefs", prefs)
+    options, profile = browser_options('lee_clerk', profile, options)
 
     # Initialize the undetected ChromeDriver with the specified options
     #driver = uc.Chrome(options=options)
-    service = Service(ChromeDriverManager().install())
+    service = Service(chromedriver_path())
     
     driver = webdriver.Chrome(service=service, options=options)
-    driver.maximize_window()
+    apply_profile(driver, 'lee_clerk', profile)
+    if profile == 'full':
+        driver.maximize_window()  # The fast profile keeps its small headless window
+    install_network_tracker(driver)  # Lets wait_until_ready see when the page's requests are done
 
     return driver
 
@@ -207,6 +178,7 @@ def wait_for_element(driver, locator, wait_time=10):
     human_like_delay(0.5, 1.0)
     return WebDriverWait(driver, wait_time).until(EC.element_to_be_clickable(locator))
 
+@traced('validate_results')
 def good_results(driver, wait_time=60):
     """
     Validates if the search results are available or if there are no matches.
@@ -236,6 +208,7 @@ def good_results(driver, wait_time=60):
     return False
 
 
+@traced('search')
 def populate_search_fields(driver, user_input, match_type='Starts With'):
     # Locate the dropdown element, Create a Select object, and Select the option
     dropdown = wait_for_element(driver, (By.ID, 'matchType-Name'))
@@ -248,11 +221,13 @@ def populate_search_fields(driver, user_input, match_type='Starts With'):
     human_like_type(name_field, user_input)
 
 
+@traced('search_submit')
 def submit_search(driver):
     submit_button = wait_for_element(driver, (By.ID, 'submit-Name'))
     human_like_click(driver, submit_button)
 
 
+@traced('validate')
 def results_loaded(driver):
     for _ in range(30):  # 30 iterations
         try:
@@ -282,6 +257,7 @@ def results_loaded(driver):
     return False
 
 
+@traced('captcha_check')
 def found_captcha(driver):
     # Switch to reCAPTCHA iframe if it is present
     try:
@@ -329,8 +305,10 @@ def get_iframe_by_title(driver, title, printing=False):
     return frame
 
 
+@traced('page_check')
 def page_loaded_correctly(driver):
-    time.sleep(random.uniform(3.0, 3.5))
+    # Wait for the page (and the reCAPTCHA frames it injects) to settle instead of a fixed 3 seconds
+    wait_until_ready(driver, 'lee_clerk')
     iframes = driver.find_elements(By.TAG_NAME, "iframe")
     print(f"\n\nFound {len(iframes)} iframes.")
     if len(iframes) == 3:
@@ -339,6 +317,7 @@ def page_loaded_correctly(driver):
         return False 
 
 
+@traced('captcha')
 def complete_audio_captcha(driver):
     # Switch to reCAPTCHA iframe 
     iframe = get_iframe_by_title(driver, 'reCAPTCHA')
@@ -362,11 +341,10 @@ def complete_audio_captcha(driver):
     # Extract the URL of the audio file
     audio_link = wait_for_element(driver, (By.XPATH, "//a[@title='Alternatively, download audio as MP3']"))
     audio_url = audio_link.get_attribute("href")
-    download_audio(audio_url)
 
-    # Convert the audio file to text using whisper 
-    result = model.transcribe("audio.mp3", fp16=False)  # transcribe the audio
-    text = result["text"]   # extract the text
+    # Convert the audio to text using whisper (loaded on the first CAPTCHA, or the shared service).
+    # The audio stays in memory, no audio.mp3 shared by every worker.
+    text = transcribe_url(audio_url)
 
     cleaned_text = re.sub('[^a-zA-Z0-9]', '', str(text))
     print(cleaned_text)
@@ -383,51 +361,7 @@ def complete_audio_captcha(driver):
     driver.switch_to.default_content()
 
 
-def download_audio(url):
-    """
-    Downloads an MP3 file from the specified URL and saves it as 'audio.mp3'
-    in the same directory as this script. It overwrites any existing file with the same name.
-    It uses a while loop to keep trying until the file has been successfully downloaded
-    and is ready for further processing.
-
-    Parameters:
-    - url: The URL of the MP3 file to download.
-    """
-    # The path where the MP3 file will be saved
-    file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'audio.mp3')
-
-    # Check if 'audio.mp3' already exists and inform about the overwrite
-    if os.path.exists(file_path):
-        print(f"The file {file_path} already exists and will be overwritten.")
-
-    download_successful = False
-    while not download_successful:
-        print("Attempting to download MP3 file from:", url)
-        try:
-            response = requests.get(url)
-            if response.status_code == 200:
-                # Write the content of the response to a file, overwriting if it already exists
-                with open(file_path, 'wb') as file:
-                    file.write(response.content)
-                print("Download attempt complete. Checking file...")
-            else:
-                print(f"Failed to download file. Status code: {response.status_code}")
-                time.sleep(5)  # Wait for 5 seconds before retrying
-                continue
-        except Exception as e:
-            print(f"An error occurred while downloading the file: {e}")
-            time.sleep(5)  # Wait for 5 seconds before retrying
-            continue
-
-        # Check if the file exists and is not empty
-        if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
-            print("File has been successfully downloaded and is ready for further processing.")
-            download_successful = True
-        else:
-            print("Downloaded file is not ready. Retrying...")
-            time.sleep(5)  # Wait for 5 seconds before retrying
-
-
+@traced('navigate')
 def get_past_main_page(driver):
     # Navigating to the website
     driver.get('https://or.leeclerk.org/LandMarkWeb')
@@ -439,44 +373,20 @@ def get_past_main_page(driver):
     accept_button = wait_for_element(driver, (By.ID, 'idAcceptYes'))
     human_like_click(driver, accept_button)
 
+@traced('download')
 def download_file(driver, wait_time=60):
     download_button = wait_for_element(driver, (By.ID, "results-Export"))
     human_like_click(driver, download_button)
 
 
-def wait_for_file_download(directory, file_start_name):
-    while True:
-        # List all files in the specified directory
-        files = os.listdir(directory)
-        
-        # Filter files that start with the specified name and have an Excel extension
-        matching_files = [file for file in files if file.startswith(file_start_name) and file.endswith('.xlsx')]
-        
-        if matching_files:
-            print(f"File found: {matching_files[0]}")
-            break  # Exit the loop if a matching file is found
-        
-        print("File not found yet. Waiting...")
-        time.sleep(2)  # Wait for 5 seconds before checking again
-
-
-def delete_file(directory, file_start_name):
-    files = os.listdir(directory)
-    for file in files:
-        if file.startswith(file_start_name):
-            file_path = os.path.join(directory, file)
-            os.remove(file_path)
-            print(f"File deleted: {file}")
-            return
-    print("No matching file found to delete.")
-
-
+@traced('scrape')
 def webscrape(driver, user_input):
     """
     Performs the web scraping task using the provided WebDriver and user input, with retries if results do not load.
     :param driver: WebDriver instance
     :param user_input: User input for search criteria
-    :return: True if scraping was successful and file was downloaded, False otherwise.
+    :return: True if scraping was successful and file was downloaded, False if there was no match,
+             None if the results never loaded.
     """
     
     max_attempts = 5
@@ -514,75 +424,192 @@ def webscrape(driver, user_input):
     
     # If we reach this point, it means the results never loaded correctly after max attempts
     print("Failed to load results after maximum attempts. Please try again later.")
-    return False
+    return None
+
+
+# Columns of the final results.xlsx, in order
+COLUMNS = ['Search Parameter', 'Status', 'Consideration', 'Search Name', 
+           'Grantor', 'Grantee', 'Record Date', 'Doc Type', 'Book Type', 'Book', 
+           'Page', 'Clerk File Number', 'DocLinks', 'Legal', 'Lot', 'Block', 'Unit', 
+           'Subdivision', 'Building', 'Section', 'Township', 'Range', 'Comment', 'DocLinks']
+
+# Match type the search is done with (see populate_search_fields), part of the result cache key
+MATCH_TYPE = 'Starts With'
+
+
+def null_rows(name, rows):
+    """
+    Rows of a name as they go in the results. No rows gives the single NULL row of a name without results.
+    """
+    if rows:
+        return rows
+    return [[name] + [None] * (len(COLUMNS) - 1)]
+
+
+@traced('name')
+def scrape_name(driver, name, download_dir, file_name="_ExportResults", cache=None):
+    """
+    Searches one name and turns its exported file into rows with the COLUMNS (read from the bytes, see shared/export_ingest.py).
+    :param driver: WebDriver instance already past the main page
+    :param name: Name to search
+    :param download_dir: Directory the export is downloaded into
+    :param file_name: Part of the exported file name to look for
+    :param cache: Optional ResultCache the finished search is stored in
+    :return: Rows for this name as JSON friendly lists (empty if the site has no match), None if the results never
+             loaded or the export failed
+    """
+    # Watching starts before the export is clicked, so only the file of this search can be picked up
+    with DownloadWatcher(download_dir) as downloads:
+        webscraped = webscrape(driver, name)
+        downloaded_file = None
+        if webscraped:
+            try:
+                with span('download_wait'):
+                    downloaded_file = downloads.wait(file_name, '.xlsx', timeout=120)
+            except DownloadTimeout as e:
+                print(e)
+
+    if webscraped:
+        if downloaded_file:
+            # Only the COLUMNS, in order (missing ones as NULL), with 'Search Parameter' set to the name. The file is removed once read.
+            with span('export_read'):
+                _, rows = read_export(take(downloaded_file), COLUMNS, {'Search Parameter': name})
+            if cache:
+                cache.put('lee', 'clerk', name, rows, MATCH_TYPE)
+            return rows
+        return None
+
+    if webscraped is None:
+        return None # The results never loaded, nothing is known about this name
+
+    if cache:
+        cache.put('lee', 'clerk', name, [], MATCH_TYPE) # No match, kept for the shorter TTL
+    return []
+
+
+def scrape_shard(shard, download_dir, cache_path=None, journal_dir=None, browser_profile='auto'):
+    """
+    Worker used by the batch runner. Owns its own driver and download directory for the names it was given.
+    :param shard: List of (index, name) tuples
+    :param download_dir: Download directory of this worker
+    :param cache_path: SQLite file of the result cache (see shared/result_cache.py). None disables the cache
+    :param journal_dir: Folder of the checkpoint journal every finished name is written to. None disables it
+    :param browser_profile: 'auto', 'fast' or 'full' (see shared/browser_profiles.py)
+    :return: List of (index, rows) tuples
+    """
+    cache = ResultCache(cache_path) if cache_path else None
+    journal = CheckpointJournal(journal_dir) if journal_dir else None
+    driver = None
+    try:
+        if cache:
+            hits, pending = cache.split_shard(shard, 'lee', 'clerk', MATCH_TYPE)
+            results = [(index, null_rows(name, rows)) for index, name, rows in hits]
+            if journal:
+                for _, name, rows in hits:
+                    journal.record(name, rows)
+        else:
+            results, pending = [], list(shard)
+        if not pending:
+            return results
+
+        # NOTE: Chrome (and the captcha) is only dealt with when some name isn't in the cache.
+        driver = initialize_driver(download_dir, browser_profile)
+        get_past_main_page(driver)
+        for index, name in pending:
+            try:
+                rows = scrape_name(driver, name, download_dir, cache=cache)
+            except Exception as e:
+                if not needs_full_profile(driver, e):
+                    raise
+                # The site broke on the fast profile, the rest of the shard goes on a full profile browser
+                driver.quit()
+                driver = initialize_driver(download_dir, 'full')
+                get_past_main_page(driver)
+                rows = scrape_name(driver, name, download_dir, cache=cache)
+            if rows is None:
+                results.append((index, None)) # Failed, left out of the journal so --resume searches it again
+                continue
+            if journal:
+                journal.record(name, rows)
+            results.append((index, null_rows(name, rows)))
+        return results
+    except NoSuchElementException as e:
+        print(f"Element not found error: {e}")
+        print(f"URL at the time of error: {driver.current_url if driver else None}")
+        raise
+    finally:
+        if driver:
+            driver.quit()
+        if cache:
+            cache.close()
+        if journal:
+            journal.close()
 
 
 def main():
     """
     Main function to execute the web scraping process.
     """
-    driver = None
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=1, help='Number of browsers searching in parallel')
+    parser.add_argument('--cache', default=CACHE_PATH, help='SQLite file of the result cache')
+    parser.add_argument('--no-cache', action='store_true', help='Scrape every name again, ignoring the result cache')
+    parser.add_argument('--resume', action='store_true', help='Skip the names already done by the last run (see --checkpoint)')
+    parser.add_argument('--checkpoint', default=CHECKPOINT_DIR, help='Folder of the checkpoint journal')
+    parser.add_argument('--trace', help='Folder to write a per phase timing trace to (trace.json)')
+    parser.add_argument('--profile-commands', help='Folder to write a WebDriver command profile to (commands.json)')
+    parser.add_argument('--browser-profile', choices=['auto', 'fast', 'full'], default='auto', help='auto picks per site (see shared/browser_profiles.py)')
+    parser.add_argument('--whisper-model', default='base', help='Whisper model used for the audio CAPTCHA (tiny, base, small, ...)')
+    parser.add_argument('--shared-transcriber', action='store_true', help='One process holds the Whisper model for every worker')
+    parser.add_argument('--stealth', choices=STEALTH_LEVELS, help='Mouse path animation, default per site (see shared/human_input.py)')
+    parser.add_argument('--typing', choices=TYPING_ENGINES, help='Typing engine, default per site (see shared/human_input.py)')
+    args = parser.parse_args()
+    start_tracing(args.trace)  # Does nothing without --trace
+    start_profiling(args.profile_commands)
+    os.environ[MODEL_ENV] = args.whisper_model  # Workers inherit it
+    if args.stealth:
+        os.environ[STEALTH_ENV] = args.stealth
+    if args.typing:
+        os.environ[TYPING_ENV] = args.typing
+    service = start_service(args.whisper_model) if args.shared_transcriber else None
+
     try:
-        all_dfs = []
-        download_dir = "./download"  # Adjusted variable name for consistency
-        file_name = "_ExportResults"  # This is a part of the file name to look for
+        download_dir = "./download"  # Each worker downloads into its own folder under this one
 
-        driver = initialize_driver(download_dir)
         file = pd.read_excel('./big_input.xlsx')
         names = file['name'].tolist()
 
-        get_past_main_page(driver)
-
-        columns = ['Search Parameter', 'Status', 'Consideration', 'Search Name', 
-                   'Grantor', 'Grantee', 'Record Date', 'Doc Type', 'Book Type', 'Book', 
-                   'Page', 'Clerk File Number', 'DocLinks', 'Legal', 'Lot', 'Block', 'Unit', 
-                   'Subdivision', 'Building', 'Section', 'Township', 'Range', 'Comment', 'DocLinks']
+        completed = start_run(args.checkpoint, resume=args.resume)
+        remaining = [name for name in names if str(name) not in completed]
 
+        scrape = partial(scrape_shard, cache_path=None if args.no_cache else args.cache, journal_dir=args.checkpoint,
+                         browser_profile=args.browser_profile)
+        scraped = dict(zip(map(str, remaining), run_batch(remaining, scrape, workers=args.workers, download_root=download_dir)))
+        # NOTE: Names done by an earlier run come back from the journal, so a resumed run writes the full workbook.
+        # Every name's rows go in one column buffer, a single DataFrame is built from it at the end
+        results = ColumnBuffer(COLUMNS)
+        failed = []
         for name in names:
-            webscraped = webscrape(driver, name)
-
-            if webscraped:
-                wait_for_file_download(download_dir, file_name)
-                downloaded_files = [f for f in os.listdir(download_dir) if f.startswith(file_name) and f.endswith('.xlsx')]
-                if downloaded_files:
-                    df = pd.read_excel(os.path.join(download_dir, downloaded_files[0]))
-                    # Add missing columns with NULL values
-                    for column in columns:
-                        if column not in df.columns:
-                            df[column] = np.nan
-                    # Ensure dataframe has columns in the specified order, adding 'Search Parameter' with the name
-                    df = df.reindex(columns=columns, fill_value=np.nan)
-                    df['Search Parameter'] = name
-                    all_dfs.append(df)
-                    # Optionally, delete the file after processing
-                    delete_file(download_dir, downloaded_files[0])
+            if str(name) in completed:
+                results.extend(null_rows(name, completed[str(name)]))
+            elif scraped.get(str(name)) is not None:
+                results.extend(scraped[str(name)])
             else:
-                # Create an empty dataframe with the specified columns, filled with NULLs
-                df = pd.DataFrame(columns=columns)
-                df.loc[0] = [name] + [None] * (len(columns) - 1)
-                all_dfs.append(df)
+                failed.append(str(name))
+        if failed:
+            print(f"{len(failed)} names failed and are not in results.xlsx (run again with --resume): {', '.join(failed)}")
 
-        # Remove empty or fully NaN DataFrames
-        filtered_dfs = [df for df in all_dfs if not df.isnull().all().all()]
-
-        if filtered_dfs:
-            final_df = pd.concat(filtered_dfs, ignore_index=True)
-        else:
-            final_df = pd.DataFrame(columns=columns)
-
-        final_df.to_excel('results.xlsx', index=False)
-
-    except NoSuchElementException as e:
-        print(f"Element not found error: {e}")
-        print(f"URL at the time of error: {driver.current_url if driver else 'Driver not initialized'}")
+        with span('excel_write'):
+            final_df = results.to_frame()
+            final_df.to_excel('results.xlsx', index=False)
+        finish_tracing()
+        finish_profiling()
 
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
         traceback.print_exc()  # Print the full traceback
-
     finally:
-        if driver:
-            driver.quit()
+        stop_service(service)
 
 if __name__ == "__main__":
-    main()
+    main()
\ No newline at end of file
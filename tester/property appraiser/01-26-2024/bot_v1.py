@@ -4,11 +4,22 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import Select
-from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException, JavascriptException
 import pandas as pd
-import time
+import os
+import sys
+import argparse
+from functools import partial
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')) # So the helpers in tester/shared can be imported
+from shared.batch_runner import run_batch
+from shared.extraction import extract_leepa_rows
+from shared.html_parsing import PageParser, parse_leepa_results, load_snapshots
+from shared.result_cache import ResultCache, DEFAULT_PATH as CACHE_PATH
+from shared.checkpoint import CheckpointJournal, start_run, DEFAULT_DIR as CHECKPOINT_DIR
+from shared.tracing import traced, span, start_tracing, finish_tracing
+from shared.command_profiler import profile_commands, start_profiling, finish_profiling
+from shared.browser_profiles import browser_options, apply_profile, needs_full_profile
+from shared.driver_resolver import chromedriver_path
 
 def wait_for_element(driver, locator, wait_time=30):
     """
@@ -20,12 +31,13 @@ def wait_for_element(driver, locator, wait_time=30):
     """
     return WebDriverWait(driver, wait_time).until(EC.element_to_be_clickable(locator))
 
+@traced('validate')
 def validate(driver, wait_time=60):
     """
     Validates if the search results are available or if there are no matches.
     :param driver: WebDriver instance
     :param wait_time: Maximum time to attempt validation
-    :return: Boolean indicating if search results are valid or not
+    :return: True if results are shown, False if the site says there is no match, None if neither showed up in time
     """
     for _ in range(wait_time):
         try:
@@ -44,8 +56,9 @@ def validate(driver, wait_time=60):
             return True
         except Exception:
             pass
-    return False
+    return None
 
+@traced('extract')
 def extract_table_data(driver, user_input):
     """
     Extracts data from the search results table.
@@ -53,118 +66,216 @@ def extract_table_data(driver, user_input):
     :param user_input: User input string used for the search
     :return: List of extracted data rows
     """
-    table = wait_for_element(driver, (By.CLASS_NAME, 'resultsDataGrid'))
-    rows = table.find_elements(By.TAG_NAME, 'tr')
-    data = []
+    wait_for_element(driver, (By.CLASS_NAME, 'resultsDataGrid'))
+    # The whole table is read in one execute_script instead of a round trip per cell
+    return extract_leepa_rows(driver, user_input)
 
-    for row in rows:
-        cols = row.find_elements(By.TAG_NAME, 'td')
-        if cols:
-            # Extracting various data fields from the table
-            strap_folio = cols[0].text
-            owner_info = cols[1]
-            bold_elements = owner_info.find_elements(By.XPATH, ".//div[@class='bold']")
-            bold_text = [elem.text.strip() for elem in bold_elements]
-            owner_names = ' '.join(bold_text)
+# Marks the current results grid, then switches the page dropdown to the next page (its onchange posts back).
+# Returns the next page number, or null on the last page.
+NEXT_PAGE_JS = """
+var select = document.querySelector("select[id$='_pagenumberList']");
+var grid = document.querySelector('.resultsDataGrid');
+if (!select || !grid) { return null; }
+var current = parseInt(select.value, 10);
+var values = Array.prototype.map.call(select.options, function (option) { return parseInt(option.value, 10); });
+if (values.indexOf(current + 1) < 0) { return null; }
+grid.setAttribute('data-page-generation', current);
+select.value = String(current + 1);
+select.dispatchEvent(new Event('change', {bubbles: true}));
+return current + 1;
+"""
 
-            owner_address = owner_info.text
-            for owner_name in bold_text:
-                owner_address = owner_address.replace(owner_name, '').strip()
+# True once the marked grid is gone (postback done) and the dropdown shows the requested page.
+# A grid or dropdown missing mid postback only means the page isn't there yet.
+PAGE_TURNED_JS = """
+var select = document.querySelector("select[id$='_pagenumberList']");
+var grid = document.querySelector('.resultsDataGrid');
+return !!grid && !grid.hasAttribute('data-page-generation') && !!select && parseInt(select.value, 10) === arguments[0];
+"""
 
-            strap, folio = strap_folio.split('\n', 1)
-            site_property_column = cols[2]
-            divs = site_property_column.find_elements(By.CLASS_NAME, 'itemAddAndLegal')
-            site_address = divs[0].text
-            property_description = divs[1].text
-
-            data.append([user_input, strap, folio, owner_names, owner_address, site_address, property_description])
-
-    return data
-
-def navigate_to_next_page(driver, old_table_text):
+@traced('next_page')
+def navigate_to_next_page(driver, wait_time=60):
     """
     Navigates to the next page of search results if available.
+    The grid is marked before the switch, so the new page is detected with one small check (marker gone, dropdown on
+    the next page) instead of pulling the whole table text every half second.
     :param driver: WebDriver instance
-    :param old_table_text: Text content of the current results table
+    :param wait_time: Maximum time to wait for the next page
     :return: Boolean indicating if navigation was successful
     """
+    next_page = driver.execute_script(NEXT_PAGE_JS)
+    if next_page is None:
+        return False
     try:
-        # Locating the page number dropdown and selecting the next page
-        xpath = "//*[substring(@id, string-length(@id) - string-length('_pagenumberList') + 1) = '_pagenumberList']"
-        select_element = wait_for_element(driver, (By.XPATH, xpath))
-        select = Select(select_element)
-        next_value = int(select.first_selected_option.get_attribute("value")) + 1
-        select.select_by_value(str(next_value))
-
-        end_time = time.time() + 60
-        while True:
-            try:
-                new_table_text = driver.find_element(By.CLASS_NAME, 'resultsDataGrid').text
-                if new_table_text != old_table_text:
-                    return True
-            except StaleElementReferenceException:
-                if time.time() > end_time:
-                    return False
-                continue
-            time.sleep(0.5)
-    except NoSuchElementException:
+        # Errors while the postback swaps the document are retried like a page that hasn't turned yet
+        ignored = [StaleElementReferenceException, NoSuchElementException, JavascriptException]
+        WebDriverWait(driver, wait_time, poll_frequency=0.2, ignored_exceptions=ignored).until(
+            lambda driver: driver.execute_script(PAGE_TURNED_JS, next_page))
+        return True
+    except TimeoutException:
         return False
 
-def initialize_driver():
+@traced('driver_start')
+@profile_commands
+def initialize_driver(profile='auto'):
     """
     Initializes and returns a Selenium WebDriver instance.
+    :param profile: Browser profile, 'auto', 'fast' or 'full' (see shared/browser_profiles.py)
     :return: WebDriver instance
     """
-    service = Service(ChromeDriverManager().install())
-    return webdriver.Chrome(service=service)
+    service = Service(chromedriver_path())
+    options, profile = browser_options('leepa', profile)
+    return apply_profile(webdriver.Chrome(service=service, options=options), 'leepa', profile)
 
-def webscrape(driver, user_input):
+@traced('name')
+def webscrape(driver, user_input, page_parser=None):
     """
     Performs the web scraping task using the provided WebDriver and user input.
     :param driver: WebDriver instance
     :param user_input: User input for search criteria
-    :return: List of scraped data
+    :param page_parser: Optional PageParser. Pages are then parsed from page_source off the browser's critical path
+    :return: List of scraped data (empty if there is no match), None if the results never showed up
     """
     # Navigating to the website and performing the search
-    driver.get("https://www.leepa.org/Search/PropertySearch.aspx")
-    name_field = wait_for_element(driver, (By.ID, 'ctl00_BodyContentPlaceHolder_WebTab1_tmpl0_OwnerNameTextBox'))
-    name_field.send_keys(user_input)
+    with span('navigate'):
+        driver.get("https://www.leepa.org/Search/PropertySearch.aspx")
+    with span('search'):
+        name_field = wait_for_element(driver, (By.ID, 'ctl00_BodyContentPlaceHolder_WebTab1_tmpl0_OwnerNameTextBox'))
+        name_field.send_keys(user_input)
 
-    search_button = wait_for_element(driver, (By.ID, 'ctl00_BodyContentPlaceHolder_WebTab1_tmpl0_SubmitPropertySearch'))
-    search_button.click()
+        search_button = wait_for_element(driver, (By.ID, 'ctl00_BodyContentPlaceHolder_WebTab1_tmpl0_SubmitPropertySearch'))
+        search_button.click()
 
-    if not validate(driver):
+    found = validate(driver)
+    if found is None:
+        print(f"No results or 'no match' message showed up for {user_input}")
+        return None
+    if not found:
         return []
 
     all_data = []
+    pages = []  # Parsing futures when the html parser is used
     while True:
-        new_data = extract_table_data(driver, user_input)
-        all_data += new_data
-        table_text = driver.find_element(By.CLASS_NAME, 'resultsDataGrid').text
-        if not navigate_to_next_page(driver, table_text):
+        if page_parser:
+            wait_for_element(driver, (By.CLASS_NAME, 'resultsDataGrid'))
+            pages.append(page_parser.submit(driver.page_source, parse_leepa_results, user_input, name=user_input, page=len(pages) + 1))
+        else:
+            new_data = extract_table_data(driver, user_input)
+            all_data += new_data
+        if not navigate_to_next_page(driver):
             break
 
+    if page_parser:
+        all_data = page_parser.gather(pages)
     return all_data
 
+def scrape_shard(shard, download_dir, parser='webdriver', snapshot_dir=None, cache_path=None, journal_dir=None, browser_profile='auto'):
+    """
+    Worker used by the batch runner. Owns its own driver for the names it was given.
+    :param shard: List of (index, name) tuples
+    :param download_dir: Download directory of this worker (nothing is downloaded on this site)
+    :param parser: 'webdriver' reads the page through the driver, 'html' parses page_source with lxml on a thread pool
+    :param snapshot_dir: With the html parser, also keep the raw pages in this folder
+    :param cache_path: SQLite file of the result cache (see shared/result_cache.py). None disables the cache
+    :param journal_dir: Folder of the checkpoint journal every finished name is written to. None disables it
+    :param browser_profile: 'auto', 'fast' or 'full' (see shared/browser_profiles.py)
+    :return: List of (index, rows) tuples
+    """
+    cache = ResultCache(cache_path) if cache_path else None
+    journal = CheckpointJournal(journal_dir) if journal_dir else None
+    driver, page_parser = None, None
+    try:
+        if cache:
+            hits, pending = cache.split_shard(shard, 'lee', 'property_appraiser')
+            results = [(index, rows) for index, _, rows in hits]
+            if journal:
+                for _, name, rows in hits:
+                    journal.record(name, rows)
+        else:
+            results, pending = [], list(shard)
+        if not pending:
+            return results
+
+        # NOTE: Chrome is only started when some name isn't in the cache.
+        driver = initialize_driver(browser_profile)
+        page_parser = PageParser(snapshot_dir) if parser == 'html' else None
+        for index, name in pending:
+            try:
+                rows = webscrape(driver, name, page_parser)
+            except Exception as e:
+                if not needs_full_profile(driver, e):
+                    raise
+                # The site broke on the fast profile, the rest of the shard goes on a full profile browser
+                driver.quit()
+                driver = initialize_driver('full')
+                rows = webscrape(driver, name, page_parser)
+            if rows is None:
+                results.append((index, None)) # Timed out, neither cached nor journaled so it is searched again
+                continue
+            if cache:
+                cache.put('lee', 'property_appraiser', name, rows)
+            if journal:
+                journal.record(name, rows)
+            results.append((index, rows))
+        return results
+    finally:
+        if driver:
+            driver.quit()
+        if page_parser:
+            page_parser.close()
+        if cache:
+            cache.close()
+        if journal:
+            journal.close()
+
 def main():
     """
     Main function to execute the web scraping process.
     """
-    driver = initialize_driver()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=1, help='Number of browsers searching in parallel')
+    parser.add_argument('--parser', choices=['webdriver', 'html'], default='webdriver', help='How result pages are read')
+    parser.add_argument('--snapshots', help='Folder to keep the raw result pages in (html parser only)')
+    parser.add_argument('--reparse', help='Rebuild results.xlsx from a snapshots folder without opening the browser')
+    parser.add_argument('--cache', default=CACHE_PATH, help='SQLite file of the result cache')
+    parser.add_argument('--no-cache', action='store_true', help='Scrape every name again, ignoring the result cache')
+    parser.add_argument('--resume', action='store_true', help='Skip the names already done by the last run (see --checkpoint)')
+    parser.add_argument('--checkpoint', default=CHECKPOINT_DIR, help='Folder of the checkpoint journal')
+    parser.add_argument('--trace', help='Folder to write a per phase timing trace to (trace.json)')
+    parser.add_argument('--profile-commands', help='Folder to write a WebDriver command profile to (commands.json)')
+    parser.add_argument('--browser-profile', choices=['auto', 'fast', 'full'], default='auto', help='auto picks per site (see shared/browser_profiles.py)')
+    args = parser.parse_args()
+    start_tracing(args.trace)  # Does nothing without --trace
+    start_profiling(args.profile_commands)
+
     file = pd.read_excel('./input.xlsx')
     names = file['name'].tolist()
     all_data = []
 
-    for name in names:
-        data = webscrape(driver, name)
-        all_data.extend(data)
+    completed = {} if args.reparse else start_run(args.checkpoint, resume=args.resume)
+    remaining = [name for name in names if str(name) not in completed]
+
+    if args.reparse:
+        for name in names:
+            for html in load_snapshots(args.reparse, name):
+                all_data.extend(parse_leepa_results(html, name))
+    else:
+        scrape = partial(scrape_shard, parser=args.parser, snapshot_dir=args.snapshots,
+                         cache_path=None if args.no_cache else args.cache, journal_dir=args.checkpoint,
+                         browser_profile=args.browser_profile)
+        scraped = dict(zip(map(str, remaining), run_batch(remaining, scrape, workers=args.workers)))
+        # NOTE: Journal rows first so a resumed run gives the same workbook as an uninterrupted one.
+        for name in names:
+            all_data.extend(completed.get(str(name), scraped.get(str(name))) or [])
 
     # Creating a DataFrame from the extracted data
     df = pd.DataFrame(all_data, columns=['Name', 'Strap', 'Folio', 'Owners', 'Owners Address', 'Site Address', 'Property Description'])
 
     # Saving the DataFrame to an Excel file without the index (no additional column of numbers)
-    df.to_excel('results.xlsx', index=False)
-    driver.quit()
+    with span('excel_write'):
+        df.to_excel('results.xlsx', index=False)
+    finish_tracing()
+    finish_profiling()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
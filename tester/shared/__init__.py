@@ -0,0 +1,6 @@
+"""
+Shared helpers for the county scrapers under tester/.
+
+NOTE: The scripts are still run from their own folder (python broward_county_part1.py) so each one appends
+      the tester/ folder to sys.path before importing from here.
+"""
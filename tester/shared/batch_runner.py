@@ -0,0 +1,102 @@
+"""
+Parallel batch runner: splits the input names across worker processes.
+
+Most of a search is spent waiting on the county website, so several browsers working at the same time on one
+machine get close to a linear speedup. Each worker process gets its own driver and its own download directory
+(so exported files never collide) and the rows are merged back in the same order as the input.xlsx.
+
+The script provides a `scrape_shard(shard, download_dir)` function:
+    shard        -> list of (index, name) tuples this worker is responsible for
+    download_dir -> directory only this worker downloads into
+    returns      -> list of (index, rows) tuples
+NOTE: scrape_shard must be a top level function of the script (not a lambda) so it can be sent to the
+      worker process, and the script must keep its `if __name__ == "__main__":` guard (Windows spawns workers).
+"""
+
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+def shard_names(names, workers):
+    """
+    Splits the names round robin so every worker gets a mix of the list (long and short searches spread out).
+    :param names: List of names in input order
+    :param workers: Number of workers
+    :return: List of shards, each shard a list of (index, name) tuples
+    """
+    shard_count = max(1, min(workers, len(names)))
+    shards = [[] for _ in range(shard_count)]
+    for index, name in enumerate(names):
+        shards[index % shard_count].append((index, name))
+    return shards
+
+
+def worker_download_dir(download_root, worker_number):
+    """
+    Download directory of a single worker. Created if it doesn't exist yet.
+    """
+    directory = os.path.abspath(os.path.join(download_root, f"worker_{worker_number}"))
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def run_batch(names, scrape_shard, workers=4, download_root='./download'):
+    """
+    Runs scrape_shard over all names with the given number of worker processes.
+    A shard whose worker crashed is run once more (on a new pool, a dead worker breaks the one it was in). The names
+    still without rows at the end are listed.
+    :param names: List of names in input order
+    :param scrape_shard: Top level function of the script (see module docstring)
+    :param workers: Number of worker processes. 1 runs in this process with no pool at all.
+    :param download_root: Each worker downloads into download_root/worker_<n>
+    :return: List with the rows of each name in input order. None for names whose worker crashed twice (or that
+             scrape_shard itself left as None).
+    """
+    shards = list(enumerate(shard_names(names, workers)))
+    results = [None] * len(names)
+
+    failed = _run_shards(shards, scrape_shard, download_root, results)
+    if failed:
+        print(f"Retrying the names of {len(failed)} crashed worker(s) once...")
+        _run_shards(failed, scrape_shard, download_root, results)
+
+    unfinished = [str(names[index]) for index, rows in enumerate(results) if rows is None]
+    if unfinished:
+        print(f"{len(unfinished)} names have no rows (run again with --resume): {', '.join(unfinished)}")
+    return results
+
+
+def _run_shards(shards, scrape_shard, download_root, results):
+    """
+    Runs the shards, one worker each, and puts their rows in results.
+    :param shards: List of (worker number, shard) tuples
+    :return: The (worker number, shard) tuples whose worker crashed
+    """
+    failed = []
+    if len(shards) == 1:
+        worker_number, shard = shards[0]
+        try:
+            for index, rows in scrape_shard(shard, worker_download_dir(download_root, worker_number)):
+                results[index] = rows
+        except Exception:
+            print(f"Worker {worker_number} failed:")
+            traceback.print_exc()
+            failed.append(shards[0])
+        return failed
+
+    with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+        futures = {}
+        for worker_number, shard in shards:
+            future = executor.submit(scrape_shard, shard, worker_download_dir(download_root, worker_number))
+            futures[future] = (worker_number, shard)
+        for future in as_completed(futures):
+            try:
+                for index, rows in future.result():
+                    results[index] = rows
+            except Exception:
+                # One crashed worker should not throw away what the other workers collected.
+                print(f"Worker {futures[future][0]} failed:")
+                traceback.print_exc()
+                failed.append(futures[future])
+    return failed
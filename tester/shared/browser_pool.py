@@ -0,0 +1,213 @@
+"""
+Reusable pool of warm Chrome sessions.
+
+Before: every name in the input.xlsx started a new Chrome (plus ChromeDriverManager().install()) and quit it afterwards.
+Now: the script keeps N browsers open, checks one out per search, resets it and hands it back. A browser is recycled
+(quit + replaced) after a set number of searches or when its memory goes over the ceiling.
+
+Usage:
+    pool = BrowserPool(driver_initialization, size=2)
+    with pool.session() as driver:
+        ...
+    rows = pool.run(scrape_name, name) # Same, plus the fallback to the full browser profile
+    pool.close()
+"""
+
+import queue
+import threading
+import time
+
+from shared.browser_profiles import needs_full_profile
+
+try:
+    import psutil # NOTE: Optional, only needed for the memory ceiling.
+except ImportError:
+    psutil = None
+
+
+class BrowserPool:
+    """
+    Keeps up to `size` drivers alive and hands them out one search at a time.
+    :param driver_factory: Function with no arguments that returns a new WebDriver (ex. driver_initialization)
+    :param size: Number of browsers kept warm
+    :param max_uses: Searches a browser does before it is quit and replaced
+    :param max_memory_mb: Memory ceiling (chromedriver + chrome processes) before the browser is replaced. None disables it.
+    :param reset_storage: True clears cookies/localStorage/sessionStorage between searches, False keeps them on purpose
+                          (ex. a site where the accepted disclaimer should stick).
+    """
+
+    def __init__(self, driver_factory, size=2, max_uses=25, max_memory_mb=1500, reset_storage=True):
+        self.driver_factory = driver_factory
+        self.size = size
+        self.max_uses = max_uses
+        self.max_memory_mb = max_memory_mb
+        self.reset_storage = reset_storage
+        self._idle = queue.LifoQueue() # NOTE: LIFO so the most recently used (warmest) browser goes out first.
+        self._uses = {}
+        self._created = 0
+        self._leased = set() # ids of the drivers checked out right now
+        self._retired = set() # ids of checked out drivers close() asked to quit, done when they come back
+        self._lock = threading.Lock()
+
+    def checkout(self, timeout=None):
+        """
+        Returns an idle driver. Starts a new one if the pool is not full yet, otherwise waits for one to be released
+        (or for a recycled one to free its slot). A browser that fails to start raises here and frees its slot.
+        """
+        end = None if timeout is None else time.time() + timeout
+        while True:
+            try:
+                return self._lease(self._idle.get_nowait())
+            except queue.Empty:
+                pass
+            with self._lock:
+                start = self._created < self.size
+                if start:
+                    self._created += 1
+            if start:
+                try:
+                    return self._lease(self._new_driver())
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            wait = 0.5 if end is None else min(0.5, end - time.time())
+            if wait <= 0:
+                raise queue.Empty
+            try:
+                return self._lease(self._idle.get(timeout=wait))
+            except queue.Empty:
+                continue
+
+    def release(self, driver):
+        """
+        Gives a driver back to the pool. The driver is reset for the next search, or recycled if it hit the
+        use limit / memory ceiling / died during the search. A recycled driver is only quit here, its replacement
+        is started by the next checkout, so a browser failing to start never surfaces from release.
+        """
+        with self._lock:
+            self._leased.discard(id(driver))
+            retired = id(driver) in self._retired
+            self._retired.discard(id(driver))
+            if retired:
+                self._created -= 1
+        if retired:
+            self._quit(driver)
+            return
+        self._uses[id(driver)] = self._uses.get(id(driver), 0) + 1
+        if self._needs_recycle(driver) or not self._reset(driver):
+            self._quit(driver)
+            with self._lock:
+                self._created -= 1
+            return
+        self._idle.put(driver)
+
+    def session(self):
+        """
+        Context manager version of checkout/release so the driver always goes back to the pool.
+        """
+        return _PoolSession(self)
+
+    def run(self, function, *args):
+        """
+        Runs function(driver, *args) on a checked out driver and returns what it returns.
+        If it fails on a fast profile browser (see shared/browser_profiles.py) the site falls back to the full
+        profile, the pool's browsers are replaced and the function runs once more on a full profile browser.
+        """
+        with self.session() as driver:
+            try:
+                return function(driver, *args)
+            except Exception as e:
+                if not needs_full_profile(driver, e):
+                    raise
+        self.close() # NOTE: Every browser of the pool was started on the fast profile, none of them is kept.
+        with self.session() as driver:
+            return function(driver, *args)
+
+    def close(self):
+        """
+        Quits every idle driver. Call at the end of main().
+        Drivers still checked out are quit when they are released, and keep counting towards `size` until then.
+        """
+        with self._lock:
+            self._retired |= self._leased
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit(driver)
+            with self._lock:
+                self._created -= 1
+
+    def _lease(self, driver):
+        with self._lock:
+            self._leased.add(id(driver))
+        return driver
+
+    def _new_driver(self):
+        driver = self.driver_factory()
+        self._uses[id(driver)] = 0
+        return driver
+
+    def _quit(self, driver):
+        self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _needs_recycle(self, driver):
+        if self._uses.get(id(driver), 0) >= self.max_uses:
+            return True
+        if self.max_memory_mb is not None and browser_memory_mb(driver) > self.max_memory_mb:
+            return True
+        return False
+
+    def _reset(self, driver):
+        """
+        Puts the browser back to a clean state. Returns False if the browser is not responding anymore.
+        """
+        try:
+            if len(driver.window_handles) > 1: # Close extra tabs/popups opened during the search
+                for handle in driver.window_handles[1:]:
+                    driver.switch_to.window(handle)
+                    driver.close()
+                driver.switch_to.window(driver.window_handles[0])
+            driver.switch_to.default_content()
+            if self.reset_storage:
+                driver.delete_all_cookies()
+                driver.execute_script("try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}")
+            driver.get('about:blank')
+            return True
+        except Exception:
+            return False
+
+
+class _PoolSession:
+    def __init__(self, pool):
+        self.pool = pool
+        self.driver = None
+
+    def __enter__(self):
+        self.driver = self.pool.checkout()
+        return self.driver
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.pool.release(self.driver)
+        return False
+
+
+def browser_memory_mb(driver):
+    """
+    Memory (RSS) used by the chromedriver process and every chrome process under it, in MB.
+    Returns 0 when psutil is not installed or the process can't be read.
+    """
+    if psutil is None:
+        return 0
+    try:
+        parent = psutil.Process(driver.service.process.pid)
+        processes = [parent] + parent.children(recursive=True)
+        return sum(process.memory_info().rss for process in processes) / (1024 * 1024)
+    except Exception:
+        return 0
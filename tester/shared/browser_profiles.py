@@ -0,0 +1,159 @@
+"""
+Browser profiles: how Chrome is started for a site.
+
+    full -> what the scripts always did: a headed window, every image, font, stylesheet and video loads.
+    fast -> headless=new, images/fonts/media blocked through CDP (Network.setBlockedURLs), no extensions, no GPU,
+            a small window and the 'eager' page load strategy (don't wait for subresources after DOMContentLoaded).
+            Less to download per page and a far smaller browser per worker.
+
+Each site has its profile in SITE_PROFILES (same site keys as shared/readiness.py). 'auto' uses that table.
+When a site breaks on the fast profile (an exception during a search) the name is retried right away on a full
+browser (BrowserPool.run, the scrape_shard of the bots) and the rest of this process uses the full profile for that
+site. Only a failure that points at the profile itself (PROFILE_SYMPTOMS: blocked resources, a headless check) or
+FAILURES_TO_PERSIST failures in one process write the site to FALLBACK_PATH, which keeps every later run on the full
+profile. A timeout or a network blip doesn't. Delete the file to give the fast profile another try.
+
+Usage:
+    options, profile = browser_options('leepa', args.browser_profile)
+    driver = webdriver.Chrome(service=service, options=options)
+    apply_profile(driver, 'leepa', profile)
+"""
+
+import json
+import time
+
+from selenium import webdriver
+
+
+# Url patterns blocked by the fast profile
+BLOCKED_IMAGES = ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.bmp']
+BLOCKED_FONTS = ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot']
+BLOCKED_MEDIA = ['*.mp4', '*.webm', '*.mp3', '*.ogg', '*.wav', '*.m4a']
+
+PROFILES = {
+    'full': {'headless': False, 'blocked_urls': [], 'window_size': None, 'page_load_strategy': 'normal', 'arguments': []},
+    'fast': {'headless': True, 'blocked_urls': BLOCKED_IMAGES + BLOCKED_FONTS + BLOCKED_MEDIA, 'window_size': '1280,900',
+             'page_load_strategy': 'eager',
+             'arguments': ['--disable-extensions', '--disable-gpu', '--no-first-run', '--mute-audio',
+                           '--blink-settings=imagesEnabled=false']},
+}
+
+# Profile each site starts on with 'auto'
+SITE_PROFILES = {
+    'bcpa': 'fast',
+    'acclaimweb': 'fast',
+    'county_taxes': 'fast',
+    'collier_appraiser': 'fast',
+    'leepa': 'fast',
+    'collier_clerk': 'full',  # NOTE: Blazor app with an Excel download, headless downloads need extra setup.
+    'lee_clerk': 'full',      # NOTE: reCAPTCHA challenges headless browsers and needs its images.
+}
+
+FALLBACK_PATH = './browser_fallbacks.json'
+
+# Text of an error or of the page title that means the fast profile itself is the problem
+PROFILE_SYMPTOMS = ['err_blocked_by_client', 'headless', 'access denied', 'unusual traffic', 'are you a robot',
+                    'just a moment', 'captcha']
+FAILURES_TO_PERSIST = 3  # Fast profile failures of a site in one process before the fallback is written anyway
+
+_session_fallbacks = {}  # site -> failures on the fast profile in this process
+
+
+def _load_fallbacks():
+    try:
+        with open(FALLBACK_PATH, encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def resolve_profile(site, requested='auto'):
+    """
+    :param site: Site key (ex. 'bcpa')
+    :param requested: 'auto' (SITE_PROFILES), 'fast' (every site) or 'full' (the --browser-profile of the script).
+                      A site that fell back is on the full profile either way.
+    :return: 'fast' or 'full'
+    """
+    if requested == 'full' or site in _session_fallbacks or site in _load_fallbacks():
+        return 'full'
+    if requested == 'fast':
+        return 'fast'
+    return SITE_PROFILES.get(site, 'full')
+
+
+def browser_options(site, requested='auto', options=None):
+    """
+    Chrome options of the profile of a site.
+    :param options: Existing ChromeOptions to add to (ex. with download prefs or a user agent), a new one if None
+    :return: Tuple (options, profile name). Pass the profile name to apply_profile once the driver is started.
+    """
+    profile = resolve_profile(site, requested)
+    settings = PROFILES[profile]
+    options = options or webdriver.ChromeOptions()
+    if settings['headless']:
+        options.add_argument('--headless=new')
+    if settings['window_size']:
+        options.add_argument(f"--window-size={settings['window_size']}")
+    for argument in settings['arguments']:
+        options.add_argument(argument)
+    options.page_load_strategy = settings['page_load_strategy']
+    return options, profile
+
+
+def apply_profile(driver, site, profile):
+    """
+    The part of a profile that needs a running browser: the blocked urls, and the user agent of a headless browser
+    (it says HeadlessChrome, which some sites turn away).
+    """
+    settings = PROFILES[profile]
+    if settings['blocked_urls']:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': settings['blocked_urls']})
+    if settings['headless']:
+        user_agent = driver.execute_script('return navigator.userAgent').replace('HeadlessChrome', 'Chrome')
+        driver.execute_cdp_cmd('Network.setUserAgentOverride', {'userAgent': user_agent})
+    driver.browser_site = site
+    driver.browser_profile = profile
+    return driver
+
+
+def fall_back(site, reason):
+    """
+    Moves a site to the full profile for every later browser (this run and the next ones).
+    """
+    _session_fallbacks[site] = _session_fallbacks.get(site, 0) + 1
+    fallbacks = _load_fallbacks()
+    fallbacks[site] = {'reason': str(reason)[:300], 'time': time.strftime('%Y-%m-%d %H:%M:%S')}
+    with open(FALLBACK_PATH, 'w', encoding='utf-8') as file:
+        json.dump(fallbacks, file, indent=1)
+    print(f"{site} failed on the fast browser profile ({str(reason).strip()[:100]}). Using the full profile from now on.")
+
+
+def needs_full_profile(driver, error):
+    """
+    Call when a search failed. If the driver was on the fast profile its site falls back to the full one.
+    :return: True if the search is worth retrying on a new (full profile) browser, False if the error is unrelated
+    """
+    if getattr(driver, 'browser_profile', None) != 'fast':
+        return False
+    site = driver.browser_site
+    failures = _session_fallbacks.get(site, 0) + 1
+    if _profile_symptom(driver, error) or failures >= FAILURES_TO_PERSIST:
+        fall_back(site, error)
+    else:
+        _session_fallbacks[site] = failures
+        print(f"{site} failed on the fast browser profile ({str(error).strip()[:100]}). Using the full profile for the rest of this run.")
+    return True
+
+
+def _profile_symptom(driver, error):
+    """
+    True when the error or the page the driver is on looks like the site rejecting the fast profile.
+    """
+    texts = [str(error)]
+    try:
+        texts.append(driver.title)
+    except Exception:
+        pass # NOTE: The browser may be gone, the error text decides then.
+    text = ' '.join(texts).lower()
+    return any(symptom in text for symptom in PROFILE_SYMPTOMS)
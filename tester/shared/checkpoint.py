@@ -0,0 +1,116 @@
+"""
+Checkpoint journal for long batch runs.
+
+Every finished name is appended (with its rows) to a JSON lines journal and flushed to disk right away. If the run
+crashes on name 1,400 of 2,000, running again with --resume skips the 1,399 names in the journal and the final
+workbook is rebuilt from the journal plus the names that were still left.
+
+Each process writes its own file (journal_<pid>.jsonl) so the batch runner's workers never write to the same file.
+A line cut in half by the crash is ignored on load, and a writer that appends to that file again (pid reused) starts
+on a new line so its first record stays whole.
+
+Usage:
+    completed = start_run('./checkpoint', resume=args.resume)   # {name: rows} already done
+    journal = CheckpointJournal('./checkpoint')
+    for name in names:
+        if name in completed:
+            continue
+        ...
+        journal.record(name, rows)
+    journal.close()
+"""
+
+import glob
+import json
+import os
+
+
+DEFAULT_DIR = './checkpoint'
+
+
+def load_journal(directory):
+    """
+    Reads every journal file of the directory.
+    :param directory: Folder of the journal
+    :return: Dictionary {name: rows} of the completed names
+    """
+    completed = {}
+    for path in sorted(glob.glob(os.path.join(directory, 'journal_*.jsonl'))):
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                    completed[entry['name']] = entry['rows']
+                except (ValueError, KeyError, TypeError):
+                    continue # NOTE: Last line of a process that died in the middle of writing it.
+    return completed
+
+
+def clear_journal(directory):
+    """
+    Removes the journal of a previous run so a new run starts from nothing.
+    """
+    for path in glob.glob(os.path.join(directory, 'journal_*.jsonl')):
+        os.remove(path)
+
+
+def start_run(directory=DEFAULT_DIR, resume=False):
+    """
+    Call once at the start of main().
+    :param directory: Folder of the journal
+    :param resume: True keeps the journal and returns what it holds, False clears it
+    :return: Dictionary {name: rows} of the names that don't need to be scraped again
+    """
+    os.makedirs(directory, exist_ok=True)
+    if resume:
+        completed = load_journal(directory)
+        print(f"Resuming: {len(completed)} names already done in {directory}")
+        return completed
+    clear_journal(directory)
+    return {}
+
+
+class CheckpointJournal:
+    """
+    Appends finished names to <directory>/journal_<pid>.jsonl.
+    :param directory: Folder of the journal
+    """
+
+    def __init__(self, directory=DEFAULT_DIR):
+        self.directory = directory
+        self._file = None
+
+    def record(self, name, rows=None):
+        """
+        Marks a name as done. Written and fsynced before returning, so it survives a crash right after.
+        :param name: Name that was searched
+        :param rows: Json serializable rows of the name (None when the rows live in their own output file)
+        """
+        if self._file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"journal_{os.getpid()}.jsonl")
+            self._file = open(path, 'a', encoding='utf-8')
+            if _ends_mid_line(path):
+                self._file.write('\n') # Closes the partial line, only that line is dropped on load
+        self._file.write(json.dumps({'name': str(name), 'rows': rows}) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _ends_mid_line(path):
+    """
+    True when the file is not empty and its last line has no newline (a write cut short by a crash).
+    """
+    with open(path, 'rb') as file:
+        file.seek(0, os.SEEK_END)
+        if file.tell() == 0:
+            return False
+        file.seek(-1, os.SEEK_END)
+        return file.read(1) != b'\n'
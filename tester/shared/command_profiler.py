@@ -0,0 +1,180 @@
+"""
+WebDriver command profiler: counts and times every command a driver sends to chromedriver, per calling function.
+
+Every Selenium call that talks to the browser (find_element, find_elements, .text, get_attribute, click,
+execute_script, ...) is one round trip through driver.execute. The profiler wraps execute and files each command
+under the first function up the stack that isn't Selenium itself, so the report reads like:
+
+    caller                                   command               calls   total s   mean ms
+    bot.py:get_iframe_by_title               executeScript           840     12.61      15.0
+    bot.py:draw_click_marker                 executeScript           900      9.02      10.0
+
+NOTE: get_attribute is an executeScript in Selenium 4 (it runs the getAttribute atom), it shows up as one.
+
+Profiling is off unless the script is started with --profile-commands <folder>. Like tracing (shared/tracing.py)
+the folder reaches the batch runner's workers through an environment variable; each process rewrites its totals to
+<folder>/commands_<pid>.json whenever one of its drivers quits, and finish_profiling() merges them and prints the report.
+
+Usage:
+    @profile_commands
+    def initialize_driver(): ...        # the driver it returns is profiled when profiling is on
+
+    start_profiling(args.profile_commands)
+    ...
+    finish_profiling()
+"""
+
+import functools
+import glob
+import json
+import os
+import sys
+import threading
+import time
+
+
+PROFILE_DIR_ENV = 'SCRAPER_PROFILE_DIR'
+
+_lock = threading.Lock()
+_stats = {}  # (caller, command) -> [calls, seconds, max seconds]
+_SKIPPED_FILES = (os.path.abspath(__file__), os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tracing.py'))
+
+
+def profile_dir():
+    """
+    :return: Folder of the current profile, None when profiling is off
+    """
+    return os.environ.get(PROFILE_DIR_ENV) or None
+
+
+def start_profiling(directory):
+    """
+    Turns profiling on for this process and the worker processes it starts. Profiles of a previous run are removed.
+    :param directory: Folder of the profile, None leaves profiling off
+    """
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, 'commands_*.json')):
+        os.remove(path)
+    os.environ[PROFILE_DIR_ENV] = os.path.abspath(directory)
+
+
+def _caller():
+    """
+    'file.py:function' of the first frame outside Selenium and the profiling helpers.
+    """
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if f"{os.sep}selenium{os.sep}" not in filename and filename not in _SKIPPED_FILES:
+            return f"{os.path.basename(filename)}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    return '<unknown>'
+
+
+def _add(caller, command, seconds):
+    with _lock:
+        entry = _stats.setdefault((caller, command), [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+
+
+def _dump():
+    """
+    Rewrites the totals of this process (every driver it had so far) to <folder>/commands_<pid>.json.
+    """
+    directory = profile_dir()
+    if directory is None:
+        return
+    with _lock:
+        rows = [{'caller': caller, 'command': command, 'calls': calls, 'seconds': seconds, 'max': longest}
+                for (caller, command), (calls, seconds, longest) in _stats.items()]
+    with open(os.path.join(directory, f"commands_{os.getpid()}.json"), 'w', encoding='utf-8') as file:
+        json.dump(rows, file)
+
+
+def profile_driver(driver):
+    """
+    Profiles every command of a driver. Does nothing when profiling is off or the driver is already profiled.
+    :return: The same driver
+    """
+    if profile_dir() is None or getattr(driver, '_profiled_execute', False):
+        return driver
+    execute, quit = driver.execute, driver.quit
+
+    def profiled_execute(driver_command, params=None):
+        start = time.perf_counter()
+        try:
+            return execute(driver_command, params)
+        finally:
+            _add(_caller(), driver_command, time.perf_counter() - start)
+
+    def profiled_quit():
+        try:
+            quit()
+        finally:
+            _dump() # NOTE: Workers never reach finish_profiling, their totals are written as their drivers quit.
+
+    driver.execute = profiled_execute
+    driver.quit = profiled_quit
+    driver._profiled_execute = True
+    return driver
+
+
+def profile_commands(function):
+    """
+    Decorator for a driver factory, the driver it returns is profiled (see profile_driver).
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        return profile_driver(function(*args, **kwargs))
+    return wrapper
+
+
+def load_profile(directory):
+    """
+    :return: List of {'caller', 'command', 'calls', 'seconds', 'max'} summed over every process, slowest first
+    """
+    merged = {}
+    for path in glob.glob(os.path.join(directory, 'commands_*.json')):
+        with open(path, encoding='utf-8') as file:
+            for row in json.load(file):
+                entry = merged.setdefault((row['caller'], row['command']), dict(row, calls=0, seconds=0.0, max=0.0))
+                entry['calls'] += row['calls']
+                entry['seconds'] += row['seconds']
+                entry['max'] = max(entry['max'], row['max'])
+    return sorted(merged.values(), key=lambda row: row['seconds'], reverse=True)
+
+
+def format_profile(rows, limit=30):
+    lines = [f"{'caller':<45}{'command':<26}{'calls':>8}{'total s':>10}{'mean ms':>9}{'max ms':>9}"]
+    lines.append('-' * len(lines[0]))
+    for row in rows[:limit]:
+        lines.append(f"{row['caller'][:44]:<45}{row['command'][:25]:<26}{row['calls']:>8}{row['seconds']:>10.2f}"
+                     f"{row['seconds'] / row['calls'] * 1000:>9.1f}{row['max'] * 1000:>9.1f}")
+    calls = sum(row['calls'] for row in rows)
+    seconds = sum(row['seconds'] for row in rows)
+    lines.append(f"{'total':<71}{calls:>8}{seconds:>10.2f}")
+    return '\n'.join(lines)
+
+
+def finish_profiling():
+    """
+    Call once at the end of main(). Merges the totals of every process into <folder>/commands.json and prints the report.
+    :return: The merged rows (see load_profile), None when profiling is off
+    """
+    directory = profile_dir()
+    if directory is None:
+        return None
+    _dump()
+    rows = load_profile(directory)
+    with open(os.path.join(directory, 'commands.json'), 'w', encoding='utf-8') as file:
+        json.dump(rows, file, indent=1)
+    print(format_profile(rows))
+    print("Command profile written to:", os.path.join(directory, 'commands.json'))
+    del os.environ[PROFILE_DIR_ENV] # NOTE: The next run in this process (benchmark, daemon) starts unprofiled.
+    with _lock:
+        _stats.clear()
+    return rows
@@ -0,0 +1,148 @@
+"""
+Download completion: pick up an export the moment Chrome finishes writing it.
+
+Before: the Lee clerk bot listed its download folder every 2 seconds, forever, and took the first file whose name
+matched, even while Chrome was still writing <name>.crdownload. Collier part3 slept 5 seconds and renamed a
+hardcoded ./OfficialRecordsSearch.xlsx.
+Now: DownloadWatcher is started before the click that triggers the download. It wakes up on the folder's inotify
+events (Linux, through libc, nothing to install) or polls it every `poll_interval` elsewhere (Windows, macOS), and
+wait() returns the first new file that
+    - matches the prefix/suffix,
+    - wasn't in the folder when the watcher started (an older export never passes for the new one),
+    - is complete: Chrome writes <name>.crdownload and renames it to <name> when done, so the final name appearing
+      without its .crdownload next to it is the atomic 'done' signal.
+wait() raises DownloadTimeout after `timeout` seconds instead of hanging.
+
+Each batch runner worker downloads into its own folder (shared/batch_runner.py), so workers never see each other's
+files, and Chrome adds ' (1)' itself when a name is taken.
+
+Usage:
+    with DownloadWatcher(download_dir) as downloads:
+        export_button.click()
+        path = downloads.wait('_ExportResults', '.xlsx', timeout=120)
+    data = take(path)    # bytes, file removed
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+
+PARTIAL_SUFFIXES = ('.crdownload', '.part', '.tmp')
+
+# inotify flags (linux/inotify.h)
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+_EVENT = struct.Struct('iIII')
+
+
+class DownloadTimeout(TimeoutError):
+    """
+    No complete download showed up in time.
+    """
+
+
+def _inotify():
+    """
+    :return: libc with inotify, None when the system has none (then the watcher polls)
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        libc.inotify_init1
+        return libc
+    except (OSError, AttributeError, TypeError):
+        return None
+
+
+class DownloadWatcher:
+    """
+    Watches one download folder for new, complete files.
+    :param directory: Download folder of the driver (created if missing)
+    :param poll_interval: Seconds between folder listings when inotify isn't available
+    """
+
+    def __init__(self, directory, poll_interval=0.25):
+        self.directory = os.path.abspath(directory)
+        self.poll_interval = poll_interval
+        os.makedirs(self.directory, exist_ok=True)
+        self._existing = set(os.listdir(self.directory))
+        self._fd = None
+        libc = _inotify()
+        if libc is not None:
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd >= 0 and libc.inotify_add_watch(fd, self.directory.encode(), IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE) >= 0:
+                self._fd = fd
+            elif fd >= 0:
+                os.close(fd) # NOTE: Out of watches (fs.inotify.max_user_watches) or an unsupported filesystem, poll instead.
+
+    def _complete(self, prefix, suffix):
+        """
+        :return: Path of the first new complete file matching prefix/suffix, None if there is none yet
+        """
+        names = set(os.listdir(self.directory))
+        for name in sorted(names - self._existing):
+            if not name.startswith(prefix) or not name.endswith(suffix) or name.endswith(PARTIAL_SUFFIXES):
+                continue
+            if any(name + partial in names for partial in PARTIAL_SUFFIXES):
+                continue
+            return os.path.join(self.directory, name)
+        return None
+
+    def _sleep(self, seconds):
+        """
+        Waits for the next folder event (inotify) or the next poll.
+        """
+        if self._fd is None:
+            time.sleep(min(seconds, self.poll_interval))
+            return
+        readable, _, _ = select.select([self._fd], [], [], seconds)
+        if readable:
+            try:
+                os.read(self._fd, 64 * 1024) # NOTE: Only a wake up call, the folder listing decides.
+            except BlockingIOError:
+                pass
+
+    def wait(self, prefix='', suffix='', timeout=120):
+        """
+        Waits for a new file to finish downloading.
+        :param prefix: Start of the file name (ex. '_ExportResults')
+        :param suffix: End of the file name (ex. '.xlsx')
+        :param timeout: Seconds before DownloadTimeout
+        :return: Path of the complete file
+        """
+        end = time.time() + timeout
+        while True:
+            path = self._complete(prefix, suffix)
+            if path:
+                self._existing.add(os.path.basename(path)) # The next wait() of this watcher looks for another file
+                return path
+            remaining = end - time.time()
+            if remaining <= 0:
+                raise DownloadTimeout(f"No complete '{prefix}*{suffix}' download in {self.directory} after {timeout} s")
+            self._sleep(remaining)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def take(path):
+    """
+    Reads a downloaded file and removes it.
+    :return: Bytes of the file
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+    os.remove(path)
+    return data
@@ -0,0 +1,129 @@
+"""
+Chromedriver resolution, once per machine instead of once per browser.
+
+Before: every driver start called ChromeDriverManager().install(), which looks up the Chrome version, asks the
+driver index what to use and checks its cache folder, for every name in the Broward/Collier scripts.
+Now: chromedriver_path() resolves the driver once and pins it in a small manifest (MANIFEST_PATH). Later launches
+only check the pinned file still exists and is unchanged (a stat). The pin is re-resolved through
+ChromeDriverManager every `recheck_hours` (a Chrome update needs a new driver); if that fails (offline) the pinned
+driver keeps being used.
+
+Offline hosts: set CHROMEDRIVER_PATH to a pre-provisioned chromedriver and nothing is ever downloaded or looked up.
+A chromedriver on the PATH is used as the last resort when ChromeDriverManager can't run.
+
+Usage:
+    service = Service(chromedriver_path())
+"""
+
+import json
+import os
+import shutil
+import time
+
+try:
+    from webdriver_manager.chrome import ChromeDriverManager
+except ImportError:
+    ChromeDriverManager = None
+
+
+DRIVER_PATH_ENV = 'CHROMEDRIVER_PATH'
+MANIFEST_ENV = 'CHROMEDRIVER_MANIFEST'
+MANIFEST_PATH = os.path.join(os.path.expanduser('~'), '.acdc', 'chromedriver.json')
+
+_resolved = None  # Path resolved by this process, so only the first driver start does any work
+
+
+def _manifest_path():
+    return os.environ.get(MANIFEST_ENV) or MANIFEST_PATH
+
+
+def _fingerprint(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def _usable(path):
+    return bool(path) and os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+def read_manifest():
+    """
+    :return: The pinned entry {'path', 'size', 'mtime', 'resolved_at'}, or None when nothing is pinned
+    """
+    try:
+        with open(_manifest_path(), encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _pin(path):
+    entry = dict(_fingerprint(path), path=os.path.abspath(path), resolved_at=time.time())
+    directory = os.path.dirname(_manifest_path())
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = _manifest_path() + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump(entry, file, indent=1)
+    os.replace(temporary, _manifest_path()) # NOTE: Worker processes read it at the same time, never half written.
+    return entry['path']
+
+
+def _pinned_if_valid(entry):
+    """
+    Cheap check of a pinned driver: still there, executable and the same file (size and modification time).
+    """
+    if not entry or not _usable(entry.get('path')):
+        return None
+    if _fingerprint(entry['path']) != {'size': entry.get('size'), 'mtime': entry.get('mtime')}:
+        return None
+    return entry['path']
+
+
+def _download():
+    """
+    :return: Path from ChromeDriverManager, or None when it isn't installed or can't reach the driver index
+    """
+    if ChromeDriverManager is None:
+        return None
+    try:
+        return ChromeDriverManager().install()
+    except Exception as e:
+        print(f"ChromeDriverManager could not resolve a driver: {e}")
+        return None
+
+
+def chromedriver_path(recheck_hours=24, refresh=False):
+    """
+    Path of the chromedriver to start Chrome with.
+    :param recheck_hours: Age of the pin after which ChromeDriverManager is asked again (follows Chrome updates)
+    :param refresh: True ignores the pin (ex. after a 'session not created: This version of ChromeDriver' error)
+    :return: Path string
+    """
+    global _resolved
+    if _resolved and not refresh:
+        return _resolved
+
+    provisioned = os.environ.get(DRIVER_PATH_ENV)
+    if provisioned:
+        if not _usable(provisioned):
+            raise FileNotFoundError(f"{DRIVER_PATH_ENV} is set to {provisioned} but no executable chromedriver is there")
+        _resolved = provisioned
+        return _resolved
+
+    entry = read_manifest()
+    pinned = None if refresh else _pinned_if_valid(entry)
+    if pinned and time.time() - entry.get('resolved_at', 0) < recheck_hours * 3600:
+        _resolved = pinned
+        return _resolved
+
+    downloaded = _download()
+    if downloaded:
+        _resolved = _pin(downloaded)
+    elif pinned or _pinned_if_valid(entry):
+        _resolved = entry['path'] # NOTE: Offline, the driver that worked last time is better than none.
+    elif shutil.which('chromedriver'):
+        _resolved = _pin(shutil.which('chromedriver'))
+    else:
+        raise FileNotFoundError(f"No chromedriver found. Set {DRIVER_PATH_ENV} to a chromedriver or install webdriver-manager.")
+    return _resolved
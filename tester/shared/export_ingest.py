@@ -0,0 +1,134 @@
+"""
+Clerk export ingestion straight from the downloaded bytes.
+
+Before: the Lee clerk bot ran pd.read_excel on every _ExportResults*.xlsx (openpyxl in full mode, styles and all),
+added the missing columns one by one, reindexed and kept one DataFrame per name to pd.concat at the end. Collier
+part3 renamed the export, read it into a DataFrame, mapped every cell and wrote the same file back out.
+Now: read_export() opens the workbook bytes with a read only engine (python-calamine when it is installed,
+openpyxl read_only otherwise), keeps only the wanted columns while the rows stream by and returns plain rows.
+The rows of every name go into one ColumnBuffer, which becomes a single DataFrame at the end.
+
+Values are kept JSON friendly (dates as ISO strings, empty cells as None) so the rows go to the result cache and
+the checkpoint journal as they are.
+
+NOTE: Prereq: pip install openpyxl (python-calamine optional, faster)
+
+Usage:
+    buffer = ColumnBuffer(COLUMNS)
+    columns, rows = read_export(take(path), COLUMNS, {'Search Parameter': name})
+    buffer.extend(rows)
+    buffer.to_frame().to_excel('results.xlsx', index=False)
+"""
+
+import datetime
+import io
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
+try:
+    from openpyxl import load_workbook
+except ImportError:
+    load_workbook = None
+
+
+class ExportError(ValueError):
+    """
+    The bytes are not a workbook that can be read (ex. a captured response that wasn't the export).
+    """
+
+
+def json_value(value):
+    """
+    Cell value as the cache/journal stores it: dates the way pandas' to_json(date_format='iso') writes them,
+    empty strings as None.
+    """
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(timespec='milliseconds')
+    if isinstance(value, datetime.date):
+        return datetime.datetime.combine(value, datetime.time()).isoformat(timespec='milliseconds')
+    if isinstance(value, datetime.time):
+        return value.isoformat()
+    if value == '':
+        return None
+    return value
+
+
+def _sheet_rows(data):
+    """
+    Rows (tuples of cell values) of the first sheet, header first, streamed from the bytes.
+    """
+    if CalamineWorkbook is not None:
+        workbook = CalamineWorkbook.from_filelike(io.BytesIO(data))
+        yield from workbook.get_sheet_by_index(0).to_python()
+        return
+    if load_workbook is None:
+        raise ImportError("openpyxl is needed to read the exports: pip install openpyxl")
+    workbook = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def read_export(data, columns=None, constants=None, json_values=True):
+    """
+    Rows of an exported workbook.
+    :param data: Bytes of the .xlsx file
+    :param columns: Output columns in order. A column the export doesn't have comes back as None, columns of the
+                    export not listed are dropped. None keeps the export's own columns.
+    :param constants: Columns set to the same value on every row (ex. {'Search Parameter': name})
+    :param json_values: True converts the values with json_value, False keeps the workbook's own (dates stay dates)
+    :return: Tuple (columns, rows), rows being lists of values
+    :raises ExportError: When the bytes can't be opened as a workbook
+    """
+    rows = _sheet_rows(data)
+    try:
+        first = next(rows, ())
+    except ImportError:
+        raise
+    except Exception as e:
+        raise ExportError(f"Not a readable workbook: {e}") from e
+    header = [str(cell).strip() if cell is not None else '' for cell in first]
+    columns = list(columns or header)
+    positions = {}
+    for position, name in enumerate(header):
+        positions.setdefault(name, position)  # NOTE: A repeated header keeps its first column, like pandas' reindex.
+    constants = constants or {}
+    picks = [(constants[name], None) if name in constants else (None, positions.get(name)) for name in columns]
+    convert = json_value if json_values else (lambda value: value)
+
+    projected = []
+    for row in rows:
+        if not any(cell not in (None, '') for cell in row):
+            continue # Trailing blank rows of the sheet
+        projected.append([constant if position is None else convert(row[position]) if position < len(row) else None
+                          for constant, position in picks])
+    return columns, projected
+
+
+class ColumnBuffer:
+    """
+    Rows of many names kept column by column, turned into one DataFrame at the end.
+    Columns are kept by position, so a name listed twice in `columns` (ex. the clerk's two 'DocLinks') is fine.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.data = [[] for _ in self.columns]
+
+    def extend(self, rows):
+        for row in rows:
+            for column, value in zip(self.data, row):
+                column.append(value)
+
+    def __len__(self):
+        return len(self.data[0]) if self.data else 0
+
+    def to_frame(self):
+        import pandas as pd # NOTE: Imported here, the buffer itself has no need for pandas.
+        frame = pd.DataFrame(dict(enumerate(self.data)))
+        frame.columns = self.columns
+        return frame
@@ -0,0 +1,100 @@
+"""
+Table extraction in a single WebDriver call.
+
+Before: tr.find_elements(By.XPATH, './/td') and then item.text for every cell. Every one of those is its own
+HTTP round trip to chromedriver, so a 50 row x 13 column Broward clerk page cost ~700 calls.
+Now: one execute_script serializes the whole table inside the browser and sends the rows back as JSON.
+
+Usage:
+    data = extract_table_rows(driver, ACCLAIMWEB_RESULTS)
+"""
+
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import NoSuchElementException
+
+from shared.readiness import js_locator
+
+
+# Result tables of each site
+ACCLAIMWEB_RESULTS = (By.XPATH, '//*[@id="RsltsGrid"]/div[4]/table/tbody') # Broward Clerk
+BCPA_RESULTS = (By.XPATH, '//*[@id="tbl-list-parcels"]/tbody')             # Broward Property Appraiser
+JQGRID_RESULTS = (By.CLASS_NAME, 'ui-jqgrid-btable')                       # Collier Property Appraiser
+LEEPA_RESULTS = (By.CLASS_NAME, 'resultsDataGrid')                         # Lee Property Appraiser
+
+# Shared by the scripts below: finds the root element and reads text the same way WebElement.text does
+# (hidden elements give an empty string, surrounding whitespace trimmed).
+_JS_HELPERS = """
+var locator = arguments[0];
+var root = locator.xpath
+    ? document.evaluate(locator.xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+    : document.querySelector(locator.css);
+function text(el) {
+    if (!el || !el.getClientRects().length) { return ''; }
+    return el.innerText.replace(/\\u00a0/g, ' ').trim();
+}
+function texts(parent, selector) {
+    return Array.prototype.map.call(parent.querySelectorAll(selector), text);
+}
+if (!root) { return null; }
+"""
+
+TABLE_ROWS_JS = _JS_HELPERS + """
+return Array.prototype.map.call(root.querySelectorAll('tr'), function (tr) { return texts(tr, 'td'); });
+"""
+
+# Lee appraiser cells have structure inside them (bold owner names, site address / legal divs)
+LEEPA_ROWS_JS = _JS_HELPERS + """
+var rows = [];
+root.querySelectorAll('tr').forEach(function (tr) {
+    var cols = tr.querySelectorAll('td');
+    if (!cols.length) { return; }
+    rows.push({
+        strapFolio: text(cols[0]),
+        bold: texts(cols[1], 'div[class="bold"]'),
+        owner: text(cols[1]),
+        items: texts(cols[2], '.itemAddAndLegal')
+    });
+});
+return rows;
+"""
+
+
+def extract_table_rows(driver, locator):
+    """
+    Reads every row of a table in one round trip.
+    :param driver: WebDriver instance
+    :param locator: Locator of the table or tbody (ex. BCPA_RESULTS)
+    :return: List of rows, each row a list with the text of its cells (same as [td.text for td in tr.find_elements(...)])
+    """
+    rows = driver.execute_script(TABLE_ROWS_JS, js_locator(locator))
+    if rows is None:
+        raise NoSuchElementException(f"Results table not found: {locator}")
+    return rows
+
+
+def extract_leepa_rows(driver, user_input):
+    """
+    Lee Property Appraiser version of extract_table_rows. Same columns the old WebElement walk produced.
+    :param driver: WebDriver instance
+    :param user_input: Name that was searched, goes in the first column
+    :return: List of [user_input, strap, folio, owner_names, owner_address, site_address, property_description]
+    """
+    rows = driver.execute_script(LEEPA_ROWS_JS, js_locator(LEEPA_RESULTS))
+    if rows is None:
+        raise NoSuchElementException(f"Results table not found: {LEEPA_RESULTS}")
+
+    data = []
+    for row in rows:
+        bold_text = [text.strip() for text in row['bold']]
+        owner_names = ' '.join(bold_text)
+
+        owner_address = row['owner']
+        for owner_name in bold_text:
+            owner_address = owner_address.replace(owner_name, '').strip()
+
+        strap, folio = row['strapFolio'].split('\n', 1)
+        site_address = row['items'][0]
+        property_description = row['items'][1]
+
+        data.append([user_input, strap, folio, owner_names, owner_address, site_address, property_description])
+    return data
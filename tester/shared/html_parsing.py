@@ -0,0 +1,203 @@
+"""
+Offline HTML parsing: grab driver.page_source once per page and parse it with lxml instead of walking WebElements.
+
+Parsing doesn't need the browser, so it runs on a thread pool (PageParser) while the browser already moves on to
+the next page. The raw HTML can also be kept as snapshots and parsed again later without scraping again
+(ex. after fixing a parsing bug).
+
+NOTE: Prereq: pip install lxml
+
+Usage:
+    page_parser = PageParser(snapshot_dir='./snapshots')
+    futures.append(page_parser.submit(driver.page_source, parse_leepa_results, name, name=name, page=1))
+    ...
+    rows = page_parser.gather(futures)
+"""
+
+import glob
+import os
+import re
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+
+# Typed rows
+LeepaRow = namedtuple('LeepaRow', ['name', 'strap', 'folio', 'owners', 'owners_address', 'site_address', 'property_description'])
+TaxCard = namedtuple('TaxCard', ['account', 'owners', 'addresses']) # addresses -> {label: text without the label}
+
+# Elements innerText puts on their own line
+_BLOCK_TAGS = {'address', 'article', 'br', 'dd', 'div', 'dl', 'dt', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+               'header', 'hr', 'li', 'nav', 'ol', 'p', 'section', 'table', 'tbody', 'td', 'th', 'thead', 'tr', 'ul'}
+_SKIP_TAGS = {'script', 'style', 'noscript', 'template'}
+
+
+def parse_html(html):
+    """
+    Parses a page_source string into an lxml tree.
+    """
+    if lxml is None:
+        raise ImportError("lxml is needed for the html parser: pip install lxml")
+    return lxml.html.fromstring(html)
+
+
+def by_class(element, class_name):
+    """
+    Descendants of element having class_name (same as find_elements(By.CLASS_NAME, class_name)).
+    """
+    return element.xpath(f".//*[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]")
+
+
+def inner_text(element):
+    """
+    Close to what WebElement.text / innerText returns: block elements on their own line, spaces collapsed,
+    hidden elements left out.
+    """
+    parts = []
+    _collect_text(element, parts, is_root=True)
+    lines = [re.sub(r'[ \t\r\f\v\u00a0]+', ' ', line).strip() for line in ''.join(parts).split('\n')]
+    return '\n'.join(line for line in lines if line)
+
+
+def _collect_text(element, parts, is_root=False):
+    # NOTE: The tail (text after the closing tag) belongs to the parent, so it's left out for the element itself.
+    tail = '' if is_root or not element.tail else element.tail.replace('\n', ' ')
+    tag = element.tag if isinstance(element.tag, str) else ''
+    if tag in _SKIP_TAGS or _is_hidden(element):
+        parts.append(tail)
+        return
+    block = tag in _BLOCK_TAGS
+    if block:
+        parts.append('\n')
+    if element.text:
+        parts.append(element.text.replace('\n', ' '))
+    for child in element:
+        _collect_text(child, parts)
+    if block:
+        parts.append('\n')
+    parts.append(tail)
+
+
+def _is_hidden(element):
+    style = (element.get('style') or '').replace(' ', '').lower()
+    return element.get('hidden') is not None or 'display:none' in style or 'visibility:hidden' in style
+
+
+def parse_leepa_results(html, user_input):
+    """
+    Lee Property Appraiser results table (resultsDataGrid). Same columns as extract_table_data.
+    :param html: page_source of a results page
+    :param user_input: Name that was searched
+    :return: List of LeepaRow
+    """
+    data = []
+    for table in by_class(parse_html(html), 'resultsDataGrid')[:1]:
+        for row in table.iter('tr'):
+            cols = row.xpath('.//td')
+            if not cols:
+                continue
+            bold_text = [inner_text(elem).strip() for elem in cols[1].xpath(".//div[@class='bold']")]
+            owner_names = ' '.join(bold_text)
+
+            owner_address = inner_text(cols[1])
+            for owner_name in bold_text:
+                owner_address = owner_address.replace(owner_name, '').strip()
+
+            strap, folio = inner_text(cols[0]).split('\n', 1)
+            divs = by_class(cols[2], 'itemAddAndLegal')
+            data.append(LeepaRow(user_input, strap, folio, owner_names, owner_address, inner_text(divs[0]), inner_text(divs[1])))
+    return data
+
+
+def parse_tax_cards(html, card_class='result', strip_commas=True):
+    """
+    Result cards of the *.county-taxes.com tax collector sites.
+    :param html: page_source of a results page
+    :param card_class: Class of a single card ('result' on Lee, 'content-card' on Broward/Collier)
+    :param strip_commas: Strip leading/trailing commas of the account and addresses (False on Collier, its browser path keeps them)
+    :return: List of TaxCard
+    """
+    strip = (lambda text: text.strip(',')) if strip_commas else (lambda text: text)
+    cards = []
+    for results in by_class(parse_html(html), 'category-search-results')[:1]:
+        for card in by_class(results, card_class):
+            identifier = by_class(card, 'identifier')
+            name = by_class(card, 'name')
+            addresses = {}
+            for address_element in by_class(card, 'address'):
+                labels = by_class(address_element, 'label')
+                label = inner_text(labels[0]) if labels else ''
+                addresses[label] = strip(inner_text(address_element).replace(label, '').strip())
+            account = strip(inner_text(identifier[0]).strip()).replace('Account', '') if identifier else 'NULL'
+            owners = inner_text(name[0]).strip().strip(',') if name else 'NULL'
+            cards.append(TaxCard(account, owners, addresses))
+    return cards
+
+
+def snapshot_path(snapshot_dir, user_input, page):
+    """
+    File a raw page is kept in: <snapshot_dir>/<name>__page<n>.html
+    """
+    safe_name = re.sub(r'[^A-Za-z0-9 ]', '', str(user_input)).strip()
+    return os.path.join(snapshot_dir, f"{safe_name}__page{page}.html")
+
+
+def load_snapshots(snapshot_dir, user_input):
+    """
+    Raw pages kept for a name, in page order.
+    :return: List of html strings
+    """
+    pattern = snapshot_path(snapshot_dir, user_input, '*')
+    paths = sorted(glob.glob(pattern), key=lambda path: int(re.search(r'__page(\d+)\.html$', path).group(1)))
+    htmls = []
+    for path in paths:
+        with open(path, encoding='utf-8') as file:
+            htmls.append(file.read())
+    return htmls
+
+
+class PageParser:
+    """
+    Parses pages on a thread pool so the browser doesn't wait on parsing.
+    :param snapshot_dir: If given, every submitted page is also saved there (see snapshot_path)
+    :param workers: Number of parsing threads
+    """
+
+    def __init__(self, snapshot_dir=None, workers=2):
+        self.snapshot_dir = snapshot_dir
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        if snapshot_dir:
+            os.makedirs(snapshot_dir, exist_ok=True)
+
+    def submit(self, html, parse_function, *args, name=None, page=1):
+        """
+        Queues one page for parsing and returns right away.
+        :param html: page_source of the page
+        :param parse_function: ex. parse_leepa_results, called as parse_function(html, *args)
+        :param name: Searched name, used for the snapshot file
+        :param page: Page number, used for the snapshot file
+        :return: Future whose result is the list of rows of that page
+        """
+        return self.executor.submit(self._parse, html, parse_function, args, name, page)
+
+    def _parse(self, html, parse_function, args, name, page):
+        if self.snapshot_dir and name is not None:
+            with open(snapshot_path(self.snapshot_dir, name, page), 'w', encoding='utf-8') as file:
+                file.write(html)
+        return parse_function(html, *args)
+
+    def gather(self, futures):
+        """
+        Waits for the given pages and returns all their rows in page order.
+        """
+        rows = []
+        for future in futures:
+            rows.extend(future.result())
+        return rows
+
+    def close(self):
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,168 @@
+"""
+Human like mouse movement and typing, done in the page instead of one WebDriver call per step.
+
+Before: human_like_click built a 30 point Bezier curve in a Python loop, then sent one execute_script per point to
+draw a marker, sleeping 10-50 ms in between: 30+ round trips and up to 1.5 s per click.
+Now: the curve is one vectorized NumPy expression and the whole path, with the delay before each point, goes to the
+page in a single script that animates it client side.
+
+Stealth levels (per site in SITE_STEALTH, or forced for the whole run with the script's --stealth, which reaches the
+batch runner's workers through STEALTH_ENV):
+    off  -> no path at all, the click is dispatched right away
+    draw -> the path is animated in the page but the script doesn't wait for it
+    full -> the path is animated and the call returns once the animation is done (same pace as before)
+
+Typing engines (per site in SITE_TYPING, or forced with the script's --typing, through TYPING_ENV):
+    keys    -> one send_keys per character with a sleep in between: real key events, one round trip per character
+    actions -> the characters and the pauses between them in a single W3C Actions call: still real (trusted) key
+               events from the browser, one round trip for the whole string
+    script  -> the string and its delay schedule are injected in the page, which dispatches keydown/keypress/input/
+               keyup for each character and a change at the end: one round trip, but the events are synthetic
+               (event.isTrusted is false), so only for sites that don't check
+
+Usage:
+    move_mouse(driver, (0, 0), (420, 310), stealth_level('lee_clerk'))
+    type_text(driver, element, 'SMITH JOHN', typing_engine('lee_clerk'))
+"""
+
+import os
+import time
+
+import numpy as np
+from selenium.webdriver import ActionChains
+
+
+STEALTH_ENV = 'SCRAPER_STEALTH'
+STEALTH_LEVELS = ['off', 'draw', 'full']
+
+TYPING_ENV = 'SCRAPER_TYPING'
+TYPING_ENGINES = ['keys', 'actions', 'script']
+
+# Stealth level of each site (same site keys as shared/readiness.py). Sites not listed use 'off'.
+SITE_STEALTH = {
+    'lee_clerk': 'full',  # NOTE: reCAPTCHA scores the session, keep the mouse path there.
+}
+
+# Typing engine of each site. Sites not listed use 'script'.
+SITE_TYPING = {
+    'lee_clerk': 'actions',  # NOTE: The CAPTCHA answer goes into a reCAPTCHA frame, keep real key events there.
+}
+
+# arguments[0] -> [[x, y], ...], arguments[1] -> delay in ms before each point, arguments[2] -> wait for the end
+ANIMATE_PATH_JS = """
+var points = arguments[0], delays = arguments[1], wait = arguments[2];
+var done = arguments[arguments.length - 1];
+var body = document.body;
+var index = 0;
+function step() {
+    if (index >= points.length) { if (wait) { done(true); } return; }
+    var div = document.createElement('div');
+    div.setAttribute('style', 'position: absolute; left: ' + points[index][0] + 'px; top: ' + points[index][1] +
+        'px; width: 10px; height: 10px; background-color: red; border-radius: 5px; z-index: 10000; pointer-events: none;');
+    body.appendChild(div);
+    setTimeout(function () { if (div.parentNode) { div.parentNode.removeChild(div); } }, 1000);
+    index++;
+    setTimeout(step, delays[index] || 0);
+}
+setTimeout(step, delays[0] || 0);
+if (!wait) { done(false); }
+"""
+
+# arguments[0] -> element, arguments[1] -> text, arguments[2] -> delay in ms before each character
+TYPE_TEXT_JS = """
+var element = arguments[0], text = arguments[1], delays = arguments[2];
+var done = arguments[arguments.length - 1];
+var prototype = element instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+var setter = Object.getOwnPropertyDescriptor(prototype, 'value').set;  // Frameworks watch the native setter
+var index = 0;
+element.focus();
+function key(type, character) {
+    element.dispatchEvent(new KeyboardEvent(type, {key: character, bubbles: true, cancelable: true}));
+}
+function step() {
+    if (index >= text.length) {
+        element.dispatchEvent(new Event('change', {bubbles: true}));
+        done(element.value);
+        return;
+    }
+    var character = text[index];
+    key('keydown', character);
+    key('keypress', character);
+    setter.call(element, element.value + character);
+    element.dispatchEvent(new InputEvent('input', {data: character, inputType: 'insertText', bubbles: true}));
+    key('keyup', character);
+    index++;
+    setTimeout(step, delays[index] || 0);
+}
+setTimeout(step, delays[0] || 0);
+"""
+
+
+def stealth_level(site, override=None):
+    """
+    :param site: Site key (ex. 'lee_clerk')
+    :param override: Level forced by the caller, None uses STEALTH_ENV (--stealth) and then SITE_STEALTH
+    """
+    return override or os.environ.get(STEALTH_ENV) or SITE_STEALTH.get(site, 'off')
+
+
+def typing_engine(site, override=None):
+    """
+    :param site: Site key (ex. 'lee_clerk')
+    :param override: Engine forced by the caller, None uses TYPING_ENV (--typing) and then SITE_TYPING
+    """
+    return override or os.environ.get(TYPING_ENV) or SITE_TYPING.get(site, 'script')
+
+
+def bezier_path(start, end, num_of_points=30, rng=np.random):
+    """
+    Cubic Bezier curve from start to end with two random control points inside their bounding box.
+    :return: Integer array of shape (num_of_points, 2)
+    """
+    start, end = np.asarray(start, dtype=float), np.asarray(end, dtype=float)
+    low, high = np.minimum(start, end), np.maximum(start, end) + 1
+    ctrl_1, ctrl_2 = rng.uniform(low, high), rng.uniform(low, high)
+    t = np.linspace(0, 1, num_of_points)[:, None]
+    curve = (1 - t) ** 3 * start + 3 * (1 - t) ** 2 * t * ctrl_1 + 3 * (1 - t) * t ** 2 * ctrl_2 + t ** 3 * end
+    return curve.astype(int)
+
+
+def path_delays(num_of_points, minimum=0.01, maximum=0.05, rng=np.random):
+    """
+    Random delay before each point, in milliseconds.
+    """
+    return (rng.uniform(minimum, maximum, num_of_points) * 1000).astype(int)
+
+
+def move_mouse(driver, start, end, level='full', num_of_points=30):
+    """
+    Shows the mouse travelling from start to end, in one WebDriver call.
+    :param level: Stealth level, see the module docstring
+    """
+    if level == 'off':
+        return
+    points = bezier_path(start, end, num_of_points)
+    delays = path_delays(num_of_points)
+    driver.execute_async_script(ANIMATE_PATH_JS, points.tolist(), delays.tolist(), level == 'full')
+
+
+def type_text(driver, element, text, engine='script', minimum=0.05, maximum=0.2):
+    """
+    Types text into an element with a random delay between keystrokes.
+    :param engine: Typing engine, see the module docstring
+    :param minimum: Minimum delay between keystrokes in seconds
+    :param maximum: Maximum delay between keystrokes in seconds
+    """
+    text = str(text)
+    delays = path_delays(len(text), minimum, maximum)
+    if engine == 'keys':
+        for character, delay in zip(text, delays):
+            element.send_keys(character)
+            time.sleep(delay / 1000)
+    elif engine == 'actions':
+        actions = ActionChains(driver).click(element)
+        for character, delay in zip(text, delays):
+            actions.send_keys(character).pause(delay / 1000)
+        actions.perform()
+    else:
+        driver.execute_async_script(TYPE_TEXT_JS, element, text, delays.tolist())
@@ -0,0 +1,259 @@
+"""
+Network capture: read the records out of the JSON the page downloads instead of out of the table it renders.
+
+BCPA (Angular) gets its result list from a JSON POST (search.aspx/GetData) and only then draws the table that
+extract_data reads, page by page behind btnNextRecords. With capture on, Chrome's performance log records the
+Network events of the page (CDP), the GetData response body is read with Network.getResponseBody and parsed
+straight into rows. When the response says there are more records than it holds, the same request is sent again
+from the page (same cookies) asking for every record at once, so no 'next' click is needed. Anything unexpected
+(response not seen, unknown shape) returns None and the script carries on with the DOM like before.
+
+Collier clerk (Blazor Server): the grid comes over the SignalR websocket as binary render batches, not as records,
+so there is nothing to parse there. What capture does give it is the 'Export to Excel' workbook: when the export
+comes back as an HTTP response its bytes are taken from the network log, so the script doesn't have to wait for the
+file to land in the download folder. Only a response whose url matches and whose mime type is a spreadsheet one is
+taken. If the workbook doesn't show up as a response (ex. streamed over the websocket into a blob) export_bytes
+returns None and the script falls back to the downloaded file.
+
+Usage:
+    options = capture_options(options)                  # Before the driver starts
+    driver = webdriver.Chrome(service=service, options=options)
+    capture = NetworkCapture(driver)
+    capture.clear()
+    ... search ...
+    rows = capture_records(capture, 'bcpa')             # None -> use the DOM
+"""
+
+import base64
+import json
+import time
+
+
+# Per site capture settings
+# url       -> part of the url of the response that holds the records
+# columns   -> output column -> keys of a record joined with a space (first match, case insensitive)
+# page_keys -> keys of the request body for the page number and the page size, used to ask for every record at once
+CAPTURES = {
+    'bcpa': {
+        'url': 'GetData',
+        'columns': {
+            'Folio': ['folioNumber'],
+            'Name': ['ownerName1', 'ownerName2'],
+            'Address': ['siteAddress1', 'siteAddress2'],
+        },
+        'page_keys': ('pageNumber', 'pageCount'),
+    },
+    'collier_clerk': {
+        'url': 'xlsx',
+    },
+}
+
+EXPORT_MIME_TYPES = ('spreadsheetml', 'ms-excel')
+
+# arguments[0] -> url, arguments[1] -> JSON body. Sent from the page so the site's cookies go with it.
+REPLAY_JS = """
+var done = arguments[arguments.length - 1];
+fetch(arguments[0], {method: 'POST', credentials: 'include',
+                     headers: {'Content-Type': 'application/json; charset=utf-8'}, body: arguments[1]})
+    .then(function (response) { return response.text(); })
+    .then(function (text) { done(text); }, function () { done(null); });
+"""
+
+
+def capture_options(options):
+    """
+    Turns on Chrome's performance log (the CDP Network events) on a ChromeOptions.
+    :return: The same options
+    """
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return options
+
+
+class NetworkCapture:
+    """
+    Responses seen by a driver started with capture_options.
+    NOTE: get_log empties Chrome's buffer, so every event is kept here until clear().
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.requests = {}   # requestId -> {'url', 'method', 'post_data'}
+        self.responses = {}  # requestId -> {'url', 'status', 'mime_type', 'finished'}
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.network_capture = self
+
+    def poll(self):
+        """
+        Moves the new events from Chrome's performance log into requests/responses.
+        """
+        for entry in self.driver.get_log('performance'):
+            message = json.loads(entry['message'])['message']
+            method, params = message.get('method'), message.get('params', {})
+            if method == 'Network.requestWillBeSent':
+                request = params['request']
+                self.requests[params['requestId']] = {'url': request['url'], 'method': request['method'],
+                                                      'post_data': request.get('postData')}
+            elif method == 'Network.responseReceived':
+                response = params['response']
+                self.responses[params['requestId']] = {'url': response['url'], 'status': response['status'],
+                                                       'mime_type': response.get('mimeType', ''), 'finished': False}
+            elif method == 'Network.loadingFinished' and params['requestId'] in self.responses:
+                self.responses[params['requestId']]['finished'] = True
+
+    def clear(self):
+        """
+        Forgets everything seen so far. Call right before the search whose responses you want.
+        """
+        self.poll()
+        self.requests.clear()
+        self.responses.clear()
+
+    def wait_for_response(self, url_part, timeout=30, mime_types=None):
+        """
+        Waits for a finished response whose url contains url_part and, when mime_types is given, whose mime type
+        contains one of them.
+        :return: requestId, None on timeout
+        """
+        end = time.time() + timeout
+        while True:
+            self.poll()
+            for request_id, response in self.responses.items():
+                matches = url_part.lower() in response['url'].lower() and \
+                    (not mime_types or any(mime in response['mime_type'] for mime in mime_types))
+                if matches and response['finished'] and response['status'] < 400:
+                    return request_id
+            if time.time() > end:
+                return None
+            time.sleep(0.1)
+
+    def body(self, request_id):
+        """
+        :return: Bytes of the response body, None if Chrome no longer has it
+        """
+        try:
+            result = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+        except Exception:
+            return None
+        if result.get('base64Encoded'):
+            return base64.b64decode(result['body'])
+        return result['body'].encode('utf-8')
+
+    def json(self, request_id):
+        data = self.body(request_id)
+        if data is None:
+            return None
+        try:
+            return json.loads(data)
+        except ValueError:
+            return None
+
+    def replay(self, request_id, post_data):
+        """
+        Sends a captured POST again from the page with a new body.
+        :return: Parsed JSON answer, None if it failed
+        """
+        text = self.driver.execute_async_script(REPLAY_JS, self.requests[request_id]['url'], json.dumps(post_data))
+        try:
+            return json.loads(text) if text else None
+        except ValueError:
+            return None
+
+
+def _records(data):
+    """
+    First list of objects in a JSON document (ASP.NET wraps it in 'd', backing fields and such).
+    """
+    if isinstance(data, list):
+        if data and all(isinstance(item, dict) for item in data):
+            return data
+        items = data
+    elif isinstance(data, dict):
+        items = data.values()
+    else:
+        return None
+    for item in items:
+        found = _records(item)
+        if found is not None:
+            return found
+    return None
+
+
+def _total(data):
+    """
+    Total record count of the search when the response has one (a key containing 'totalcount'), else None.
+    """
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if 'totalcount' in key.lower() and str(value).isdigit():
+                return int(value)
+            found = _total(value)
+            if found is not None:
+                return found
+    return None
+
+
+def _rows(records, columns):
+    """
+    :return: One list per record with the columns in order, None if a column matches no key of the records
+    """
+    if not records:
+        return []
+    keys = {key.lower(): key for key in records[0]}
+    mapping = []
+    for fields in columns.values():
+        present = [keys[field.lower()] for field in fields if field.lower() in keys]
+        if not present:
+            return None
+        mapping.append(present)
+    return [[' '.join(str(record[key]).strip() for key in present if record.get(key) not in (None, '')).strip()
+             for present in mapping] for record in records]
+
+
+def capture_records(capture, site, timeout=30):
+    """
+    Rows of a search read from the site's JSON response (see CAPTURES), every page at once when possible.
+    :return: List of rows (empty when the search found nothing), None when the DOM has to be used instead
+    """
+    settings = CAPTURES[site]
+    request_id = capture.wait_for_response(settings['url'], timeout)
+    if request_id is None:
+        return None
+    data = capture.json(request_id)
+    records = _records(data)
+    if records is None:
+        return [] if data is not None and _total(data) == 0 else None
+    total = _total(data)
+    if total is not None and total > len(records):
+        records = _all_pages(capture, request_id, settings, total)
+        if records is None:
+            return None
+    return _rows(records, settings['columns'])
+
+
+def _all_pages(capture, request_id, settings, total):
+    """
+    Asks for page 1 with a page size of `total`. None when the request can't be rewritten or the answer falls short.
+    """
+    try:
+        post_data = json.loads(capture.requests[request_id]['post_data'] or '')
+    except (KeyError, ValueError):
+        return None
+    page_key, size_key = settings['page_keys']
+    if not isinstance(post_data, dict) or page_key not in post_data or size_key not in post_data:
+        return None
+    post_data.update({page_key: 1, size_key: total})
+    records = _records(capture.replay(request_id, post_data))
+    if records is None or len(records) < total:
+        return None
+    return records
+
+
+def export_bytes(capture, site, timeout=30):
+    """
+    Bytes of an export file (ex. the Collier clerk workbook) taken from its HTTP response.
+    :return: Bytes, None when the file didn't come over HTTP (use the download folder then)
+    """
+    request_id = capture.wait_for_response(CAPTURES[site]['url'], timeout, EXPORT_MIME_TYPES)
+    if request_id is None:
+        return None
+    return capture.body(request_id)
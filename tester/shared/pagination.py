@@ -0,0 +1,196 @@
+"""
+Pagination by page number instead of by 'next' click.
+
+Before: navigate_to_next_page found the <li> whose text is current_page + 1, clicked it, waited, extracted, and
+did it again, so a 30 page surname was 30 page loads one after another.
+Now: the page numbers are read from the pager of the first results page, the url of every page is derived from
+its number (county-taxes.com takes ?page=N) and the pages are fetched at the same time:
+    crawl_pages -> over HTTP (shared/tax_http.py), on a thread pool
+    crawl_tabs  -> in the browser, a batch of tabs opened at once (window.open) that load in parallel and are read
+                   one after the other
+Pagers that only show a window of page numbers (1 2 3 4 5 ... ) are handled by going in waves: the pagers of the
+pages just fetched add the numbers that come next, until no new number shows up.
+
+Every request to a host goes through host_slot(), a semaphore per host (HOST_LIMITS), so pages of several names
+fetched at the same time never put more than the cap of requests in flight on one site.
+
+Grids that can only be paged with their 'next' button (BCPA, AcclaimWeb, the Collier appraiser jqGrid) are walked with
+pager_state(): one script reads the site's own pager (PAGERS) and says whether there is a next page and, when the
+pager shows it, the total record / page count. The loop stops on the last page instead of clicking 'next' once more
+and comparing a duplicate page with the previous one.
+
+Usage:
+    pages = crawl_pages(lambda page: fetch_page(name, page), lambda result: page_numbers(result[1]))
+
+    rows = crawl_tabs(driver, lambda page: search_url('lee', name, page), extract, tax_pager_numbers, 'county_taxes')
+    # A tab that fails raises CrawlIncomplete, whose .pages are the pages read before it
+
+    state = pager_state(driver, 'acclaimweb')   # {'has_next': True, 'total': 124, 'pages': 3}
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+
+# Requests in flight at once per site (registered domain). Sites not listed use DEFAULT_HOST_LIMIT.
+HOST_LIMITS = {
+    'county-taxes.com': 8,  # NOTE: Shared by Lee, Collier and Broward, same as the 8 names search_many runs at once.
+}
+DEFAULT_HOST_LIMIT = 4
+MAX_TABS = 4  # Tabs a browser loads at once
+
+# Page numbers offered by the pager of a county-taxes.com results page
+TAX_PAGER_JS = """
+return Array.prototype.map.call(document.querySelectorAll("nav[aria-label='Pagination'] li"), function (li) {
+    return li.innerText.trim();
+}).filter(function (text) { return /^\\d+$/.test(text); }).map(Number);
+"""
+
+# Pager of each site (same site keys as shared/readiness.py)
+# next     -> css selector of the 'next' button. Missing, disabled or carrying `disabled` in its class means last page.
+# disabled -> class the site puts on the button of the last page
+# status   -> element whose text ends in '[of] <total records>' (None when the site shows no count)
+# pages    -> element whose text ends in '[of] <page count>' (None when the site shows no count)
+PAGERS = {
+    'bcpa': {'next': '#btnNextRecords', 'disabled': 'disabled', 'status': None, 'pages': None},
+    'acclaimweb': {'next': '#RsltsGrid > div:nth-of-type(2) > div:nth-of-type(2) > a:nth-of-type(3)',
+                   'disabled': 't-state-disabled', 'status': '#RsltsGrid .t-status-text', 'pages': '#RsltsGrid .t-page-i-of-n'},
+    'collier_appraiser': {'next': '#next_pager', 'disabled': 'ui-state-disabled', 'status': '.ui-paging-info',
+                          'pages': '#sp_1_pager'},
+}
+
+PAGER_STATE_JS = """
+var pager = arguments[0];
+function count(selector) {
+    var element = selector && document.querySelector(selector);
+    var match = element && element.textContent.replace(/,/g, '').match(/(?:of\\s+)?(\\d+)\\s*$/);
+    return match ? parseInt(match[1], 10) : null;
+}
+var next = document.querySelector(pager.next);
+var disabled = !next || next.disabled || next.hasAttribute('disabled') || next.classList.contains(pager.disabled) ||
+    next.getAttribute('aria-disabled') === 'true';
+return {has_next: !disabled, total: count(pager.status), pages: count(pager.pages)};
+"""
+
+# arguments[0] -> [[page, url], ...]. The page number goes in window.name, it survives the navigation.
+OPEN_TABS_JS = """
+arguments[0].forEach(function (page) { window.open(page[1], 'page_' + page[0]); });
+"""
+
+class CrawlIncomplete(RuntimeError):
+    """
+    A page of a crawl could not be read. `pages` holds the results read before it, in page order, so the caller
+    can keep them (and must not count the search as done).
+    """
+
+    def __init__(self, pages, error):
+        super().__init__(f"Pagination stopped after {len(pages)} page(s): {error}")
+        self.pages = pages
+        self.error = error
+
+
+_slots = {}
+_slots_lock = threading.Lock()
+
+
+def host_key(url):
+    """
+    Registered domain of a url (lee.county-taxes.com -> county-taxes.com), the unit the cap applies to.
+    """
+    host = urlparse(url).hostname or ''
+    if host.replace('.', '').isdigit():
+        return host # An ip address (ex. the benchmark's mock server)
+    return '.'.join(host.split('.')[-2:])
+
+
+def host_slot(url):
+    """
+    Semaphore of the url's host. Use as `with host_slot(url): ...` around the request.
+    """
+    key = host_key(url)
+    with _slots_lock:
+        if key not in _slots:
+            _slots[key] = threading.BoundedSemaphore(HOST_LIMITS.get(key, DEFAULT_HOST_LIMIT))
+        return _slots[key]
+
+
+def crawl_pages(fetch, page_numbers_of, first=None, workers=4):
+    """
+    Fetches every page of a search, the pages of each wave at the same time.
+    :param fetch: Function page number -> result of that page (ex. TaxSearchClient.fetch_page for a name)
+    :param page_numbers_of: Function result -> page numbers its pager offers
+    :param first: Result of page 1 when it was already fetched
+    :param workers: Pages of one search in flight at once (the host cap still applies on top)
+    :return: List of results, in page order
+    """
+    results = {1: first if first is not None else fetch(1)}
+    known = set(page_numbers_of(results[1])) | {1}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            pending = sorted(known - results.keys())
+            if not pending:
+                break
+            for page, result in zip(pending, executor.map(fetch, pending)):
+                results[page] = result
+                known |= set(page_numbers_of(result))
+    return [results[page] for page in sorted(results)]
+
+
+def tax_pager_numbers(driver):
+    """
+    Page numbers in the pager of the county-taxes.com page the driver is on.
+    """
+    return set(driver.execute_script(TAX_PAGER_JS) or [])
+
+
+def crawl_tabs(driver, url_of, extract, page_numbers, site=None, max_tabs=MAX_TABS):
+    """
+    Reads every page of a search in the browser. Page 1 must be the page the driver is on.
+    :param url_of: Function page number -> url of that page
+    :param extract: Function (driver, page number) -> result of the page the driver is on
+    :param page_numbers: Function driver -> page numbers offered by the pager of the current page
+    :param site: Readiness profile each tab is waited on with (shared/readiness.py), None to not wait
+    :param max_tabs: Tabs opened at once
+    :return: List of results, in page order
+    :raises CrawlIncomplete: When a page fails, with the pages read so far
+    """
+    from shared.readiness import wait_until_ready # NOTE: Imported here, the http backend uses this module without selenium.
+    main = driver.current_window_handle
+    results = {1: extract(driver, 1)}
+    try:
+        known = set(page_numbers(driver)) | {1}
+        while True:
+            pending = sorted(known - results.keys())[:max_tabs]
+            if not pending:
+                break
+            before = set(driver.window_handles)
+            driver.execute_script(OPEN_TABS_JS, [[page, url_of(page)] for page in pending])
+            tabs = [handle for handle in driver.window_handles if handle not in before]
+            try:
+                for handle in tabs:
+                    driver.switch_to.window(handle)
+                    if site:
+                        wait_until_ready(driver, site)
+                    page = int(driver.execute_script('return window.name').split('_')[-1])
+                    results[page] = extract(driver, page)
+                    known |= set(page_numbers(driver))
+            finally:
+                for handle in tabs:
+                    driver.switch_to.window(handle)
+                    driver.close()
+                driver.switch_to.window(main)
+            if not set(pending) <= results.keys():
+                raise RuntimeError(f"Pages {sorted(set(pending) - results.keys())} did not open in a tab")
+    except Exception as e:
+        raise CrawlIncomplete([results[page] for page in sorted(results)], e) from e
+    return [results[page] for page in sorted(results)]
+
+
+def pager_state(driver, site):
+    """
+    Reads the pager of the results grid the driver is on, in one call.
+    :param site: Key of PAGERS (ex. 'acclaimweb')
+    :return: Dictionary {'has_next': bool, 'total': records or None, 'pages': page count or None}
+    """
+    return driver.execute_script(PAGER_STATE_JS, PAGERS[site])
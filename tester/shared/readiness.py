@@ -0,0 +1,159 @@
+"""
+Page readiness: wait on what the page is actually doing instead of a fixed time.sleep().
+
+Signals (all checked inside the browser in a single execute_async_script call):
+    1. Network idle  -> no fetch/XHR in flight for `idle_ms`. The request counter is injected on every new
+                        document through CDP (Page.addScriptToEvaluateOnNewDocument), see install_network_tracker.
+    2. DOM quiet     -> no DOM mutation (MutationObserver) for `quiet_ms`.
+    3. Count change  -> the number of elements matching a locator is different from the count before the click
+                        (ex. result cards/rows after a search or page switch).
+
+Each site has its own readiness profile in PROFILES, since a Blazor app and a plain ASP.NET page don't settle the same way.
+
+Usage:
+    install_network_tracker(driver) # Once, right after the driver starts
+    ...
+    next_button.click()
+    wait_until_ready(driver, 'bcpa')
+"""
+
+from selenium.webdriver.common.by import By
+
+
+# Per site readiness profiles.
+# idle_ms  -> how long the network has to be idle (0 skips the signal)
+# quiet_ms -> how long the DOM has to go without mutations (0 skips the signal)
+# timeout  -> maximum seconds to wait before giving up and letting the script carry on
+PROFILES = {
+    'bcpa': {'idle_ms': 500, 'quiet_ms': 500, 'timeout': 30},               # Broward Property Appraiser (Angular app)
+    'acclaimweb': {'idle_ms': 300, 'quiet_ms': 300, 'timeout': 30},         # Broward Clerk (Telerik grid loaded by ajax)
+    'county_taxes': {'idle_ms': 500, 'quiet_ms': 400, 'timeout': 30},       # Tax collectors on *.county-taxes.com
+    'collier_appraiser': {'idle_ms': 250, 'quiet_ms': 250, 'timeout': 20},  # Collier Appraiser (frames, classic pages)
+    'collier_clerk': {'idle_ms': 0, 'quiet_ms': 1500, 'timeout': 60},       # Collier Clerk (Blazor, data comes over a websocket so no XHR to wait on)
+    'lee_clerk': {'idle_ms': 500, 'quiet_ms': 500, 'timeout': 20},          # Lee Clerk LandMarkWeb
+    'leepa': {'idle_ms': 300, 'quiet_ms': 300, 'timeout': 30},              # Lee Property Appraiser
+}
+
+# Counts fetch/XHR requests that are still in flight in window.__pendingRequests
+NETWORK_TRACKER_JS = """
+(function () {
+    if (window.__pendingRequests !== undefined) { return; }
+    window.__pendingRequests = 0;
+    var done = function () { window.__pendingRequests = Math.max(0, window.__pendingRequests - 1); };
+    if (window.fetch) {
+        var originalFetch = window.fetch;
+        window.fetch = function () {
+            window.__pendingRequests++;
+            return originalFetch.apply(this, arguments).then(
+                function (response) { done(); return response; },
+                function (error) { done(); throw error; });
+        };
+    }
+    var originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        window.__pendingRequests++;
+        this.addEventListener('loadend', done);
+        return originalSend.apply(this, arguments);
+    };
+})();
+"""
+
+READY_JS = NETWORK_TRACKER_JS + """
+var opts = arguments[0];
+var finish = arguments[arguments.length - 1];
+var start = Date.now();
+var lastMutation = start;
+var idleSince = null;
+var observer = new MutationObserver(function () { lastMutation = Date.now(); });
+observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true, characterData: true});
+
+function count() {
+    if (opts.xpath) {
+        return document.evaluate(opts.xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null).snapshotLength;
+    }
+    return document.querySelectorAll(opts.css).length;
+}
+
+function check() {
+    var now = Date.now();
+    var countOk = opts.previousCount === null || count() !== opts.previousCount;
+    if (window.__pendingRequests > 0) { idleSince = null; } else if (idleSince === null) { idleSince = now; }
+    var networkOk = !opts.idleMs || (idleSince !== null && now - idleSince >= opts.idleMs);
+    var domOk = !opts.quietMs || now - lastMutation >= opts.quietMs;
+    if ((countOk && networkOk && domOk) || now - start > opts.timeoutMs) {
+        observer.disconnect();
+        finish(countOk && networkOk && domOk);
+        return;
+    }
+    setTimeout(check, 50);
+}
+check();
+"""
+
+
+def install_network_tracker(driver):
+    """
+    Injects the fetch/XHR counter into every document the browser opens from now on.
+    Call it once right after the driver is created. Does nothing if the browser has no CDP (non Chrome).
+    :param driver: WebDriver instance
+    :return: None
+    """
+    try:
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': NETWORK_TRACKER_JS})
+    except Exception:
+        pass # NOTE: READY_JS installs the counter itself on the current page, it just misses requests started before it.
+
+
+def element_count(driver, locator):
+    """
+    Number of elements matching a locator. Used to take the 'before' count for wait_until_ready.
+    :param driver: WebDriver instance
+    :param locator: Tuple (By.XPATH / By.CSS_SELECTOR / By.ID / By.CLASS_NAME, value)
+    :return: Integer count
+    """
+    return len(driver.find_elements(*locator))
+
+
+def wait_until_ready(driver, site, locator=None, previous_count=None, **overrides):
+    """
+    Waits until the page of the given site is ready according to its profile.
+    :param driver: WebDriver instance
+    :param site: Key of PROFILES (ex. 'bcpa', 'county_taxes')
+    :param locator: Optional locator whose element count must change from previous_count
+    :param previous_count: Count of the locator before the action (see element_count)
+    :param overrides: Override idle_ms, quiet_ms or timeout of the profile for this one call
+    :return: True if the page settled, False if the timeout was reached (the caller carries on like after a sleep)
+    """
+    profile = dict(PROFILES[site], **overrides)
+    opts = {
+        'idleMs': profile['idle_ms'],
+        'quietMs': profile['quiet_ms'],
+        'timeoutMs': int(profile['timeout'] * 1000),
+        'previousCount': previous_count if locator is not None else None,
+        'xpath': None,
+        'css': None,
+    }
+    if locator is not None:
+        opts.update(js_locator(locator))
+
+    driver.set_script_timeout(profile['timeout'] + 5)
+    try:
+        return bool(driver.execute_async_script(READY_JS, opts))
+    except Exception as e:
+        # Page navigated away in the middle of the wait (ex. a form post). The new page is loaded at this point.
+        print(f"Readiness check interrupted: {e}")
+        return False
+
+
+def js_locator(locator):
+    """
+    Turns a selenium locator into something document.evaluate/querySelectorAll understands.
+    """
+    by, value = locator
+    if by == By.XPATH:
+        return {'xpath': value}
+    if by == By.ID:
+        return {'css': f"[id='{value}']"}
+    if by == By.CLASS_NAME:
+        return {'css': '.' + value.replace(' ', '.')}
+    return {'css': value} # By.CSS_SELECTOR and By.TAG_NAME are already valid css
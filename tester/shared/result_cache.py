@@ -0,0 +1,110 @@
+"""
+Persistent cache of search results, so re-running the same watch list doesn't scrape every name again.
+
+Key:   (county, record source, normalized name, match type)   ex. ('lee', 'clerk', 'SMITH JOHN', 'Starts With')
+Value: the extracted rows (json) with the time they were fetched.
+
+A name found in the cache never touches the browser. A search with no match (validate returning False) is cached
+too, with a shorter TTL since a new record for that name can show up any day. Errors are never cached.
+
+Stored in a SQLite file, so several worker processes of the batch runner can share it.
+
+Usage:
+    cache = ResultCache('./result_cache.sqlite')
+    rows = cache.get('lee', 'tax_collector', name)
+    if rows is None:
+        rows = webscrape(driver, name)
+        cache.put('lee', 'tax_collector', name, rows)
+    cache.close()
+"""
+
+import json
+import re
+import sqlite3
+import time
+
+
+DEFAULT_PATH = './result_cache.sqlite'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    county TEXT NOT NULL,
+    source TEXT NOT NULL,
+    name TEXT NOT NULL,
+    match_type TEXT NOT NULL,
+    rows TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (county, source, name, match_type)
+);
+CREATE INDEX IF NOT EXISTS results_fetched_at ON results (fetched_at);
+"""
+
+
+def normalize_name(name):
+    """
+    Case and repeated spaces don't change the search, so 'smith  john' and 'SMITH JOHN' share an entry.
+    NOTE: A trailing space is kept, the county-taxes sites return different results for "Smith John ".
+    """
+    return re.sub(r'\s+', ' ', str(name)).upper().lstrip()
+
+
+class ResultCache:
+    """
+    :param path: SQLite file of the cache (created if missing)
+    :param ttl_hours: How long rows of a name with results stay valid
+    :param empty_ttl_hours: How long a 'no match' stays valid
+    :param max_entries: Oldest entries are evicted past this number
+    """
+
+    def __init__(self, path=DEFAULT_PATH, ttl_hours=24 * 7, empty_ttl_hours=24, max_entries=100000):
+        self.ttl = ttl_hours * 3600
+        self.empty_ttl = empty_ttl_hours * 3600
+        self.max_entries = max_entries
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute('PRAGMA journal_mode=WAL') # NOTE: Readers don't block the worker that is writing.
+        self.connection.executescript(_SCHEMA)
+
+    def get(self, county, source, name, match_type=''):
+        """
+        :return: Cached rows (an empty list is a cached 'no match'), or None when the name has to be scraped
+        """
+        row = self.connection.execute(
+            'SELECT rows FROM results WHERE county=? AND source=? AND name=? AND match_type=? AND expires_at > ?',
+            (county, source, normalize_name(name), match_type, time.time())).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def put(self, county, source, name, rows, match_type=''):
+        """
+        Stores the rows of a finished search. Rows must be json serializable (lists, tuples, strings, numbers, None).
+        """
+        now = time.time()
+        ttl = self.ttl if rows else self.empty_ttl
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (county, source, normalize_name(name), match_type, json.dumps(list(rows)), now, now + ttl))
+            self.connection.execute('DELETE FROM results WHERE expires_at <= ?', (now,))
+            self.connection.execute(
+                'DELETE FROM results WHERE rowid IN (SELECT rowid FROM results ORDER BY fetched_at DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,))
+
+    def split_shard(self, shard, county, source, match_type=''):
+        """
+        Splits a batch runner shard into names already cached and names that still need the browser.
+        :param shard: List of (index, name) tuples
+        :return: Tuple (hits, misses). hits -> list of (index, name, rows), misses -> list of (index, name)
+        """
+        hits, misses = [], []
+        for index, name in shard:
+            rows = self.get(county, source, name, match_type)
+            if rows is None:
+                misses.append((index, name))
+            else:
+                hits.append((index, name, rows))
+        return hits, misses
+
+    def close(self):
+        self.connection.close()
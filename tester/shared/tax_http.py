@@ -0,0 +1,165 @@
+"""
+Direct HTTP backend for the *.county-taxes.com tax collector sites (Lee, Collier, Broward).
+
+Before: every name opened the search page in Chrome, typed into the 'Enter a name' box and clicked through the
+pagination <li>s.
+Now: the search and every page are plain GET requests (search_query / page in the url) over a pooled keep-alive
+requests.Session, and the result cards are parsed with lxml (parse_tax_cards). No browser is involved, so many
+names can be searched at the same time. The pages of a name are fetched at the same time too once page 1 tells how
+many there are (shared/pagination.py), within the per host cap.
+
+If a response doesn't look like a search result (bot check, page only rendered by JS, error status) the client
+raises RequiresBrowser and the script falls back to its Selenium path for that name.
+
+NOTE: Prereq: pip install requests lxml
+
+Usage:
+    client = TaxSearchClient('lee')
+    try:
+        rows = client.search('Smith John', parse_card_page)
+    except RequiresBrowser:
+        rows = webscrape(driver, 'Smith John')
+    client.close()
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, urlunparse, urlencode
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+except ImportError:
+    requests = None
+
+from shared.html_parsing import parse_html, by_class
+from shared.pagination import crawl_pages, host_slot
+from shared.tracing import traced
+
+
+SEARCH_PATH = '/public/search/property_tax'
+NO_RESULTS_TEXT = 'No bills or accounts matched your search.'
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+
+class RequiresBrowser(Exception):
+    """
+    The site answered with something only a real browser can deal with. Use the Selenium path for this name.
+    """
+
+
+def search_url(county, name, page=1):
+    """
+    Url of one page of results.
+    :param county: Subdomain of county-taxes.com (ex. 'lee', 'collier', 'broward')
+    :param name: Name to search
+    :param page: Page number, starting at 1
+    :return: Url string
+    """
+    query = {'search_query': name}
+    if page > 1:
+        query['page'] = page
+    return urlunparse(('https', f"{county}.county-taxes.com", SEARCH_PATH, '', urlencode(query), ''))
+
+
+def page_numbers(tree):
+    """
+    Page numbers offered in the pagination nav of a results page.
+    """
+    numbers = set()
+    for item in tree.xpath("//nav[@aria-label='Pagination']//li"):
+        text = item.text_content().strip()
+        if text.isdigit():
+            numbers.add(int(text))
+    return numbers
+
+
+class TaxSearchClient:
+    """
+    Searches one county-taxes.com site over HTTP.
+    :param county: Subdomain of county-taxes.com (ex. 'lee')
+    :param pool_size: Keep-alive connections kept open to the site (match it to the number of search threads)
+    :param timeout: Seconds per request
+    """
+
+    def __init__(self, county, pool_size=10, timeout=30):
+        if requests is None:
+            raise ImportError("requests is needed for the http backend: pip install requests")
+        self.county = county
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 504], allowed_methods=['GET'])
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retries)
+        self.session.mount('https://', adapter)
+
+    @traced('http_fetch')
+    def fetch_page(self, name, page=1):
+        """
+        Downloads one page of results.
+        :return: Tuple (html, tree)
+        """
+        url = search_url(self.county, name, page)
+        try:
+            with host_slot(url):
+                response = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise RequiresBrowser(f"Request failed for {url}: {e}")
+        if response.status_code != 200:
+            raise RequiresBrowser(f"Status {response.status_code} for {url}")
+        if urlparse(response.url).path != SEARCH_PATH:
+            raise RequiresBrowser(f"Redirected away from the search to {response.url}")
+        return response.text, parse_html(response.text)
+
+    def search(self, name, parse_page, page_workers=4):
+        """
+        Runs a search and fetches every page of results.
+        :param name: Name to search
+        :param parse_page: Function turning the html of one results page into rows (ex. parse_card_page of the script)
+        :param page_workers: Pages of the name fetched at the same time
+        :return: List of rows of every page. Empty list if the site has no match.
+        """
+        def results_page(page, result=None):
+            html, tree = result or self.fetch_page(name, page)
+            if not by_class(tree, 'category-search-results'):
+                # NOTE: Neither results nor the 'no match' message: the page is built by JS or it is a bot check.
+                raise RequiresBrowser(f"No search results in the html of page {page} for {name}")
+            return html, tree
+
+        first = self.fetch_page(name)
+        if not by_class(first[1], 'category-search-results') and NO_RESULTS_TEXT in first[1].text_content():
+            return []
+        pages = crawl_pages(results_page, lambda result: page_numbers(result[1]), results_page(1, first), page_workers)
+        rows = []
+        for html, _ in pages:
+            rows.extend(parse_page(html))
+        return rows
+
+    def search_many(self, names, parse_page, workers=8):
+        """
+        Searches several names at the same time over the pooled connections.
+        :param names: List of names
+        :param parse_page: Same as search
+        :param workers: Number of names in flight at once
+        :return: List in the same order as names. Each item is the rows of that name, or the RequiresBrowser
+                 exception when that name needs the Selenium path.
+        """
+        def search_one(name):
+            try:
+                return self.search(name, parse_page)
+            except RequiresBrowser as e:
+                return e
+            except ImportError as e:
+                return RequiresBrowser(f"Http backend not installed ({e})") # NOTE: ex. lxml missing, the browser can still do it.
+            except Exception as e:
+                return RequiresBrowser(f"Could not parse the results for {name}: {e!r}")
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(search_one, names))
+
+    def close(self):
+        self.session.close()
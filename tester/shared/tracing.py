@@ -0,0 +1,222 @@
+"""
+Per-phase timing of a scraper run.
+
+The phases every script has (driver start, navigate, search, validate, extract, next page, excel write) are wrapped
+with @traced('<phase>'). While tracing is on, each call is recorded as a span with its wall time and the number of
+WebDriver commands it sent (every find_element, .text, click, execute_script... is one command to chromedriver).
+With that it is easy to tell if a run is dominated by sleeps/page loads (long spans, few commands) or by cell by
+cell extraction (many commands).
+
+Tracing is off unless the script is started with --trace <folder>; then @traced is just a function call.
+The folder is passed to the batch runner's worker processes through the TRACE_DIR_ENV environment variable and
+each process appends its spans to <folder>/trace_<pid>.jsonl. At the end of the run finish_tracing() merges them
+into <folder>/trace.json and prints a summary table per phase.
+
+Usage:
+    @traced('extract')
+    def extract_data(driver): ...
+
+    start_tracing(args.trace)          # in main(), does nothing if args.trace is None
+    with span('excel_write'):
+        df.to_excel(...)
+    finish_tracing()
+"""
+
+import functools
+import glob
+import json
+import os
+import threading
+import time
+
+
+TRACE_DIR_ENV = 'SCRAPER_TRACE_DIR'
+
+_local = threading.local()
+_write_lock = threading.Lock()
+_file = None
+
+
+def trace_dir():
+    """
+    :return: Folder of the current trace, None when tracing is off
+    """
+    return os.environ.get(TRACE_DIR_ENV) or None
+
+
+def start_tracing(directory):
+    """
+    Turns tracing on for this process and the worker processes it starts. Traces of a previous run are removed.
+    :param directory: Folder of the trace, None leaves tracing off
+    """
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, 'trace_*.jsonl')):
+        os.remove(path)
+    os.environ[TRACE_DIR_ENV] = os.path.abspath(directory)
+
+
+def _command_count():
+    return getattr(_local, 'commands', 0)
+
+
+def instrument_driver(driver):
+    """
+    Counts the WebDriver commands sent by a driver. Every command (elements included) goes through driver.execute.
+    Safe to call more than once on the same driver.
+    :return: The same driver
+    """
+    if getattr(driver, '_traced_execute', False):
+        return driver
+    execute = driver.execute
+
+    def counted_execute(driver_command, params=None):
+        _local.commands = _command_count() + 1
+        return execute(driver_command, params)
+
+    driver.execute = counted_execute
+    driver._traced_execute = True
+    return driver
+
+
+def _is_driver(value):
+    return hasattr(value, 'execute') and hasattr(value, 'session_id')
+
+
+def _record(entry):
+    global _file
+    with _write_lock:
+        if _file is None:
+            _file = open(os.path.join(trace_dir(), f"trace_{os.getpid()}.jsonl"), 'a', encoding='utf-8')
+        _file.write(json.dumps(entry) + '\n')
+        _file.flush()
+
+
+class span:
+    """
+    Times a block as one span of the given phase. Does nothing when tracing is off.
+    :param phase: Name of the phase (ex. 'navigate')
+    :param fields: Extra json serializable values kept with the span (ex. name='Smith John')
+    """
+
+    def __init__(self, phase, **fields):
+        self.phase = phase
+        self.fields = fields
+        self.enabled = trace_dir() is not None
+
+    def __enter__(self):
+        if self.enabled:
+            stack = getattr(_local, 'stack', None)
+            if stack is None:
+                stack = _local.stack = []
+            self.parent = stack[-1] if stack else None
+            stack.append(self.phase)
+            self.start = time.time()
+            self.start_counter = time.perf_counter()
+            self.start_commands = _command_count()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.enabled:
+            _local.stack.pop()
+            entry = {
+                'phase': self.phase,
+                'parent': self.parent,
+                'start': self.start,
+                'seconds': time.perf_counter() - self.start_counter,
+                'commands': _command_count() - self.start_commands,
+                'pid': os.getpid(),
+                'thread': threading.get_ident(),
+                'error': exc_type.__name__ if exc_type else None,
+            }
+            entry.update(self.fields)
+            _record(entry)
+        return False
+
+
+def traced(phase):
+    """
+    Decorator recording every call of the function as a span of the phase.
+    A driver passed as first argument, or returned (driver start), is instrumented so its commands are counted.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if trace_dir() is None:
+                return function(*args, **kwargs)
+            if args and _is_driver(args[0]):
+                instrument_driver(args[0])
+            with span(phase):
+                result = function(*args, **kwargs)
+            if _is_driver(result):
+                instrument_driver(result)
+            return result
+        return wrapper
+    return decorator
+
+
+def load_trace(directory):
+    """
+    :return: List of every span written by every process of the run, in start order
+    """
+    spans = []
+    for path in glob.glob(os.path.join(directory, 'trace_*.jsonl')):
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    spans.append(json.loads(line))
+                except ValueError:
+                    continue # NOTE: Last line of a worker that died while writing it.
+    return sorted(spans, key=lambda entry: entry['start'])
+
+
+def summarize(spans):
+    """
+    :return: List of dictionaries (one per phase) with calls, total/mean/max seconds and WebDriver commands,
+             slowest phase first
+    """
+    phases = {}
+    for entry in spans:
+        phase = phases.setdefault(entry['phase'], {'phase': entry['phase'], 'calls': 0, 'seconds': 0.0, 'max': 0.0, 'commands': 0, 'errors': 0})
+        phase['calls'] += 1
+        phase['seconds'] += entry['seconds']
+        phase['max'] = max(phase['max'], entry['seconds'])
+        phase['commands'] += entry['commands']
+        phase['errors'] += 1 if entry['error'] else 0
+    for phase in phases.values():
+        phase['mean'] = phase['seconds'] / phase['calls']
+    return sorted(phases.values(), key=lambda phase: phase['seconds'], reverse=True)
+
+
+def format_summary(summary):
+    lines = [f"{'phase':<22}{'calls':>7}{'total s':>10}{'mean s':>9}{'max s':>9}{'commands':>10}{'cmd/call':>10}{'errors':>8}"]
+    lines.append('-' * len(lines[0]))
+    for phase in summary:
+        lines.append(f"{phase['phase']:<22}{phase['calls']:>7}{phase['seconds']:>10.2f}{phase['mean']:>9.2f}{phase['max']:>9.2f}"
+                     f"{phase['commands']:>10}{phase['commands'] / phase['calls']:>10.1f}{phase['errors']:>8}")
+    lines.append('NOTE: Nested phases (ex. extract inside multiple_pages) are also counted in their parent.')
+    return '\n'.join(lines)
+
+
+def finish_tracing():
+    """
+    Call once at the end of main(). Merges the spans of every process into <folder>/trace.json and prints the summary.
+    :return: The summary (see summarize), None when tracing is off
+    """
+    global _file
+    directory = trace_dir()
+    if directory is None:
+        return None
+    with _write_lock:
+        if _file is not None:
+            _file.close()
+            _file = None
+    spans = load_trace(directory)
+    summary = summarize(spans)
+    with open(os.path.join(directory, 'trace.json'), 'w', encoding='utf-8') as file:
+        json.dump({'summary': summary, 'spans': spans}, file, indent=1)
+    print(format_summary(summary))
+    print("Trace written to:", os.path.join(directory, 'trace.json'))
+    del os.environ[TRACE_DIR_ENV] # NOTE: The next run in this process (benchmark, daemon) starts untraced.
+    return summary
@@ -0,0 +1,223 @@
+"""
+Whisper transcription for the audio CAPTCHA, loaded only when a CAPTCHA actually shows up.
+
+Before: bot.py ran whisper.load_model("base") at import, so every process (and every batch runner worker) paid
+for the model load and held its own copy in RAM even when no CAPTCHA ever appeared.
+Now: transcribe() loads the model on its first call and keeps it for the rest of the process.
+
+Shared service (optional): start_service() starts one process holding the model. Scraper workers find it through
+the SERVICE_ENV/AUTHKEY_ENV environment variables (inherited by the batch runner's workers) and send their audio to
+it over a local socket. The requests go through a queue to a single model thread, so there is one model in RAM no
+matter how many workers run. If the service can't be reached the worker falls back to a model of its own.
+
+In memory audio: transcribe_url() fetches the CAPTCHA audio over a pooled keep-alive session, decodes it by piping
+the bytes through ffmpeg (stdin -> stdout, nothing written to disk) into the 16 kHz float array Whisper works on,
+and hands the array straight to the model. Each step is a tracing span (audio_fetch, audio_decode, audio_transcribe)
+so --trace shows what each one costs.
+
+Usage:
+    text = transcribe_url(audio_url)              # local, lazy
+
+    service = start_service('base')               # in main(), before the workers start
+    ...
+    stop_service(service)
+"""
+
+import os
+import queue
+import secrets
+import subprocess
+import threading
+import time
+import multiprocessing
+from multiprocessing.connection import Listener, Client
+
+import numpy as np
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except ImportError:
+    requests = None
+
+from shared.tracing import span
+
+
+MODEL_ENV = 'WHISPER_MODEL'
+SERVICE_ENV = 'TRANSCRIBE_SERVICE'
+AUTHKEY_ENV = 'TRANSCRIBE_AUTHKEY'
+DEFAULT_MODEL = 'base'
+SAMPLE_RATE = 16000  # What Whisper expects
+
+_models = {}
+_model_lock = threading.Lock()
+_session = None
+
+
+def model_size(size=None):
+    return size or os.environ.get(MODEL_ENV) or DEFAULT_MODEL
+
+
+def load_model(size=None):
+    """
+    Loads a Whisper model the first time it is asked for, then returns the same one.
+    :param size: Whisper model name ('tiny', 'base', 'small', ...). Defaults to WHISPER_MODEL or 'base'
+    """
+    size = model_size(size)
+    with _model_lock:
+        if size not in _models:
+            import whisper # NOTE: Imported here, importing whisper (torch) is itself a large part of the start up cost.
+            print(f"Loading the Whisper '{size}' model...")
+            _models[size] = whisper.load_model(size)
+        return _models[size]
+
+
+def transcribe_local(audio, size=None):
+    """
+    :param audio: Float32 array of 16 kHz mono samples (see decode_audio), or the path of an audio file
+    :return: Transcribed text
+    """
+    return load_model(size).transcribe(audio, fp16=False)["text"]
+
+
+def transcribe(audio, size=None):
+    """
+    Transcribes through the shared service when one is running, with a local lazy model otherwise.
+    :param audio: Same as transcribe_local
+    :param size: Model of the local fallback (the service uses the model it was started with)
+    :return: Transcribed text
+    """
+    address = os.environ.get(SERVICE_ENV)
+    if address:
+        host, port = address.rsplit(':', 1)
+        try:
+            with Client((host, int(port)), authkey=bytes.fromhex(os.environ[AUTHKEY_ENV])) as connection:
+                connection.send(audio)
+                status, result = connection.recv()
+        except (OSError, EOFError, KeyError) as e:
+            print(f"Transcription service not reachable ({e}), using a local model.")
+        else:
+            if status == 'error':
+                raise RuntimeError(f"Transcription service failed: {result}")
+            return result
+    return transcribe_local(audio, size)
+
+
+def audio_session():
+    """
+    Keep-alive session reused for every CAPTCHA audio of the process.
+    """
+    global _session
+    if requests is None:
+        raise ImportError("requests is needed to fetch the CAPTCHA audio: pip install requests")
+    if _session is None:
+        _session = requests.Session()
+        _session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=4))
+    return _session
+
+
+def fetch_audio(url, attempts=5, timeout=30):
+    """
+    Downloads the audio into memory.
+    :return: Bytes of the file
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            response = audio_session().get(url, timeout=timeout)
+            if response.status_code == 200 and response.content:
+                return response.content
+            print(f"Failed to download the audio. Status code: {response.status_code}")
+        except requests.RequestException as e:
+            print(f"An error occurred while downloading the audio: {e}")
+        if attempt < attempts:
+            time.sleep(2)
+    raise RuntimeError(f"Could not download the audio after {attempts} attempts: {url}")
+
+
+def decode_audio(data, sample_rate=SAMPLE_RATE):
+    """
+    Decodes audio bytes (mp3, wav, ...) the same way whisper.load_audio does, but through ffmpeg's stdin/stdout.
+    :return: Float32 numpy array of mono samples between -1 and 1
+    """
+    command = ['ffmpeg', '-nostdin', '-threads', '0', '-i', 'pipe:0',
+               '-f', 's16le', '-ac', '1', '-acodec', 'pcm_s16le', '-ar', str(sample_rate), 'pipe:1']
+    process = subprocess.run(command, input=data, capture_output=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg could not decode the audio: {process.stderr.decode(errors='ignore')[-300:]}")
+    return np.frombuffer(process.stdout, np.int16).astype(np.float32) / 32768.0
+
+
+def transcribe_url(url, size=None):
+    """
+    Fetch, decode and transcribe the audio at url without touching the disk.
+    :return: Transcribed text
+    """
+    with span('audio_fetch'):
+        data = fetch_audio(url)
+    with span('audio_decode'):
+        audio = decode_audio(data)
+    with span('audio_transcribe'):
+        return transcribe(audio, size)
+
+
+def _serve(size, authkey, ready):
+    """
+    Body of the service process: one model thread fed by a queue, one thread per connected worker.
+    """
+    listener = Listener(('127.0.0.1', 0), authkey=authkey)
+    jobs = queue.Queue()
+
+    def model_thread():
+        load_model(size) # NOTE: Loaded while the workers are still starting their browsers.
+        while True:
+            audio, reply = jobs.get()
+            try:
+                reply.put(('ok', transcribe_local(audio, size)))
+            except Exception as e:
+                reply.put(('error', str(e)))
+
+    def connection_thread(connection):
+        with connection:
+            try:
+                audio = connection.recv()
+            except (EOFError, OSError):
+                return
+            reply = queue.Queue(maxsize=1)
+            jobs.put((audio, reply))
+            try:
+                connection.send(reply.get())
+            except OSError:
+                pass # The worker hung up before its answer was ready
+
+    threading.Thread(target=model_thread, daemon=True).start()
+    ready.send(listener.address)
+    while True:
+        try:
+            connection = listener.accept()
+        except (multiprocessing.AuthenticationError, EOFError, OSError):
+            continue # NOTE: A client with the wrong key or that hung up during the handshake, the next one is served.
+        threading.Thread(target=connection_thread, args=(connection,), daemon=True).start()
+
+
+def start_service(size=None):
+    """
+    Starts the shared transcription process and points this process (and the workers it starts) at it.
+    :param size: Whisper model the service holds
+    :return: The service process, for stop_service
+    """
+    authkey = secrets.token_bytes(16)
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_serve, args=(model_size(size), authkey, sender), daemon=True)
+    process.start()
+    host, port = receiver.recv()
+    os.environ[SERVICE_ENV] = f"{host}:{port}"
+    os.environ[AUTHKEY_ENV] = authkey.hex()
+    return process
+
+
+def stop_service(process):
+    os.environ.pop(SERVICE_ENV, None)
+    os.environ.pop(AUTHKEY_ENV, None)
+    if process is not None:
+        process.terminate()
+        process.join(5)
@@ -6,11 +6,25 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import Select
-from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import StaleElementReferenceException
 from urllib.parse import urlparse, parse_qs, urlunparse, urlencode
 import pandas as pd
 import time
+import os
+import sys
+import argparse
+from functools import partial
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')) # So the helpers in tester/shared can be imported
+from shared.batch_runner import run_batch
+from shared.html_parsing import PageParser, parse_tax_cards, load_snapshots
+from shared.tax_http import TaxSearchClient, RequiresBrowser, search_url
+from shared.pagination import crawl_tabs, tax_pager_numbers, CrawlIncomplete
+from shared.result_cache import ResultCache, DEFAULT_PATH as CACHE_PATH
+from shared.checkpoint import CheckpointJournal, start_run, DEFAULT_DIR as CHECKPOINT_DIR
+from shared.tracing import traced, span, start_tracing, finish_tracing
+from shared.command_profiler import profile_commands, start_profiling, finish_profiling
+from shared.browser_profiles import browser_options, apply_profile, needs_full_profile
+from shared.driver_resolver import chromedriver_path
 
 def wait_for_element(driver, locator, wait_time=30):
     """
@@ -22,6 +36,7 @@ def wait_for_element(driver, locator, wait_time=30):
     """
     return WebDriverWait(driver, wait_time).until(EC.element_to_be_clickable(locator))
 
+@traced('validate')
 def validate(driver, wait_time=60):
     """
     Validates if the search results are available or if there are no matches.
@@ -53,6 +68,7 @@ def validate(driver, wait_time=60):
             pass
     return False
 
+@traced('extract')
 def extract_card_data(driver, user_input):
     """
     Extracts data from the search results table.
@@ -89,6 +105,21 @@ def extract_card_data(driver, user_input):
 
     return data
 
+@traced('parse')
+def parse_card_page(html):
+    """
+    Same rows as extract_card_data but parsed from page_source with lxml (see shared/html_parsing.py).
+    :param html: page_source of a results page
+    :return: List of extracted data rows
+    """
+    data = []
+    for card in parse_tax_cards(html, card_class='result'):
+        owner_address = card.addresses.get("OWNER/ADDRESS", 'NULL')
+        if "OWNER/ADDRESS" in card.addresses:
+            owner_address = owner_address.replace(card.owners, '').strip().strip(',')
+        data.append([card.account, card.owners, owner_address, card.addresses.get("ADDRESS", 'NULL'), card.addresses.get("BILLING ADDRESS", 'NULL')])
+    return data
+
 
 def trying(function, attempts=3, delay=2):
     for _ in range(attempts):
@@ -100,88 +131,190 @@ def trying(function, attempts=3, delay=2):
             time.sleep(delay)  # Wait for some time before retrying
     return False
 
-def navigate_to_next_page(driver, current_page_number):
-    """
-    Navigates to the next page of search results by clicking the pagination button.
-    :param driver: WebDriver instance
-    :param current_page_number: The current page number
-    :return: Boolean indicating if navigation was successful
-    """
-    try:
-        # Find the pagination navigation element
-        pagination_nav = wait_for_element(driver, (By.XPATH, "//nav[@aria-label='Pagination']"))
-        ul = pagination_nav.find_element(By.TAG_NAME, 'ul')
-        list_items = ul.find_elements(By.TAG_NAME, 'li')
-
-        # Finding and clicking the next page button
-        for item in list_items:
-            if item.text == str(current_page_number + 1):
-                item.click()
-                return True
-
-        # If the next page button is not found, we might be on the last page
-        return False
-    except NoSuchElementException:
-        # Handle the case where the pagination navigation is not found
-        return False
-
-
-def initialize_driver():
+@traced('driver_start')
+@profile_commands
+def initialize_driver(profile='auto'):
     """
     Initializes and returns a Selenium WebDriver instance.
+    :param profile: Browser profile, 'auto', 'fast' or 'full' (see shared/browser_profiles.py)
     :return: WebDriver instance
     """
-    service = Service(ChromeDriverManager().install())
-    return webdriver.Chrome(service=service)
+    service = Service(chromedriver_path())
+    options, profile = browser_options('county_taxes', profile)
+    return apply_profile(webdriver.Chrome(service=service, options=options), 'county_taxes', profile)
 
-def webscrape(driver, user_input):
+@traced('name')
+def webscrape(driver, user_input, page_parser=None):
     """
     Performs the web scraping task using the provided WebDriver and user input.
     :param driver: WebDriver instance
     :param user_input: User input for search criteria
-    :return: List of scraped data
+    :param page_parser: Optional PageParser. Pages are then parsed from page_source off the browser's critical path
+    :return: Tuple (rows, complete). complete is False when a page failed, rows then hold the pages read before it
     """
     # Navigating to the website and performing the search
-    driver.get("https://lee.county-taxes.com/public/search/property_tax")
-    xpath = "//input[starts-with(@placeholder, 'Enter a name')]"
-    name_field = wait_for_element(driver, (By.XPATH, xpath))
-    name_field.send_keys(user_input)
-    name_field.send_keys(Keys.ENTER)
+    with span('navigate'):
+        driver.get("https://lee.county-taxes.com/public/search/property_tax")
+    with span('search'):
+        xpath = "//input[starts-with(@placeholder, 'Enter a name')]"
+        name_field = wait_for_element(driver, (By.XPATH, xpath))
+        name_field.send_keys(user_input)
+        name_field.send_keys(Keys.ENTER)
 
     if not validate(driver):
-        return []
+        return [], True
+
+    def extract_page(driver, page):
+        if page_parser:
+            wait_for_element(driver, (By.CLASS_NAME, 'category-search-results'))
+            return page_parser.submit(driver.page_source, parse_card_page, name=user_input, page=page)
+        return trying(lambda: extract_card_data(driver, user_input), attempts=10, delay=0.5)
+
+    # Every page is opened by url, a few tabs at once, instead of clicking the pager one page at a time
+    complete = True
+    with span('pages'):
+        try:
+            pages = crawl_tabs(driver, lambda page: search_url('lee', user_input, page), extract_page,
+                               tax_pager_numbers, 'county_taxes')
+        except CrawlIncomplete as e:
+            print(f"{user_input}: {e}")
+            pages, complete = e.pages, False
 
+    if page_parser:
+        return page_parser.gather(pages), complete
     all_data = []
-    current_page_number = 1
-    while True:
-        new_data = trying(lambda: extract_card_data(driver, user_input), attempts=10, delay=0.5)
+    for new_data in pages:
         all_data += new_data
-        if not navigate_to_next_page(driver, current_page_number):
-            break
+    return all_data, complete
+
+def scrape_shard(shard, download_dir, parser='webdriver', snapshot_dir=None, backend='http', cache_path=None, journal_dir=None,
+                 browser_profile='auto'):
+    """
+    Worker used by the batch runner. Owns its own driver for the names it was given.
+    :param shard: List of (index, name) tuples
+    :param download_dir: Download directory of this worker (nothing is downloaded on this site)
+    :param parser: 'webdriver' reads the page through the driver, 'html' parses page_source with lxml on a thread pool
+    :param snapshot_dir: With the html parser, also keep the raw pages in this folder
+    :param backend: 'http' searches with plain requests first (see shared/tax_http.py), 'browser' always uses Selenium
+    :param cache_path: SQLite file of the result cache (see shared/result_cache.py). None disables the cache
+    :param journal_dir: Folder of the checkpoint journal every finished name is written to. None disables it
+    :param browser_profile: 'auto', 'fast' or 'full' (see shared/browser_profiles.py)
+    :return: List of (index, rows) tuples
+    """
+    cache = ResultCache(cache_path) if cache_path else None
+    journal = CheckpointJournal(journal_dir) if journal_dir else None
+    driver, page_parser = None, None
+    try:
+        if cache:
+            hits, pending = cache.split_shard(shard, 'lee', 'tax_collector')
+            results = [(index, rows) for index, _, rows in hits]
+            if journal:
+                for _, name, rows in hits:
+                    journal.record(name, rows)
         else:
-            current_page_number += 1
-        print('\n\n\n' + 'Iteration Complete' + '\n\n\n')
-    return all_data
+            results, pending = [], list(shard)
+
+        if backend == 'http' and pending:
+            client = TaxSearchClient('lee')
+            try:
+                searched = client.search_many([name for _, name in pending], parse_card_page)
+            finally:
+                client.close()
+            browser_names = []
+            for (index, name), rows in zip(pending, searched):
+                if isinstance(rows, RequiresBrowser):
+                    print(f"{name}: {rows}. Using the browser instead.")
+                    browser_names.append((index, name))
+                else:
+                    if cache:
+                        cache.put('lee', 'tax_collector', name, rows)
+                    if journal:
+                        journal.record(name, rows)
+                    results.append((index, rows))
+            pending = browser_names
+        if not pending:
+            return results
+
+        # NOTE: Chrome is only started for the names neither the cache nor the http backend could handle.
+        driver = initialize_driver(browser_profile)
+        page_parser = PageParser(snapshot_dir) if parser == 'html' else None
+        for index, name in pending:
+            try:
+                rows, complete = webscrape(driver, name, page_parser)
+            except Exception as e:
+                if not needs_full_profile(driver, e):
+                    raise
+                # The site broke on the fast profile, the rest of the shard goes on a full profile browser
+                driver.quit()
+                driver = initialize_driver('full')
+                rows, complete = webscrape(driver, name, page_parser)
+            results.append((index, rows))
+            if not complete:
+                continue # NOTE: Partial rows go in this run's results only, the cache and the journal wait for a full search.
+            if cache:
+                cache.put('lee', 'tax_collector', name, rows)
+            if journal:
+                journal.record(name, rows)
+        return results
+    finally:
+        if driver:
+            driver.quit()
+        if page_parser:
+            page_parser.close()
+        if cache:
+            cache.close()
+        if journal:
+            journal.close()
 
 def main():
     """
     Main function to execute the web scraping process.
     """
-    driver = initialize_driver()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=1, help='Number of browsers searching in parallel')
+    parser.add_argument('--parser', choices=['webdriver', 'html'], default='webdriver', help='How result pages are read')
+    parser.add_argument('--snapshots', help='Folder to keep the raw result pages in (html parser only)')
+    parser.add_argument('--reparse', help='Rebuild results.xlsx from a snapshots folder without opening the browser')
+    parser.add_argument('--cache', default=CACHE_PATH, help='SQLite file of the result cache')
+    parser.add_argument('--no-cache', action='store_true', help='Scrape every name again, ignoring the result cache')
+    parser.add_argument('--resume', action='store_true', help='Skip the names already done by the last run (see --checkpoint)')
+    parser.add_argument('--checkpoint', default=CHECKPOINT_DIR, help='Folder of the checkpoint journal')
+    parser.add_argument('--trace', help='Folder to write a per phase timing trace to (trace.json)')
+    parser.add_argument('--profile-commands', help='Folder to write a WebDriver command profile to (commands.json)')
+    parser.add_argument('--browser-profile', choices=['auto', 'fast', 'full'], default='auto', help='auto picks per site (see shared/browser_profiles.py)')
+    parser.add_argument('--backend', choices=['http', 'browser'], default='http', help='http falls back to the browser per name when the site needs JS')
+    args = parser.parse_args()
+    start_tracing(args.trace)  # Does nothing without --trace
+    start_profiling(args.profile_commands)
+
     file = pd.read_excel('./input.xlsx')
     names = file['name'].tolist()
     all_data = []
 
-    for name in names:
-        data = webscrape(driver, name)
-        all_data.extend(data)
+    completed = {} if args.reparse else start_run(args.checkpoint, resume=args.resume)
+    remaining = [name for name in names if str(name) not in completed]
+
+    if args.reparse:
+        for name in names:
+            for html in load_snapshots(args.reparse, name):
+                all_data.extend(parse_card_page(html))
+    else:
+        scrape = partial(scrape_shard, parser=args.parser, snapshot_dir=args.snapshots, backend=args.backend,
+                         cache_path=None if args.no_cache else args.cache, journal_dir=args.checkpoint,
+                         browser_profile=args.browser_profile)
+        scraped = dict(zip(map(str, remaining), run_batch(remaining, scrape, workers=args.workers)))
+        # NOTE: Journal rows first so a resumed run gives the same workbook as an uninterrupted one.
+        for name in names:
+            all_data.extend(completed.get(str(name), scraped.get(str(name))) or [])
 
     # Creating a DataFrame from the extracted data
     df = pd.DataFrame(all_data, columns=['Account', 'Owners', 'Owner Address', 'Address', 'Billing Names & Address'])
 
     # Saving the DataFrame to an Excel file without the index (no additional column of numbers)
-    df.to_excel('results.xlsx', index=False)
-    driver.quit()
+    with span('excel_write'):
+        df.to_excel('results.xlsx', index=False)
+    finish_tracing()
+    finish_profiling()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
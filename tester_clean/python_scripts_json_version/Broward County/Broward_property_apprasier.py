@@ -32,11 +32,16 @@ import time
 import sys
 import json
 import psutil
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')) # json_stream.py sits next to the county folders
+import json_stream
 
 service = Service(ChromeDriverManager().install())
 DRIVER = webdriver.Chrome(service=service)
 main_process_pid = DRIVER.service.process.pid
 
+# Columns of every record sent to the app (also used by scrape_daemon.py)
+COLUMNS = ['Name', 'Strap', 'Folio', 'Owners', 'Owners Address', 'Site Address', 'Property Description']
+
 def terminate_process_and_children(pid):
     try:
         parent = psutil.Process(pid)
@@ -118,7 +123,7 @@ def navigate_to_next_page(old_table_text):
     except NoSuchElementException:
         return False
 
-def webscrape(user_input):
+def webscrape(user_input, on_rows=None):
     # Navigating to the website and performing the search
     DRIVER.get("https://web.bcpa.net/BcpaClient/#/Record-Search")
     name_field = WebDriverWait(DRIVER, 10).until(EC.element_to_be_clickable((By.ID, 'txtField')))
@@ -133,25 +138,38 @@ def webscrape(user_input):
     all_dfs = []
     while True:
         new_data = extract_table_data(user_input)
-        all_dfs += new_data
+        if on_rows:
+            on_rows(new_data)  # Streaming: the page goes out now instead of being kept
+        else:
+            all_dfs += new_data
         table_text = DRIVER.find_element(By.CLASS_NAME, 'resultsDataGrid').text
         if not navigate_to_next_page(table_text):
             break
 
     return all_dfs
 
+def stream_names(names, columns, send=json_stream.emit):
+    # --stream mode, see json_stream.stream_names. Also what scrape_daemon.py calls.
+    json_stream.stream_names(names, columns, lambda name, on_rows: webscrape(name, on_rows=on_rows), send)
+
 def main():
-    columns=['Name', 'Strap', 'Folio', 'Owners', 'Owners Address', 'Site Address', 'Property Description']
+    columns = COLUMNS
 
     response = {"status": "success", "data": []}
 
-    if len(sys.argv) < 2:
+    stream = '--stream' in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != '--stream']
+
+    if len(args) < 1:
         response.update({"status": "error", "data": [{column: 'NULL' for column in columns}]})
         print(json.dumps(response))
         sys.exit(1)
 
     DRIVER.maximize_window()
-    names = ','.join(sys.argv[1:]).split(',')
+    names = ','.join(args).split(',')
+    if stream:
+        stream_names(names, columns)
+        return
     all_dfs = []
 
     
@@ -159,27 +177,10 @@ def main():
         try:
             data = webscrape(name)
             logging.info(data)
-            if data:
-                # Creating a DataFrame from the extracted data
-                df = pd.DataFrame(data, columns=columns)
-
-                df.fillna('NULL', inplace=True)
-                df = df.astype(str)
-                for column in columns:  # Ensure all expected columns are present
-                    if column not in df.columns:
-                        df[column] = 'NULL'
-                df['Search Parameter'] = name
-                all_dfs.extend(df.to_dict(orient="records"))
-            else:
-                # When appending empty or error data:
-                structured_empty_data = [{column: 'NULL' for column in columns}]  # Use a list of one dict
-                structured_empty_data[0]["Search Parameter"] = name
-                all_dfs.extend(structured_empty_data)  # Extend appends each item in the list
+            all_dfs.extend(json_stream.build_records(name, data, columns))
         except Exception as e:
             # When appending empty or error data:
-            structured_empty_data = [{column: 'NULL' for column in columns}]  # Use a list of one dict
-            structured_empty_data[0]["Search Parameter"] = name
-            all_dfs.extend(structured_empty_data)  # Extend appends each item in the list
+            all_dfs.extend(json_stream.build_records(name, [], columns))
     
     response["data"] = all_dfs
     print(json.dumps(response, ensure_ascii=False))
@@ -11,6 +11,15 @@ from webdriver_manager.chrome import ChromeDriverManager
 from urllib.parse import urlparse, parse_qs, urlunparse, urlencode
 import pandas as pd
 import time
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')) # json_stream.py sits next to the county folders
+import json_stream
+
+# Columns of every row (records sent to the app with --stream, results.xlsx otherwise)
+COLUMNS = ['Account', 'Owners', 'Owner Address', 'Address', 'Billing Names & Address']
+
+DRIVER = None # Browser of --stream / scrape_daemon.py, started on the first name and kept for the next ones
 
 def wait_for_element(driver, locator, wait_time=30):
     """
@@ -134,12 +143,13 @@ def initialize_driver():
     service = Service(ChromeDriverManager().install())
     return webdriver.Chrome(service=service)
 
-def webscrape(driver, user_input):
+def webscrape(driver, user_input, on_rows=None):
     """
     Performs the web scraping task using the provided WebDriver and user input.
     :param driver: WebDriver instance
     :param user_input: User input for search criteria
-    :return: List of scraped data
+    :param on_rows: Optional function called with the rows of each page as soon as it is read (--stream)
+    :return: List of scraped data (empty when on_rows is given, the rows went there)
     """
     # Navigating to the website and performing the search
     driver.get("https://lee.county-taxes.com/public/search/property_tax")
@@ -155,7 +165,10 @@ def webscrape(driver, user_input):
     current_page_number = 1
     while True:
         new_data = trying(lambda: extract_card_data(driver, user_input), attempts=10, delay=0.5)
-        all_data += new_data
+        if on_rows:
+            on_rows(new_data or [])  # Streaming: the page goes out now instead of being kept
+        else:
+            all_data += new_data
         if not navigate_to_next_page(driver, current_page_number):
             break
         else:
@@ -163,10 +176,29 @@ def webscrape(driver, user_input):
         print('\n\n\n' + 'Iteration Complete' + '\n\n\n')
     return all_data
 
+def stream_names(names, columns=COLUMNS, send=json_stream.emit):
+    """
+    --stream mode (see json_stream.stream_names), also what scrape_daemon.py calls.
+    """
+    global DRIVER
+    if DRIVER is None:
+        DRIVER = initialize_driver()
+    json_stream.stream_names(names, columns, lambda name, on_rows: webscrape(DRIVER, name, on_rows=on_rows), send)
+
 def main():
     """
     Main function to execute the web scraping process.
+    With --stream the names come from the command line (comma separated) and the rows go to stdout as NDJSON.
     """
+    if '--stream' in sys.argv:
+        names = ','.join(arg for arg in sys.argv[1:] if arg != '--stream').split(',')
+        try:
+            stream_names([name for name in names if name])
+        finally:
+            if DRIVER:
+                DRIVER.quit()
+        return
+
     driver = initialize_driver()
     file = pd.read_excel('./input.xlsx')
     names = file['name'].tolist()
@@ -177,7 +209,7 @@ def main():
         all_data.extend(data)
 
     # Creating a DataFrame from the extracted data
-    df = pd.DataFrame(all_data, columns=['Account', 'Owners', 'Owner Address', 'Address', 'Billing Names & Address'])
+    df = pd.DataFrame(all_data, columns=COLUMNS)
 
     # Saving the DataFrame to an Excel file without the index (no additional column of numbers)
     df.to_excel('results.xlsx', index=False)
@@ -0,0 +1,81 @@
+# json_stream.py file:
+"""
+--stream output shared by the JSON-version scripts (and scrape_daemon.py).
+
+A script gives stream_names its webscrape as scrape(name, on_rows): on_rows is called with the rows of every
+results page as soon as the page is read, so the records reach the app page by page instead of in one response
+once every name is done.
+
+Usage (next to the script's webscrape):
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    import json_stream
+    json_stream.stream_names(names, COLUMNS, lambda name, on_rows: webscrape(name, on_rows=on_rows))
+"""
+
+import contextlib
+import json
+import logging
+import sys
+
+import pandas as pd
+
+
+def build_records(name, data, columns):
+    # Rows of one name as the dicts sent to the app. One NULL record when nothing was found.
+    if not data:
+        structured_empty_data = [{column: 'NULL' for column in columns}]  # Use a list of one dict
+        structured_empty_data[0]["Search Parameter"] = name
+        return structured_empty_data
+
+    # Creating a DataFrame from the extracted data
+    df = pd.DataFrame(data, columns=columns)
+
+    df.fillna('NULL', inplace=True)
+    df = df.astype(str)
+    for column in columns:  # Ensure all expected columns are present
+        if column not in df.columns:
+            df[column] = 'NULL'
+    df['Search Parameter'] = name
+    return df.to_dict(orient="records")
+
+
+def emit(event):
+    # One JSON object per line, flushed right away so the app can read it while the search goes on.
+    # Written to the real stdout: the script's own prints are sent to stderr while a name is scraped.
+    sys.__stdout__.write(json.dumps(event, ensure_ascii=False) + '\n')
+    sys.__stdout__.flush()
+
+
+def stream_names(names, columns, scrape, send=emit):
+    """
+    --stream mode: NDJSON events instead of one response at the end.
+        {"type": "status", "name": ..., "status": "started", "index": 1, "total": 3}
+        {"type": "record", "name": ..., "data": {...}}   one per row, sent per results page
+        {"type": "status", "name": ..., "status": "found" | "no_results" | "error", "records": 12}
+        {"type": "done", "status": "success", "names": 3}
+    Nothing is kept once it is sent, so memory stays the same for 1 or 1000 names.
+    scrape is the script's search, scrape(name, on_rows). send is where the events go (stdout by default,
+    scrape_daemon.py passes its own).
+    """
+    for index, name in enumerate(names, 1):
+        send({"type": "status", "name": name, "status": "started", "index": index, "total": len(names)})
+        sent = 0
+
+        def send_rows(rows):
+            nonlocal sent
+            if rows:
+                for record in build_records(name, rows, columns):
+                    send({"type": "record", "name": name, "data": record})
+                sent += len(rows)
+
+        try:
+            with contextlib.redirect_stdout(sys.stderr): # NOTE: Debug prints of the scripts would break the NDJSON.
+                scrape(name, send_rows)
+            status = "found" if sent else "no_results"
+        except Exception as e:
+            logging.info(e)
+            status = "error"
+        if not sent:
+            send({"type": "record", "name": name, "data": build_records(name, [], columns)[0]})
+        send({"type": "status", "name": name, "status": status, "records": sent})
+    send({"type": "done", "status": "success", "names": len(names)})
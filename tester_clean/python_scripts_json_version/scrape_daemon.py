@@ -0,0 +1,220 @@
+# scrape_daemon.py file:
+"""
+Long-lived scrape daemon for the desktop app.
+
+Running a JSON script per search pays for a new interpreter, the pandas/selenium imports,
+ChromeDriverManager().install() and a new Chrome every time, plus the time.sleep(4) at the end.
+The daemon is started once by the app. It imports each script the first time it is needed and keeps
+it loaded, browser included, so later searches start right away. (The Lee scripts open their browser on
+their first job rather than at import, so --preload only imports them.)
+
+Protocol: one JSON object per line, on stdin (default) or on a local TCP socket (--port).
+    -> {"id": "42", "source": "collier_tax_collector", "names": ["Smith John"]}
+    <- the --stream events of the script (see stream_names), each one with the "id" of its job
+    -> {"type": "ping"}        <- {"type": "pong", "loaded": [...]}
+    -> {"type": "shutdown"}    quits every browser and exits
+
+Jobs for different sources run at the same time. Jobs for the same source wait for each other
+(a script has one browser).
+
+Usage:
+    python scrape_daemon.py                  # jobs on stdin, events on stdout
+    python scrape_daemon.py --port 8765      # jobs on 127.0.0.1:8765
+    python scrape_daemon.py --preload all    # open every browser right away
+"""
+
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import socketserver
+import sys
+import threading
+
+# Sources the daemon can run -> script implementing stream_names/COLUMNS
+SCRIPTS = {
+    'broward_property_appraiser': os.path.join('Broward County', 'Broward_property_apprasier.py'),
+    'collier_tax_collector': os.path.join('Collier County', 'tax_collector.py'),
+    'lee_tax_collector': os.path.join('Lee county', 'Lee tax', 'bot_v1 (3).py'),
+    'lee_property_appraiser': os.path.join('Lee county', 'Lee apprasier', 'bot_v1 (2).py'),
+}
+
+_modules = {}
+_source_locks = {source: threading.Lock() for source in SCRIPTS}
+_load_lock = threading.Lock()
+
+
+def load_script(source):
+    """
+    Imports a script once and keeps it (and the browser it opens at import) for every later job.
+    """
+    with _load_lock:
+        if source not in _modules:
+            path = os.path.join(os.path.dirname(os.path.abspath(__file__)), SCRIPTS[source])
+            spec = importlib.util.spec_from_file_location(f"scrape_{source}", path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            _modules[source] = module
+        return _modules[source]
+
+
+def unload_script(source):
+    """
+    Quits the browser of a script and forgets it, the next job imports it again with a new browser.
+    """
+    with _load_lock:
+        module = _modules.pop(source, None)
+    if module is None:
+        return
+    try:
+        if module.DRIVER:
+            module.DRIVER.quit()
+        if hasattr(module, 'terminate_process_and_children'): # NOTE: The Lee scripts start their browser per job, nothing else to kill.
+            module.terminate_process_and_children(module.main_process_pid)
+    except Exception:
+        pass
+
+
+def browser_alive(module):
+    try:
+        module.DRIVER.current_url
+        return True
+    except Exception:
+        return False
+
+
+def run_job(job, send):
+    """
+    Runs one search job and streams its events through send.
+    :param job: {"id": ..., "source": ..., "names": [...]}
+    :param send: Function writing one event (dict) back to the app
+    """
+    job_id = job.get('id')
+    source = job.get('source')
+    names = job.get('names') or []
+    if isinstance(names, str):
+        names = names.split(',')
+
+    def send_event(event):
+        send(dict(event, id=job_id))
+
+    if source not in SCRIPTS:
+        send_event({"type": "done", "status": "error", "error": f"Unknown source: {source}", "names": 0})
+        return
+
+    with _source_locks[source]:
+        try:
+            module = load_script(source)
+            module.stream_names(names, module.COLUMNS, send=send_event)
+        except Exception as e:
+            logging.info(e)
+            send_event({"type": "done", "status": "error", "error": str(e), "names": len(names)})
+        if source in _modules and not browser_alive(_modules[source]):
+            unload_script(source) # Browser crashed during the job, a fresh one is started on the next job
+
+
+def handle_line(line, send, jobs):
+    """
+    One line of the protocol. Jobs run on their own thread so a long batch doesn't hold up other sources.
+    :param jobs: List the started job threads are added to
+    :return: False once a shutdown was asked for
+    """
+    line = line.strip()
+    if not line:
+        return True
+    try:
+        message = json.loads(line)
+    except ValueError:
+        send({"type": "error", "error": f"Not JSON: {line[:100]}"})
+        return True
+
+    kind = message.get('type', 'search')
+    if kind == 'ping':
+        send({"type": "pong", "loaded": sorted(_modules)})
+    elif kind == 'shutdown':
+        return False
+    else:
+        job = threading.Thread(target=run_job, args=(message, send), daemon=True)
+        job.start()
+        jobs.append(job)
+    return True
+
+
+def line_writer(stream):
+    # Events of concurrent jobs share the stream, the lock keeps every line whole
+    lock = threading.Lock()
+
+    def send(event):
+        with lock:
+            stream.write(json.dumps(event, ensure_ascii=False) + '\n')
+            stream.flush()
+    return send
+
+
+def serve_stdin():
+    send = line_writer(sys.stdout)
+    send({"type": "ready", "sources": sorted(SCRIPTS)})
+    jobs = []
+    for line in sys.stdin:
+        if not handle_line(line, send, jobs):
+            break
+    for job in jobs: # Let running jobs finish before the browsers are quit
+        job.join()
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        stream = self.wfile
+
+        class _Writer:
+            def write(self, text):
+                stream.write(text.encode('utf-8'))
+
+            def flush(self):
+                stream.flush()
+
+        send = line_writer(_Writer())
+        send({"type": "ready", "sources": sorted(SCRIPTS)})
+        jobs = []
+        for raw in self.rfile:
+            if not handle_line(raw.decode('utf-8'), send, jobs):
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                break
+        # NOTE: Keep the connection open until the jobs it started are done sending.
+        for job in jobs:
+            job.join()
+
+
+def serve_socket(port):
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    with socketserver.ThreadingTCPServer(('127.0.0.1', port), _JobHandler) as server:
+        server.daemon_threads = True
+        server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, help='Listen on 127.0.0.1:<port> instead of stdin/stdout')
+    parser.add_argument('--preload', default='', help="Comma separated sources to open right away, or 'all'")
+    args = parser.parse_args()
+
+    preload = list(SCRIPTS) if args.preload == 'all' else [source for source in args.preload.split(',') if source]
+    unknown = [source for source in preload if source not in SCRIPTS]
+    if unknown:
+        parser.error(f"Unknown --preload source(s): {', '.join(unknown)}. Choose from: {', '.join(SCRIPTS)} or 'all'")
+    for source in preload:
+        load_script(source)
+
+    try:
+        if args.port:
+            serve_socket(args.port)
+        else:
+            serve_stdin()
+    finally:
+        for source in list(_modules):
+            unload_script(source)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file